@@ -3,7 +3,6 @@ import pandas as pd
 import requests
 from io import BytesIO
 from datetime import date, timedelta
-import matplotlib.pyplot as plt
 
 
 def aggregate_string(day: date) -> str: 
@@ -35,6 +34,9 @@ def read_spot_price(day: date) -> pd.DataFrame:
     return df
 
 # nur zum testen
-df = read_spot_price(date.today() - timedelta(days=5))
-df.plot()
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    df = read_spot_price(date.today() - timedelta(days=5))
+    df.plot()
+    plt.show()
\ No newline at end of file
@@ -0,0 +1,122 @@
+# scripts/bench_compact_trees.py
+#
+# Kompaktes Baum-Format (src/forecast/compact_trees.py) gegen die
+# sklearn/xgboost-Objekte: Größe, Ladezeit, Vorhersage-Latenz und
+# maximale Abweichung der Vorhersagen – auf synthetischen Daten.
+#
+# Aufruf aus dem Projektroot:
+#     python scripts/bench_compact_trees.py
+#     python scripts/bench_compact_trees.py --meters 200 --days 120 --repeat 20
+
+import argparse
+import io
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from src.bench.synthetic import make_synthetic_raw
+from src.features import build_dataset_leakage_free
+from src.forecast.community_one_day import DEFAULT_MODEL_PARAMS, build_models
+from src.forecast.compact_trees import CompactEnsemble, compile_ensemble
+from src.prep import run_full_preparation
+
+TRAIN_DAYS = 45
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _training_data(n_meters: int, days: int, seed: int):
+    df_gen_raw, df_con_raw = make_synthetic_raw(n_meters=n_meters, days=days, seed=seed)
+    consumption_1h = run_full_preparation(df_gen_raw, df_con_raw)["consumption_1h"]["ConsumptionCommunity"]
+    if consumption_1h.index.tz is None:
+        consumption_1h = consumption_1h.tz_localize("UTC")
+
+    forecast_start = consumption_1h.index.max().floor("D")
+    forecast_end = forecast_start + pd.Timedelta(hours=23)
+    train_start = forecast_start - pd.Timedelta(days=min(TRAIN_DAYS, days - 15))
+    X_train, y_train, X_test, _ = build_dataset_leakage_free(
+        consumption_1h, train_start, forecast_start, forecast_end
+    )
+    return X_train, y_train, X_test
+
+
+def compare_formats(name: str, model, X_test: pd.DataFrame, X_batch: pd.DataFrame,
+                    repeat: int, tmp_dir: Path) -> dict:
+    compact = compile_ensemble(model, feature_names=X_test.columns)
+
+    pickled = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    npz_path = compact.save(tmp_dir / f"{name}.npz")
+
+    # Original: n_jobs=1 wie im Hot-Path eines Serving-Prozesses
+    model.set_params(n_jobs=1)
+
+    res = {
+        "n_trees": compact.n_trees,
+        "n_nodes": compact.n_nodes,
+        "size_pickle_mb": len(pickled) / 1e6,
+        "size_compact_mb": npz_path.stat().st_size / 1e6,
+        "load_pickle_s": _best_of(lambda: pickle.load(io.BytesIO(pickled)), repeat),
+        "load_compact_s": _best_of(lambda: CompactEnsemble.load(npz_path), repeat),
+        "max_abs_diff": float(max(
+            np.abs(model.predict(X) - compact.predict(X)).max() for X in (X_test, X_batch)
+        )),
+    }
+    for label, X in (("24", X_test), (str(len(X_batch)), X_batch)):
+        res[f"predict_{label}_orig_s"] = _best_of(lambda: model.predict(X), repeat)
+        res[f"predict_{label}_compact_s"] = _best_of(lambda: compact.predict(X), repeat)
+    return res
+
+
+def _print_report(name: str, res: dict) -> None:
+    print(f"\n{name}: {res['n_trees']} Bäume, {res['n_nodes']:,} Knoten, "
+          f"max |Δ| = {res['max_abs_diff']:.3g}")
+    print(f"  {'':22s} {'Original':>12s} {'Kompakt':>12s} {'Faktor':>8s}")
+    rows = [("Größe (MB)", "size_pickle_mb", "size_compact_mb"),
+            ("Laden (ms)", "load_pickle_s", "load_compact_s")]
+    rows += [
+        (f"Predict {k.split('_')[1]} Zeilen (ms)", k, k.replace("_orig_", "_compact_"))
+        for k in res if k.startswith("predict_") and k.endswith("_orig_s")
+    ]
+    for label, a, b in rows:
+        scale = 1.0 if a.startswith("size") else 1e3
+        print(f"  {label:22s} {res[a] * scale:12.2f} {res[b] * scale:12.2f} {res[a] / res[b]:7.1f}×")
+
+
+def run_compact_benchmark(n_meters: int, days: int, repeat: int, seed: int = 0) -> dict:
+    X_train, y_train, X_test = _training_data(n_meters, days, seed)
+    print(f"Training: {len(X_train)} Zeilen × {X_train.shape[1]} Features, Test: {len(X_test)} Zeilen")
+
+    results = {}
+    params = {name: dict(p) for name, p in DEFAULT_MODEL_PARAMS.items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, model in build_models(params=params).items():
+            model.fit(X_train, y_train)
+            results[name] = compare_formats(name, model, X_test, X_train, repeat, Path(tmp))
+            _print_report(name, results[name])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kompaktes Baum-Format vs sklearn/xgboost")
+    parser.add_argument("--meters", type=int, default=100)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_compact_benchmark(args.meters, args.days, args.repeat, args.seed)
@@ -0,0 +1,81 @@
+# scripts/bench_extract.py
+#
+# End-to-End-Durchsatz der SQL-Extraktion gegen den lokalen Stand-in
+# (src/bench/local_db.py) – Zeilen/s und MB/s, in-memory und chunkweise.
+#
+# Aufruf aus dem Projektroot:
+#     python scripts/bench_extract.py --meters 1000 --days 30
+#     python scripts/bench_extract.py --meters 100000 --days 7 --chunksize 1000000
+#     python scripts/bench_extract.py --url mssql+pyodbc://...   # andere DB messen
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import pandas as pd
+
+from src.bench.local_db import LOCAL_DB_PATH, build_local_db, local_db_url
+from src.config import DB_COMMUNITY_ID
+from src.db import get_engine
+from src.extract import QUERY_CON, QUERY_GEN, read_raw, render_query
+
+
+def _report(label: str, rows: int, nbytes: int, sec: float) -> None:
+    print(
+        f"  {label:24s} {rows:>12,} Zeilen  {sec:8.2f} s  "
+        f"{rows / sec:>12,.0f} Zeilen/s  {nbytes / 1e6 / sec:8.1f} MB/s"
+    )
+
+
+def run_extract_benchmark(url: str, chunksize: int, community_id: int = DB_COMMUNITY_ID) -> None:
+    engine = get_engine(url)
+    print(f"Engine: {engine.dialect.name}")
+
+    # ---------------- in-memory (wie extract_raw) ----------------
+    t0 = time.perf_counter()
+    df_gen, df_con = read_raw(engine, community_id=community_id)
+    sec = time.perf_counter() - t0
+    rows = len(df_gen) + len(df_con)
+    nbytes = int(df_gen.memory_usage(deep=True).sum() + df_con.memory_usage(deep=True).sum())
+    _report("read_raw", rows, nbytes, sec)
+    del df_gen, df_con
+
+    # ---------------- chunkweise (wie extract_raw_partitioned) ----
+    for label, query in (("chunks generation", QUERY_GEN), ("chunks consumption", QUERY_CON)):
+        rows = nbytes = 0
+        t0 = time.perf_counter()
+        for chunk in pd.read_sql(
+            render_query(query, engine, community_id), engine,
+            chunksize=chunksize, parse_dates=["DateTimeUtc"],
+        ):
+            rows += len(chunk)
+            nbytes += int(chunk.memory_usage(deep=True).sum())
+        _report(label, rows, nbytes, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Durchsatz-Benchmark der SQL-Extraktion")
+    parser.add_argument("--meters", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--db", type=Path, default=LOCAL_DB_PATH, help="Pfad der SQLite-Stand-in-DB")
+    parser.add_argument("--rebuild", action="store_true", help="DB neu erzeugen (auch wenn Größe/Tage passen)")
+    parser.add_argument("--url", default=None, help="statt lokaler DB diese SQLAlchemy-URL messen")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    parser.add_argument("--community-id", type=int, default=DB_COMMUNITY_ID)
+    args = parser.parse_args()
+
+    url = args.url
+    if url is None:
+        t0 = time.perf_counter()
+        build_local_db(
+            args.db, n_meters=args.meters, days=args.days,
+            community_id=args.community_id, overwrite=args.rebuild,
+        )
+        print(f"DB bereit nach {time.perf_counter() - t0:.1f} s")
+        url = local_db_url(args.db)
+
+    run_extract_benchmark(url, args.chunksize, args.community_id)
@@ -0,0 +1,281 @@
+# scripts/bench_pipeline.py
+#
+# Offline-Benchmark der Pipeline-Stufen auf synthetischen Community-Daten
+# (src/bench/synthetic.py) – ohne SQL Server, APG oder CDS.
+#
+# Aufruf aus dem Projektroot:
+#     python scripts/bench_pipeline.py [--scales small,medium] [--repeat 3]
+#     python scripts/bench_pipeline.py --save-baseline           # Referenz ablegen
+#     python scripts/bench_pipeline.py --tolerance 0.25          # vs. Baseline prüfen
+#
+# Exit-Code 1, wenn eine Stufe langsamer als Baseline × (1 + tolerance) ist
+# oder der 15min-Modus sein Zeitbudget (BUDGET_15MIN_RATIO) reißt.
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from src.bench.synthetic import make_synthetic_raw, make_synthetic_spot, write_synthetic_era5
+
+RESULTS_DIR = PROJECT_ROOT / "data" / "bench"
+BASELINE_PATH = RESULTS_DIR / "baseline.json"
+
+# Skalen: Zählpunkte × Tage Historie
+SCALES = {
+    "small": {"n_meters": 50, "days": 60},
+    "medium": {"n_meters": 200, "days": 120},
+    "large": {"n_meters": 1000, "days": 365},
+}
+
+TRAIN_DAYS = 45
+
+# Kleine Laufzeiten schwanken stark → absolute Mindestabweichung
+MIN_ABS_REGRESSION_S = 0.05
+
+# Zeitbudget 15min-Modus: Feature-Build + Training höchstens so viel mal
+# langsamer als im Stundenmodus (4× Zeilen → vektorisiert/float32/max_samples)
+BUDGET_15MIN_RATIO = 2.0
+BUDGET_STAGES = ["build_dataset", "fit_RF", "fit_XGB"]
+
+
+def _best_of(fn, repeat: int) -> tuple[float, object]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _default_params() -> dict:
+    # feste Default-Hyperparameter: ein lokales model_params.json (tune)
+    # darf die Timings gegen die Baseline nicht verschieben
+    from src.forecast.community_one_day import DEFAULT_MODEL_PARAMS
+
+    return {name: dict(p) for name, p in DEFAULT_MODEL_PARAMS.items()}
+
+
+def bench_scale(scale: str, repeat: int = 3, seed: int = 0) -> dict:
+    from src.evaluation.community_costs import compute_costs
+    from src.features import build_dataset_leakage_free, make_features_no_leakage, rolling_slope
+    from src.forecast.community_one_day import build_models
+    from src.prep import run_full_preparation
+    from src.weather.era5_loader import load_era5_plz
+
+    cfg = SCALES[scale]
+    df_gen_raw, df_con_raw = make_synthetic_raw(**cfg, seed=seed)
+
+    res = {
+        "rows_gen": len(df_gen_raw),
+        "rows_con": len(df_con_raw),
+        "timings_s": {},
+    }
+    t = res["timings_s"]
+
+    # ---------------- Prep ----------------
+    t["prep"], prep = _best_of(lambda: run_full_preparation(df_gen_raw, df_con_raw), repeat)
+    consumption_1h = prep["consumption_1h"]["ConsumptionCommunity"]
+    if consumption_1h.index.tz is None:
+        consumption_1h = consumption_1h.tz_localize("UTC")
+
+    # ---------------- Features ------------
+    t["rolling_slope_336"], _ = _best_of(lambda: rolling_slope(consumption_1h, 336), repeat)
+    t["make_features"], _ = _best_of(lambda: make_features_no_leakage(consumption_1h), repeat)
+
+    forecast_start = consumption_1h.index.max().floor("D")
+    forecast_end = forecast_start + pd.Timedelta(hours=23)
+    train_start = forecast_start - pd.Timedelta(days=min(TRAIN_DAYS, cfg["days"] - 15))
+
+    # volles Feature-Set: build_dataset_leakage_free direkt statt
+    # fit_predict_day → ein lokales feature_spec.json (prune-features) wirkt nicht
+    t["build_dataset"], (X_train, y_train, X_test, y_test) = _best_of(
+        lambda: build_dataset_leakage_free(consumption_1h, train_start, forecast_start, forecast_end),
+        repeat,
+    )
+
+    # ---------------- Training ------------
+    # Einmalig (teuer) – repeat gilt nicht
+    forecasts = []
+    for name, model in build_models(params=_default_params()).items():
+        t[f"fit_{name}"], _ = _best_of(lambda: model.fit(X_train, y_train), 1)
+        forecasts.append(pd.DataFrame({
+            "DateTimeUtc": X_test.index,
+            "forecast_consumption": model.predict(X_test),
+            "model": name,
+        }))
+
+    # XGB hist + Early Stopping (Suche + Refit) statt XGBRegressor
+    xgb_hist = build_models(params=_default_params(), xgb_hist=True)["XGB"]
+    t["fit_XGB_hist"], _ = _best_of(lambda: xgb_hist.fit(X_train, y_train), 1)
+
+    # ---------------- Kosten --------------
+    df_fc = pd.concat(forecasts, ignore_index=True)
+    actual = pd.DataFrame({"DateTimeUtc": y_test.index, "actual_consumption": y_test.to_numpy()})
+    spot = make_synthetic_spot(pd.DatetimeIndex([forecast_start]), seed=seed)
+    t["compute_costs"], _ = _best_of(
+        lambda: compute_costs(df_fc, actual, forecast_start.date().isoformat(), spot=spot),
+        repeat,
+    )
+
+    # ---------------- 15min-Modus ---------
+    t["prep_15min"], prep_15 = _best_of(
+        lambda: run_full_preparation(df_gen_raw, df_con_raw, freq="15min"), repeat
+    )
+    consumption_15 = prep_15["consumption_1h"]["ConsumptionCommunity"]
+    forecast_end_15 = forecast_start + pd.Timedelta(days=1) - pd.Timedelta("15min")
+
+    t["build_dataset_15min"], (X15_train, y15_train, _, _) = _best_of(
+        lambda: build_dataset_leakage_free(
+            consumption_15, train_start, forecast_start, forecast_end_15, freq="15min"
+        ),
+        repeat,
+    )
+    for name, model in build_models(params=_default_params(), freq="15min").items():
+        t[f"fit_{name}_15min"], _ = _best_of(lambda: model.fit(X15_train, y15_train), 1)
+
+    # ---------------- ERA5 ----------------
+    plz_list = sorted(df_gen_raw["PostalCode"].unique())
+    with tempfile.TemporaryDirectory() as tmp:
+        era5_dir = Path(tmp)
+        write_synthetic_era5(era5_dir, plz_list, days=cfg["days"], seed=seed)
+        t["era5_load"], _ = _best_of(
+            lambda: [load_era5_plz(p, era5_dir) for p in plz_list], repeat
+        )
+    res["n_plz"] = len(plz_list)
+
+    return res
+
+
+def budget_violations(results: dict, ratio: float = BUDGET_15MIN_RATIO) -> list[str]:
+    out = []
+    for scale, res in results["scales"].items():
+        t = res["timings_s"]
+        hourly = sum(t[s] for s in BUDGET_STAGES)
+        fine = sum(t[f"{s}_15min"] for s in BUDGET_STAGES)
+        if fine > ratio * hourly:
+            out.append(f"{scale}: 15min {fine:.2f}s > {ratio:g} × 1h {hourly:.2f}s")
+    return out
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for scale, res in results["scales"].items():
+        base = baseline.get("scales", {}).get(scale)
+        if base is None:
+            continue
+        for stage, sec in res["timings_s"].items():
+            ref = base["timings_s"].get(stage)
+            if ref is None:
+                continue
+            if sec > ref * (1 + tolerance) and sec - ref > MIN_ABS_REGRESSION_S:
+                regressions.append(f"{scale}/{stage}: {sec:.3f}s vs. {ref:.3f}s (+{sec / ref - 1:.0%})")
+    return regressions
+
+
+def run_pipeline_benchmark(
+    scales: list[str],
+    repeat: int = 3,
+    seed: int = 0,
+    baseline_path: Path = BASELINE_PATH,
+    tolerance: float = 0.25,
+    save_baseline: bool = False,
+) -> bool:
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": repeat,
+        "seed": seed,
+        "model_params": _default_params(),
+        "scales": {},
+    }
+
+    for scale in scales:
+        print(f"\n=== {scale}: {SCALES[scale]} ===")
+        res = bench_scale(scale, repeat=repeat, seed=seed)
+        results["scales"][scale] = res
+        print(f"rows gen={res['rows_gen']:,} con={res['rows_con']:,} plz={res['n_plz']}")
+        for stage, sec in res["timings_s"].items():
+            print(f"  {stage:22s} {sec:9.3f} s")
+
+    over_budget = budget_violations(results)
+    for v in over_budget:
+        print(f" ⚠️ 15min-Budget überschritten – {v}")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out = RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.write_text(json.dumps(results, indent=2))
+    print(f"\n💾 Ergebnisse: {out}")
+
+    if save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"💾 Baseline: {baseline_path}")
+        return not over_budget
+
+    if not baseline_path.exists():
+        print(" Keine Baseline vorhanden (--save-baseline)")
+        return not over_budget
+
+    regressions = compare_to_baseline(results, json.loads(baseline_path.read_text()), tolerance)
+    if regressions:
+        print(f" Regressionen (> {tolerance:.0%} langsamer als Baseline):")
+        for r in regressions:
+            print(f"  - {r}")
+        return False
+    if over_budget:
+        return False
+
+    print(f" OK – keine Stufe > {tolerance:.0%} langsamer als Baseline")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline-Benchmark der Pipeline-Stufen")
+    parser.add_argument("--scales", default="small,medium", help=f"kommagetrennt aus {','.join(SCALES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="erlaubte relative Verlangsamung")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f"Unbekannte Skala: {', '.join(sorted(unknown))}")
+
+    ok = run_pipeline_benchmark(
+        scales,
+        repeat=args.repeat,
+        seed=args.seed,
+        baseline_path=args.baseline,
+        tolerance=args.tolerance,
+        save_baseline=args.save_baseline,
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,96 @@
+# scripts/bench_startup.py
+#
+# Misst die Startzeit der Entry-Points (Import + --help) in frischen Prozessen.
+# Aufruf aus dem Projektroot:
+#     python scripts/bench_startup.py [--repeat 5] [--budget 1.0]
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Module, die nur importiert werden (keine Seiteneffekte erlaubt)
+IMPORT_TARGETS = [
+    "src.config",
+    "src.cli",
+    "src.context",
+    "src.extract",
+    "src.prep",
+    "src.features",
+    "src.main_extract_and_prep",
+    "src.forecast.community_one_day",
+    "src.evaluation.community_costs",
+    "src.evaluation.community_backtest",
+    "src.weather.temperature",
+    "src.weather.era5_downloader",
+    "src.weather.era5_updater",
+]
+
+# Entry-Points mit CLI → "python -m <modul> --help"
+HELP_TARGETS = [
+    "src.cli",
+    "src.main_extract_and_prep",
+    "src.forecast.community_one_day",
+]
+
+# Diese Libraries dürfen beim reinen Import NICHT geladen werden
+HEAVY_MODULES = ["sklearn", "xgboost", "plotly", "xarray", "cdsapi", "sqlalchemy", "requests"]
+
+
+def _time_cmd(cmd: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, cwd=PROJECT_ROOT, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _heavy_loaded(module: str) -> list[str]:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    return [m for m in out.split(",") if m]
+
+
+def run_startup_benchmark(repeat: int = 5, budget: float = 1.0) -> bool:
+    ok = True
+
+    print(f"{'Target':45s} {'best [s]':>9s}  heavy imports")
+    print("-" * 75)
+
+    baseline = _time_cmd([sys.executable, "-c", "pass"], repeat)
+    print(f"{'(python -c pass)':45s} {baseline:9.3f}")
+
+    for module in IMPORT_TARGETS:
+        t = _time_cmd([sys.executable, "-c", f"import {module}"], repeat)
+        heavy = _heavy_loaded(module)
+        flag = "" if not heavy else "  ⚠️ " + ",".join(heavy)
+        print(f"{'import ' + module:45s} {t:9.3f}{flag}")
+        ok &= not heavy and t < budget
+
+    for module in HELP_TARGETS:
+        t = _time_cmd([sys.executable, "-m", module, "--help"], repeat)
+        print(f"{'-m ' + module + ' --help':45s} {t:9.3f}")
+        ok &= t < budget
+
+    print("-" * 75)
+    print(" OK" if ok else f" Budget ({budget:.2f}s) überschritten oder Heavy-Import beim Start")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startzeit-Benchmark der Entry-Points")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.0, help="max. Sekunden pro Entry-Point")
+    args = parser.parse_args()
+
+    sys.exit(0 if run_startup_benchmark(args.repeat, args.budget) else 1)
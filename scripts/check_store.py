@@ -0,0 +1,59 @@
+# scripts/check_store.py
+#
+# Regressionscheck für das Forecast-Dataset (src/forecast/store.py):
+# ein Neulauf ersetzt den alten Lauf einer Partition GANZ. Schreibt der
+# zweite Lauf weniger Slots (z.B. maskierte Test-Zeilen), dürfen keine
+# Zeilen des ersten Laufs beim Lesen oder nach compact übrig bleiben.
+#
+# Aufruf aus dem Projektroot:
+#     python scripts/check_store.py
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np
+import pandas as pd
+
+from src.forecast.store import (
+    FORECAST_KEYS,
+    FORECAST_PARTITIONS,
+    compact_dataset,
+    read_forecasts,
+    write_forecast,
+)
+
+DAY = "2025-02-16"
+
+
+def _run(n_slots: int, value: float) -> pd.DataFrame:
+    return pd.DataFrame({
+        "DateTimeUtc": pd.date_range(DAY, periods=n_slots, freq="1h", tz="UTC"),
+        "forecast_consumption": np.full(n_slots, value),
+        "model": "RF",
+        "use_temperature": False,
+        "forecast_day": DAY,
+    })
+
+
+def check(root: Path) -> None:
+    write_forecast(_run(24, 1.0), variant="no_temp", community_id=1, root=root)
+    time.sleep(0.01)    # run_ts muss sich unterscheiden
+    write_forecast(_run(20, 2.0), variant="no_temp", community_id=1, root=root)
+
+    for stage in ("read", "compact"):
+        if stage == "compact":
+            assert compact_dataset(root, FORECAST_PARTITIONS, FORECAST_KEYS) == 1
+        df = read_forecasts(DAY, DAY, community_id=1, root=root)
+        assert len(df) == 20, f"{stage}: {len(df)} Zeilen statt 20"
+        assert (df["forecast_consumption"] == 2.0).all(), f"{stage}: Zeilen des alten Laufs"
+        print(f" ✅ {stage}: 20 Zeilen, nur jüngster Lauf")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check(Path(tmp) / "dataset")
@@ -1,13 +1,13 @@
 # scripts/plot_prep_timeseries.py
 
-import os
 import plotly.graph_objects as go
+from pathlib import Path
 
 from src.extract import extract_raw
 from src.prep import run_full_preparation
+from src.utils.plotting import line_trace, write_html
 
 PLOT_DIR = "plots/prep"
-os.makedirs(PLOT_DIR, exist_ok=True)
 
 
 def plot_consumption_vs_generation():
@@ -26,7 +26,7 @@ def plot_consumption_vs_generation():
     # -----------------------------
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=pv.index,
         y=pv.values,
         mode="lines",
@@ -34,7 +34,7 @@ def plot_consumption_vs_generation():
         line=dict(color="gold", width=1.5),
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=water.index,
         y=water.values,
         mode="lines",
@@ -42,7 +42,7 @@ def plot_consumption_vs_generation():
         line=dict(color="blue", width=1.5),
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=consumption.index,
         y=consumption.values,
         mode="lines",
@@ -58,8 +58,8 @@ def plot_consumption_vs_generation():
         template="plotly_white",
     )
 
-    out_path = os.path.join(PLOT_DIR, "consumption_vs_generation.html")
-    fig.write_html(out_path)
+    out_path = Path(PLOT_DIR) / "consumption_vs_generation.html"
+    write_html(fig, out_path)
     print(f" Plot gespeichert: {out_path}")
 
 
@@ -0,0 +1,6 @@
+# python -m src  →  gleiche CLI wie python -m src.cli
+import sys
+
+from src.cli import main
+
+sys.exit(main())
@@ -0,0 +1,174 @@
+# src/bench/local_db.py
+#
+# Lokaler Stand-in für NobileConnected: SQLite-Datei mit den Tabellen
+# MeterGeneration, MeterConsumption, MeteringPoint und Adress, befüllt mit
+# synthetischen Daten (src/bench/synthetic.py). Über DB_URL bzw.
+# get_engine(url) läuft extract.py unverändert dagegen.
+#
+# Die Tabelle BenchMeta hält die Erzeugungsparameter (Zählpunkte, Tage,
+# Communities, Seed): eine vorhandene Datei wird nur wiederverwendet, wenn
+# sie zur angefragten Größe passt, sonst neu gebaut.
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from src.bench.synthetic import make_synthetic_raw
+from src.config import DATA_DIR, DB_COMMUNITY_ID
+
+LOCAL_DB_PATH = DATA_DIR / "bench" / "nobile.sqlite"
+
+SCHEMA_SQL = """
+CREATE TABLE Adress (
+    ID          INTEGER PRIMARY KEY,
+    PostalCode  TEXT,
+    City        TEXT
+);
+CREATE TABLE MeteringPoint (
+    ID            INTEGER PRIMARY KEY,
+    Number        TEXT,
+    EnergySource  TEXT,
+    AdressId      INTEGER REFERENCES Adress(ID)
+);
+CREATE TABLE MeterGeneration (
+    CommunityId          INTEGER,
+    DateTimeUtc          TIMESTAMP,
+    Generation           REAL,
+    GenerationCommunity  REAL,
+    MeteringPointId      INTEGER REFERENCES MeteringPoint(ID)
+);
+CREATE TABLE MeterConsumption (
+    CommunityId           INTEGER,
+    DateTimeUtc           TIMESTAMP,
+    Consumption           REAL,
+    ConsumptionCommunity  REAL,
+    MeteringPointId       INTEGER REFERENCES MeteringPoint(ID)
+);
+CREATE TABLE BenchMeta (
+    Key    TEXT PRIMARY KEY,
+    Value  TEXT
+);
+"""
+
+# Nach dem Laden anlegen (schneller als während der Inserts)
+INDEX_SQL = """
+CREATE INDEX IX_MeterGeneration_Community_Time ON MeterGeneration (CommunityId, DateTimeUtc);
+CREATE INDEX IX_MeterConsumption_Community_Time ON MeterConsumption (CommunityId, DateTimeUtc);
+"""
+
+
+def local_db_url(path: Path = LOCAL_DB_PATH) -> str:
+    return f"sqlite:///{Path(path).resolve()}"
+
+
+def read_meta(path: Path = LOCAL_DB_PATH) -> dict:
+    """Erzeugungsparameter einer Stand-in-DB ({} ohne BenchMeta, z.B. alte Dateien)."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT Key, Value FROM BenchMeta").fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    finally:
+        conn.close()
+    return {k: json.loads(v) for k, v in rows}
+
+
+def _insert(conn: sqlite3.Connection, table: str, df: pd.DataFrame) -> None:
+    cols = ", ".join(df.columns)
+    marks = ", ".join("?" * len(df.columns))
+    conn.executemany(
+        f"INSERT INTO {table} ({cols}) VALUES ({marks})",
+        df.itertuples(index=False, name=None),
+    )
+
+
+def build_local_db(
+    path: Path = LOCAL_DB_PATH,
+    n_meters: int = 1000,
+    days: int = 30,
+    community_id: int | Iterable[int] = DB_COMMUNITY_ID,
+    chunk_meters: int = 500,
+    seed: int = 0,
+    overwrite: bool = False,
+) -> Path:
+    """
+    Erzeugt die Stand-in-DB. Zählpunkte werden in Blöcken zu chunk_meters
+    generiert und geschrieben – Speicherbedarf unabhängig von n_meters.
+    Mehrere community_ids: n_meters Zählpunkte pro Community.
+    Vorhandene Datei: wiederverwendet, wenn BenchMeta zu den Parametern
+    passt, sonst (oder mit overwrite) neu erzeugt.
+    """
+    ids = [community_id] if isinstance(community_id, int) else list(community_id)
+    path = Path(path)
+    meta = {"n_meters": n_meters, "days": days, "community_ids": ids,
+            "chunk_meters": chunk_meters, "seed": seed}
+    if path.exists():
+        if not overwrite:
+            found = read_meta(path)
+            if found == meta:
+                return path
+            print(f" Lokale DB {path} passt nicht zur Anfrage ({found or 'ohne BenchMeta'} "
+                  f"statt {meta}) – wird neu erzeugt")
+        path.unlink()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(path)
+    # Bulk-Load: kein Journal/Sync – Datei ist bei Abbruch ohnehin wegzuwerfen
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.executescript(SCHEMA_SQL)
+
+    offset = 0
+    chunks = [(cid, start) for cid in ids for start in range(0, n_meters, chunk_meters)]
+    for i, (cid, start) in enumerate(chunks):
+        n = min(chunk_meters, n_meters - start)
+        df_gen, df_con = make_synthetic_raw(
+            n_meters=n, days=days, community_id=cid, seed=seed + i
+        )
+        for df in (df_gen, df_con):
+            df["MeteringPointId"] += offset
+            # SQL Server liefert naive UTC; SQLite speichert als Text
+            df["DateTimeUtc"] = df["DateTimeUtc"].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+        meters = (
+            pd.concat([df_gen, df_con])
+            .drop_duplicates("MeteringPointId")
+            [["MeteringPointId", "Number", "EnergySource", "PostalCode", "City"]]
+        )
+        _insert(conn, "Adress", pd.DataFrame({
+            "ID": meters["MeteringPointId"],
+            "PostalCode": meters["PostalCode"],
+            "City": meters["City"],
+        }))
+        _insert(conn, "MeteringPoint", pd.DataFrame({
+            "ID": meters["MeteringPointId"],
+            "Number": meters["Number"],
+            "EnergySource": meters["EnergySource"],
+            "AdressId": meters["MeteringPointId"],
+        }))
+        _insert(conn, "MeterGeneration", df_gen[
+            ["CommunityId", "DateTimeUtc", "Generation", "GenerationCommunity", "MeteringPointId"]
+        ])
+        _insert(conn, "MeterConsumption", df_con[
+            ["CommunityId", "DateTimeUtc", "Consumption", "ConsumptionCommunity", "MeteringPointId"]
+        ])
+        conn.commit()
+
+        offset = int(meters["MeteringPointId"].max())
+        print(f" Community {cid}: {start + n}/{n_meters} Zählpunkte geschrieben")
+
+    conn.executescript(INDEX_SQL)
+    # zuletzt: eine abgebrochene Erzeugung hat keine Meta → wird neu gebaut
+    _insert(conn, "BenchMeta", pd.DataFrame({
+        "Key": list(meta), "Value": [json.dumps(v) for v in meta.values()],
+    }))
+    conn.commit()
+    conn.close()
+
+    print(f"💾 Lokale DB: {path} ({path.stat().st_size / 1e6:.1f} MB)")
+    return path
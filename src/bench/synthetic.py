@@ -0,0 +1,190 @@
+# src/bench/synthetic.py
+#
+# Synthetische Rohdaten im Schema von df_gen_raw / df_con_raw
+# (15-Minuten-Werte, Tages- und Jahresgang) für Offline-Benchmarks –
+# kein SQL Server nötig.
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.geo.plz_registry import PLZ_TO_LATLON
+
+# Anteil der Erzeugungs-Zählpunkte je EnergySource (siehe prep.ENERGY_SOURCE_MAP)
+DEFAULT_SOURCE_MIX = {
+    "1": 0.45,   # pv_sued
+    "2": 0.25,   # pv_ostwest
+    "3": 0.10,   # water
+    "4": 0.10,   # wind
+    "5": 0.10,   # biomass
+}
+
+# Netzbetreiber-Codes aus prep.netzbetreiber_map
+_GRID_CODES = ["001000", "002000", "003000", "006000", "007000", "011000"]
+
+COMMUNITY_SHARE = 0.6
+
+
+def _meter_numbers(ids: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    codes = rng.choice(_GRID_CODES, size=len(ids))
+    return np.array([f"AT{c}{i:025d}" for c, i in zip(codes, ids)])
+
+
+def _consumption_profile(ts: pd.DatetimeIndex) -> np.ndarray:
+    """kWh pro 15 min für einen Haushalt: Morgen-/Abendspitze, Winter höher."""
+    h = ts.hour.to_numpy() + ts.minute.to_numpy() / 60
+    daily = (
+        0.6
+        + 0.5 * np.exp(-((h - 7.5) ** 2) / 2)
+        + 0.9 * np.exp(-((h - 19) ** 2) / 4)
+    )
+    doy = ts.dayofyear.to_numpy()
+    seasonal = 1 + 0.3 * np.cos(2 * np.pi * (doy - 15) / 365)
+    weekend = np.where(ts.weekday.to_numpy() >= 5, 1.1, 1.0)
+    return 0.12 * daily * seasonal * weekend
+
+
+def _generation_profile(ts: pd.DatetimeIndex, source: str, rng: np.random.Generator) -> np.ndarray:
+    h = ts.hour.to_numpy() + ts.minute.to_numpy() / 60
+    doy = ts.dayofyear.to_numpy()
+    n = len(ts)
+
+    if source in ("1", "2"):
+        # PV: Tagesbogen (UTC ≈ lokal − 1h), Sommer länger/höher, Wolken als Tagesfaktor
+        width = 5 + 2.5 * np.cos(2 * np.pi * (doy - 172) / 365)
+        center = 11.0 if source == "1" else 11.5
+        shape = np.clip(1 - ((h - center) / width) ** 2, 0, None)
+        if source == "2":
+            shape = shape ** 0.7 * 0.8
+        peak = 1.2 + 0.8 * np.cos(2 * np.pi * (doy - 172) / 365)
+        cloud = np.repeat(rng.uniform(0.3, 1.0, n // 96 + 1), 96)[:n]
+        return shape * peak * cloud
+    if source == "3":
+        # Wasser: konstant mit Schneeschmelze im Frühjahr
+        return 2.0 * (1 + 0.5 * np.exp(-((doy - 140) ** 2) / (2 * 30 ** 2)))
+    if source == "4":
+        # Wind: positiver AR(1)-Prozess
+        eps = rng.normal(0, 0.15, n)
+        x = np.empty(n)
+        x[0] = 0
+        for i in range(1, n):
+            x[i] = 0.98 * x[i - 1] + eps[i]
+        return 1.5 * np.log1p(np.exp(x))
+    # Biomasse: nahezu konstant
+    return np.full(n, 1.0)
+
+
+def make_synthetic_raw(
+    n_meters: int = 100,
+    days: int = 90,
+    gen_share: float = 0.3,
+    source_mix: dict | None = None,
+    start: str = "2024-01-01",
+    community_id: int = 12,
+    seed: int = 0,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns:
+        df_gen_raw, df_con_raw (gleiches Schema wie extract_raw)
+    """
+    rng = np.random.default_rng(seed)
+    source_mix = source_mix or DEFAULT_SOURCE_MIX
+
+    ts = pd.date_range(start, periods=days * 96, freq="15min")  # naive UTC wie SQL
+    n_ts = len(ts)
+
+    n_gen = max(1, int(round(n_meters * gen_share)))
+    n_con = max(1, n_meters - n_gen)
+
+    plz_pool = np.array(sorted(PLZ_TO_LATLON))
+
+    # ------------------- Consumption -------------------
+    con_ids = np.arange(1, n_con + 1)
+    base = _consumption_profile(ts)
+    scale = rng.lognormal(0, 0.4, n_con)
+    values = base[None, :] * scale[:, None] * rng.lognormal(0, 0.15, (n_con, n_ts))
+
+    con_meta = pd.DataFrame({
+        "MeteringPointId": con_ids,
+        "Number": _meter_numbers(con_ids, rng),
+        "PostalCode": rng.choice(plz_pool, n_con),
+    })
+    df_con_raw = pd.DataFrame({
+        "CommunityId": community_id,
+        "DateTimeUtc": np.tile(ts.values, n_con),
+        "Consumption": values.ravel(),
+        "ConsumptionCommunity": (values * COMMUNITY_SHARE).ravel(),
+        "MeteringPointId": np.repeat(con_ids, n_ts),
+        "EnergySource": None,
+    })
+
+    # ------------------- Generation --------------------
+    gen_ids = np.arange(n_con + 1, n_con + n_gen + 1)
+    keys = list(source_mix)
+    p = np.array([source_mix[k] for k in keys], float)
+    sources = rng.choice(keys, size=n_gen, p=p / p.sum())
+
+    profiles = {s: _generation_profile(ts, s, rng) for s in set(sources)}
+    gen_scale = rng.lognormal(0, 0.5, n_gen)
+    gen_values = np.stack([profiles[s] for s in sources]) * gen_scale[:, None]
+    gen_values *= rng.lognormal(0, 0.1, gen_values.shape)
+
+    gen_meta = pd.DataFrame({
+        "MeteringPointId": gen_ids,
+        "Number": _meter_numbers(gen_ids, rng),
+        "PostalCode": rng.choice(plz_pool, n_gen),
+    })
+    df_gen_raw = pd.DataFrame({
+        "CommunityId": community_id,
+        "DateTimeUtc": np.tile(ts.values, n_gen),
+        "Generation": gen_values.ravel(),
+        "GenerationCommunity": (gen_values * COMMUNITY_SHARE).ravel(),
+        "MeteringPointId": np.repeat(gen_ids, n_ts),
+        "EnergySource": np.repeat(sources, n_ts),
+    })
+
+    df_con_raw = df_con_raw.merge(con_meta, on="MeteringPointId", how="left")
+    df_gen_raw = df_gen_raw.merge(gen_meta, on="MeteringPointId", how="left")
+    df_con_raw["City"] = "Synthetic"
+    df_gen_raw["City"] = "Synthetic"
+
+    # Spaltenreihenfolge wie QUERY_GEN / QUERY_CON, sortiert nach Zeit
+    gen_cols = ["CommunityId", "DateTimeUtc", "Generation", "GenerationCommunity",
+                "MeteringPointId", "EnergySource", "Number", "PostalCode", "City"]
+    con_cols = ["CommunityId", "DateTimeUtc", "Consumption", "ConsumptionCommunity",
+                "MeteringPointId", "EnergySource", "Number", "PostalCode", "City"]
+
+    df_gen_raw = df_gen_raw[gen_cols].sort_values("DateTimeUtc", kind="stable").reset_index(drop=True)
+    df_con_raw = df_con_raw[con_cols].sort_values("DateTimeUtc", kind="stable").reset_index(drop=True)
+
+    return df_gen_raw, df_con_raw
+
+
+def make_synthetic_spot(days: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    """Stündliche Spotpreise (DateTimeUtc | spot_eur_per_mwh) mit Tagesgang."""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(days.min(), days.max() + pd.Timedelta(hours=23), freq="h", tz="UTC")
+    h = idx.hour.to_numpy()
+    price = 80 + 30 * np.sin(2 * np.pi * (h - 6) / 24) + rng.normal(0, 10, len(idx))
+    return pd.DataFrame({"DateTimeUtc": idx, "spot_eur_per_mwh": price})
+
+
+def write_synthetic_era5(
+    era5_dir: Path,
+    plz_list,
+    start: str = "2024-01-01",
+    days: int = 90,
+    seed: int = 0,
+) -> None:
+    """ERA5-CSVs (time, temperature_2m) wie era5_convert sie schreibt."""
+    rng = np.random.default_rng(seed)
+    era5_dir.mkdir(parents=True, exist_ok=True)
+    t = pd.date_range(start, periods=days * 24, freq="h")
+    doy = t.dayofyear.to_numpy()
+    base = 10 - 10 * np.cos(2 * np.pi * (doy - 15) / 365) + 5 * np.sin(2 * np.pi * (t.hour.to_numpy() - 9) / 24)
+    for plz in plz_list:
+        temp = base + rng.normal(0, 1.5, len(t))
+        pd.DataFrame({"time": t, "temperature_2m": temp}).to_csv(era5_dir / f"era5_{plz}.csv", index=False)
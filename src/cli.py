@@ -0,0 +1,582 @@
+# src/cli.py
+#
+# Eine CLI für alle Pipeline-Schritte. Mehrere Schritte können mit "+"
+# verkettet werden und teilen sich dann EINEN DataContext (SQL, ERA5 und
+# Spotpreise werden nur einmal geladen):
+#
+#   python -m src.cli forecast --with-temp + evaluate --days 7
+#   python -m src.cli extract + prep --plot
+#   python -m src.cli era5-sync + forecast --with-temp + backtest --end 2025-02-16
+#   python -m src.cli wait-for-data --timeout 240 + forecast --no-plot
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+import pandas as pd
+
+CHAIN_SEP = "+"
+
+
+# ============================================================
+# Schritte
+# ============================================================
+
+def cmd_extract(args, ctx):
+    if args.partitioned:
+        from src.extract import extract_raw_partitioned
+
+        extract_raw_partitioned(chunksize=args.chunksize, community_id=ctx.community_id)
+        return
+
+    df_gen_raw, df_con_raw = ctx.raw()
+    print(f" Extract: {len(df_gen_raw)} Generation-, {len(df_con_raw)} Consumption-Zeilen")
+
+
+def cmd_prep(args, ctx):
+    from src.config import PROCESSED_DIR, community_path, init_dirs
+
+    ctx.prep_engine = args.engine
+    prep = ctx.prep()
+
+    def _out(name: str):
+        return community_path(PROCESSED_DIR / name, ctx.community_id)
+
+    init_dirs()
+    prep["consumption_1h"].to_parquet(_out("consumption_1h.parquet"))
+    prep["generation_1h_total"].to_parquet(_out("generation_1h_total.parquet"))
+    for name, df in prep["generation_1h_by_source"].items():
+        df.to_parquet(_out(f"generation_1h_{name}.parquet"))
+    print(f" Prep gespeichert: {PROCESSED_DIR}")
+
+    if args.plot:
+        from pathlib import Path
+        from src.prep import plot_consumption_vs_generation
+
+        plot_consumption_vs_generation(
+            prep["consumption_1h"],
+            prep["generation_1h_by_source"],
+            Path("plots/prep"),
+        )
+
+
+def cmd_forecast(args, ctx):
+    from src.forecast.community_one_day import run_one_day_forecast
+
+    run_one_day_forecast(
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        ctx=ctx,
+        plot=not args.no_plot,
+        export_models=args.export_models,
+        xgb_hist=args.xgb_hist,
+        online=args.online,
+        online_only=args.online_only,
+        preflight=not args.no_preflight,
+        wait_minutes=args.wait,
+    )
+
+
+def cmd_wait_for_data(args, ctx):
+    from src.freshness import wait_for_data
+
+    day = pd.Timestamp(args.date, tz="UTC") if args.date else (
+        pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)
+    )
+    f = wait_for_data(
+        day,
+        community_id=ctx.community_id,
+        freq=ctx.freq,
+        source=args.source,
+        partial=args.partial,
+        timeout_s=args.timeout * 60,
+        initial_delay_s=args.initial_delay,
+        max_delay_s=args.max_delay,
+        ctx=ctx,
+    )
+    if not f.ready:
+        # Kette abbrechen – die folgenden Schritte hätten keine Daten
+        raise SystemExit(f" Daten für {day.date()} nicht verfügbar – Kette abgebrochen")
+
+
+def cmd_forecast_range(args, ctx):
+    from src.forecast.parallel import run_forecasts_parallel
+
+    days = pd.date_range(args.start, args.end, freq="D")
+    run_forecasts_parallel(
+        [d.date().isoformat() for d in days],
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        max_workers=args.workers,
+        ctx=ctx,
+        xgb_hist=args.xgb_hist,
+    )
+
+
+def cmd_forecast_global(args, ctx):
+    from src.forecast.global_model import run_global_forecast
+
+    run_global_forecast(
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        models=args.models.split(","),
+        max_train_rows=args.max_train_rows,
+        ctx=ctx,
+    )
+
+
+def cmd_forecast_multi(args, ctx):
+    from src.forecast.multi_target import run_multi_target_forecast
+
+    run_multi_target_forecast(
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        models=args.models.split(","),
+        max_workers=args.workers,
+        ctx=ctx,
+    )
+
+
+def cmd_forecast_communities(args, ctx):
+    from src.forecast.multi_community import run_multi_community
+
+    run_multi_community(
+        [int(c) for c in args.ids.split(",")],
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        evaluate_days=args.evaluate_days,
+        ctx=ctx,
+    )
+
+
+def cmd_tune(args, ctx):
+    from src.forecast.tuning import tune_models
+
+    tune_models(
+        last_day=args.end,
+        n_folds=args.folds,
+        step_days=args.step_days,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        eta=args.eta,
+        max_workers=args.workers,
+        xgb_hist=not args.no_xgb_hist,
+        ctx=ctx,
+    )
+
+
+def cmd_prune_features(args, ctx):
+    from src.forecast.feature_pruning import run_feature_pruning
+
+    run_feature_pruning(
+        last_day=args.end,
+        n_folds=args.folds,
+        step_days=args.step_days,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        method=args.method,
+        min_importance=args.min_importance,
+        corr_threshold=args.corr_threshold,
+        max_mae_increase=args.max_mae_increase,
+        holdout_folds=args.holdout_folds,
+        save=not args.dry_run,
+        ctx=ctx,
+    )
+
+
+def cmd_daily(args, ctx):
+    from src.daily_job import run_daily_job
+
+    status = run_daily_job(
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        xgb_hist=args.xgb_hist,
+        evaluate=not args.no_evaluate,
+        max_workers=args.workers,
+        force=[n for n in args.force.split(",") if n] if args.force else (),
+        resume=args.resume,
+        dry_run=args.dry_run,
+        ctx=ctx,
+    )
+    if "failed" in status.values():
+        raise SystemExit(" Daily-DAG fehlgeschlagen – mit 'daily --resume' fortsetzen")
+
+
+def cmd_backtest(args, ctx):
+    from src.evaluation.community_backtest import run_temperature_backtest
+
+    run_temperature_backtest(end_date=args.end, n_days=args.days, ctx=ctx)
+
+
+def cmd_evaluate(args, ctx):
+    from src.evaluation.community_costs import compare_temperature_impact
+
+    end = pd.Timestamp(args.end)
+
+    if args.range:
+        from src.config import PROCESSED_DIR, community_path, init_dirs
+        from src.evaluation.cost_engine import evaluate_range
+
+        start = (end - pd.Timedelta(days=args.days - 1)).date().isoformat()
+        if args.streaming:
+            from src.evaluation.streaming_metrics import streaming_evaluate_range
+
+            summary = streaming_evaluate_range(start, args.end, ctx=ctx).result()
+            name = f"community_eval_total_{start}_{args.end}.parquet"
+        else:
+            summary = evaluate_range(start, args.end, ctx=ctx)
+            name = f"community_eval_{start}_{args.end}.parquet"
+        print(summary.round(2))
+
+        init_dirs()
+        out = community_path(PROCESSED_DIR / name, ctx.community_id)
+        summary.reset_index().to_parquet(out, index=False)
+        print(f"\n Evaluation gespeichert: {out}")
+        return
+
+    for i in range(args.days):
+        day_str = (end - pd.Timedelta(days=i)).date().isoformat()
+        try:
+            compare_temperature_impact(day_str, ctx=ctx)
+        except FileNotFoundError as e:
+            print(f"  ⏭️ Überspringe {day_str}: {e}")
+
+
+def cmd_exposure_mc(args, ctx):
+    from src.config import PROCESSED_DIR, community_path, init_dirs
+    from src.evaluation.exposure_mc import run_exposure_simulation
+
+    result = run_exposure_simulation(
+        args.date,
+        history_days=args.history_days,
+        n_scenarios=args.scenarios,
+        block_hours=args.block_hours,
+        spot_history_days=args.spot_history_days,
+        alphas=args.alpha,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        ctx=ctx,
+    )
+    cols = ["exposure_mean_eur"] + [c for c in result.columns if c.startswith(("VaR", "CVaR"))]
+    print(result[cols].round(2))
+
+    init_dirs()
+    out = community_path(PROCESSED_DIR / f"exposure_mc_{args.date}.parquet", ctx.community_id)
+    result.reset_index().to_parquet(out, index=False)
+    print(f"\n Exposure-Verteilung gespeichert: {out}")
+
+
+def cmd_compact(args, ctx):
+    from src.forecast.store import compact_all, migrate_legacy_forecasts
+
+    if args.migrate_legacy:
+        n = migrate_legacy_forecasts(community_id=ctx.community_id)
+        print(f" {n} alte Forecast-Dateien ins Dataset übernommen")
+
+    for name, n in compact_all().items():
+        print(f" {name}: {n} Partitionen kompaktiert")
+
+
+def cmd_era5_sync(args, ctx):
+    from src.weather.era5_autofill import ensure_era5_coverage
+    from src.weather.temperature import ERA5_DIR
+
+    ensure_era5_coverage(
+        df_gen_raw=ctx.df_gen_raw,
+        era5_dir=ERA5_DIR,
+        reference_day=args.date,
+        lookback_days=args.lookback_days,
+    )
+
+
+# ============================================================
+# Parser
+# ============================================================
+
+def _yesterday() -> str:
+    return (pd.Timestamp.today(tz="UTC").floor("D") - pd.Timedelta(days=1)).date().isoformat()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="GPS Forecasting – Pipeline-Schritte (mit ' + ' verkettbar)",
+    )
+    parser.add_argument("--trace", metavar="PATH", default=None,
+                        help="Stage-Timings als JSON-Lines schreiben ('-' = stderr)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="zusätzlich tracemalloc-Peak pro Stage (langsamer)")
+    parser.add_argument("--community", type=int, default=None,
+                        help="CommunityId (Default: DB_COMMUNITY_ID aus .env)")
+    parser.add_argument("--resolution", choices=["1h", "15min"], default=None,
+                        help="Zeitauflösung für Prep/Forecast/Evaluation (Default: 1h)")
+    parser.add_argument("--no-prefetch", action="store_true",
+                        help="SQL/ERA5/Spotpreise nicht vorab parallel laden (src/io_stage.py)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="Rohdaten aus SQL ziehen")
+    p.add_argument("--partitioned", action="store_true",
+                   help="chunkweise nach data/raw/gen|con (year=/month=) schreiben")
+    p.add_argument("--chunksize", type=int, default=500_000)
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("prep", help="1h-Aggregation + Snapshots in data/processed")
+    p.add_argument("--plot", action="store_true", help="Consumption vs Generation plotten")
+    p.add_argument("--engine", choices=["pandas", "duckdb", "store"], default="pandas",
+                   help="duckdb = out-of-core auf partitioniertem Raw-Parquet, "
+                        "store = inkrementeller Stunden-Store (data/processed/series; Korrekturen "
+                        "werden bis 35 Tage zurück per Tages-Checksumme erkannt, ältere nur durch "
+                        "Neuaufbau des Stores)")
+    p.set_defaults(func=cmd_prep)
+
+    p = sub.add_parser("forecast", help="24h-Forecast (Default: morgen)")
+    p.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--no-plot", action="store_true", help="keinen HTML-Plot schreiben")
+    p.add_argument("--export-models", action="store_true",
+                   help="RF/XGB kompakt nach data/models (src/forecast/compact_trees.py)")
+    p.add_argument("--xgb-hist", action="store_true",
+                   help="XGB mit hist + Early Stopping auf dem Tail (src/forecast/xgb_hist.py)")
+    p.add_argument("--online", action="store_true",
+                   help="zusätzlich RLS + saisonal-naiv mit fortgeschriebenem Zustand (src/forecast/online.py)")
+    p.add_argument("--online-only", action="store_true",
+                   help="nur RLS + saisonal-naiv (schneller Fallback ohne RF/XGB-Training)")
+    p.add_argument("--wait", type=float, default=0.0, metavar="MIN",
+                   help="bis zu MIN Minuten mit Backoff auf die Consumption des Zieltags warten")
+    p.add_argument("--no-preflight", action="store_true",
+                   help="kein Freshness-Check (MAX(DateTimeUtc)) vor Extract/Prep")
+    p.set_defaults(func=cmd_forecast)
+
+    p = sub.add_parser("wait-for-data",
+                       help="Freshness-Probe mit Backoff; bricht die Kette ab, wenn die Daten nicht kommen")
+    p.add_argument("--date", default=None, help="Zieltag YYYY-MM-DD, leer = morgen")
+    p.add_argument("--timeout", type=float, default=360, help="Minuten bis zum Abbruch")
+    p.add_argument("--source", choices=["sql", "store"], default="sql",
+                   help="sql = MAX(DateTimeUtc) pro Tabelle, store = Watermark des Stunden-Stores")
+    p.add_argument("--partial", action="store_true",
+                   help="erster Slot des Zieltags reicht (sonst der ganze Tag)")
+    p.add_argument("--initial-delay", type=float, default=60, help="erste Wartezeit in Sekunden")
+    p.add_argument("--max-delay", type=float, default=900, help="maximale Wartezeit in Sekunden")
+    p.set_defaults(func=cmd_wait_for_data)
+
+    p = sub.add_parser("forecast-range", help="Simulations-Forecasts für viele Tage parallel")
+    p.add_argument("--start", required=True, help="erster Tag YYYY-MM-DD")
+    p.add_argument("--end", required=True, help="letzter Tag YYYY-MM-DD")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--workers", type=int, default=None, help="Prozesse (Default: CPU-Anzahl)")
+    p.add_argument("--xgb-hist", action="store_true", help="XGB mit hist als Walk-Forward auf einem gemeinsamen Feature-Cache (ohne Temperatur)")
+    p.set_defaults(func=cmd_forecast_range)
+
+    p = sub.add_parser("forecast-global",
+                       help="Zählpunkt-Forecasts mit EINEM globalen Modell + Bottom-up-Summe")
+    p.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--models", default="XGB", help="kommagetrennt aus RF,XGB")
+    p.add_argument("--max-train-rows", type=int, default=400_000,
+                   help="Stichprobe der Trainingszeilen (Panel-Zeilen über alle Zählpunkte)")
+    p.set_defaults(func=cmd_forecast_global)
+
+    p = sub.add_parser("forecast-multi",
+                       help="24h-Forecast für Consumption + jede Erzeugungsquelle + Net-Position")
+    p.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--models", default="RF,XGB", help="kommagetrennt aus RF,XGB")
+    p.add_argument("--workers", type=int, default=None, help="Threads (Default: CPU-Anzahl)")
+    p.set_defaults(func=cmd_forecast_multi)
+
+    p = sub.add_parser("forecast-communities", help="24h-Forecast für mehrere Communities parallel")
+    p.add_argument("--ids", required=True, help="CommunityIds, kommagetrennt")
+    p.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--workers", type=int, default=None, help="Prozesse (Default: CPU-Anzahl)")
+    p.add_argument("--batch-size", type=int, default=10, help="Communities pro SQL-Abfrage")
+    p.add_argument("--evaluate-days", type=int, default=0,
+                   help="danach die letzten n Tage pro Community auswerten")
+    p.set_defaults(func=cmd_forecast_communities)
+
+    p = sub.add_parser("tune", help="RF/XGB-Hyperparameter (Rolling-Origin-CV + Successive Halving)")
+    p.add_argument("--end", default=_yesterday(), help="letzter Fold-Tag YYYY-MM-DD (Default: gestern)")
+    p.add_argument("--folds", type=int, default=9)
+    p.add_argument("--step-days", type=int, default=7)
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--eta", type=int, default=3, help="Halbierungsfaktor")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--no-xgb-hist", action="store_true",
+                   help="XGB-Folds wie RF (FoldCache + XGBRegressor) statt gemeinsamer Hist-Matrizen")
+    p.set_defaults(func=cmd_tune)
+
+    p = sub.add_parser("prune-features",
+                       help="Feature-Importance über Rolling-Backtest → reduziertes Feature-Set + Report")
+    p.add_argument("--end", default=_yesterday(), help="letzter Fold-Tag YYYY-MM-DD (Default: gestern)")
+    p.add_argument("--folds", type=int, default=6)
+    p.add_argument("--step-days", type=int, default=7)
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--method", choices=["permutation", "gain"], default="permutation")
+    p.add_argument("--min-importance", type=float, default=0.005, help="Mindestanteil an der Importance")
+    p.add_argument("--corr-threshold", type=float, default=0.98, help="|r| ab dem Features redundant sind")
+    p.add_argument("--max-mae-increase", type=float, default=0.02, help="erlaubter relativer MAE-Anstieg")
+    p.add_argument("--holdout-folds", type=int, default=2,
+                   help="jüngste Folds nur für den Vergleich voll vs. reduziert (nicht für die Auswahl)")
+    p.add_argument("--dry-run", action="store_true", help="nur Report, Spec nicht speichern")
+    p.set_defaults(func=cmd_prune_features)
+
+    p = sub.add_parser("daily",
+                       help="Produktionstag als inkrementeller DAG (nur veraltete Schritte laufen)")
+    p.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    p.add_argument("--train-days", type=int, default=45)
+    p.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    p.add_argument("--xgb-hist", action="store_true", help="XGB mit hist + Early Stopping")
+    p.add_argument("--no-evaluate", action="store_true", help="ohne Kosten-Evaluation des Tages")
+    p.add_argument("--workers", type=int, default=3, help="parallele Knoten (I/O-Schritte)")
+    p.add_argument("--force", default=None,
+                   help="Knoten kommagetrennt (z.B. extract,train:no_temp) – samt Nachfolgern neu")
+    p.add_argument("--resume", action="store_true",
+                   help="nach Fehler weitermachen: erfolgreiche Knoten nicht neu (auch bei neuen SQL-Daten)")
+    p.add_argument("--dry-run", action="store_true", help="nur anzeigen, was laufen würde")
+    p.set_defaults(func=cmd_daily)
+
+    p = sub.add_parser("backtest", help="no_temp vs with_temp über n Tage")
+    p.add_argument("--end", default=_yesterday(), help="letzter Tag YYYY-MM-DD (Default: gestern)")
+    p.add_argument("--days", type=int, default=7)
+    p.set_defaults(func=cmd_backtest)
+
+    p = sub.add_parser("evaluate", help="Kosten + Metriken pro Tag (compare_temperature_impact)")
+    p.add_argument("--end", default=_yesterday(), help="letzter Tag YYYY-MM-DD (Default: gestern)")
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--range", action="store_true",
+                   help="ganzen Zeitraum vektorisiert auswerten (eine Tabelle statt Tagesreports)")
+    p.add_argument("--streaming", action="store_true",
+                   help="mit --range: Tag für Tag falten, Gesamtstatistik pro Modell/Variante "
+                        "(src/evaluation/streaming_metrics.py)")
+    p.set_defaults(func=cmd_evaluate)
+
+    p = sub.add_parser("exposure-mc",
+                       help="Monte-Carlo-Verteilung der Tages-Exposure (VaR/CVaR) aus der Backtest-Fehlerhistorie")
+    p.add_argument("--date", default=_yesterday(), help="Zieltag YYYY-MM-DD (Default: gestern)")
+    p.add_argument("--history-days", type=int, default=60, help="Tage Fehlerhistorie vor dem Zieltag")
+    p.add_argument("--scenarios", type=int, default=20_000)
+    p.add_argument("--block-hours", type=int, default=4, help="Blocklänge des Bootstraps (Stunden)")
+    p.add_argument("--spot-history-days", type=int, default=0,
+                   help="zusätzlich Spotkurven so vieler Vortage als Preisszenarien (0 = nur Zieltag)")
+    p.add_argument("--alpha", type=float, nargs="+", default=[0.95, 0.99], help="Niveaus für VaR/CVaR")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--chunk-size", type=int, default=16_384, help="Szenarien pro Array-Block (Speicher)")
+    p.set_defaults(func=cmd_exposure_mc)
+
+    p = sub.add_parser("compact", help="kleine Dateien im Forecast-/Ergebnis-Dataset zusammenführen")
+    p.add_argument("--migrate-legacy", action="store_true",
+                   help="alte community_forecast_{date}_{variant}.parquet vorher übernehmen")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("era5-sync", help="fehlende ERA5-PLZ laden + konvertieren")
+    p.add_argument("--date", default=pd.Timestamp.today(tz="UTC").date().isoformat())
+    p.add_argument("--lookback-days", type=int, default=42)
+    p.set_defaults(func=cmd_era5_sync)
+
+    return parser
+
+
+def _sql_ready(day: pd.Timestamp, ctx) -> bool:
+    """Freshness ohne Warten und ohne Ausgabe; DB nicht erreichbar → True."""
+    from src.freshness import check_freshness
+
+    try:
+        return check_freshness(day, community_id=ctx.community_id, freq=ctx.freq, ctx=ctx).ready
+    except Exception:
+        return True
+
+
+def prefetch_chain(steps: list, ctx) -> None:
+    """
+    SQL, ERA5 und Spotpreise für die ganze Kette in EINER parallelen
+    I/O-Stage (src/io_stage.py), bevor der erste Schritt läuft.
+    """
+    from src.io_stage import prefetch
+
+    forecast = next((a for a in steps if a.command == "forecast"), None)
+    spot_days = [
+        (pd.Timestamp(a.end) - pd.Timedelta(days=i)).date()
+        for a in steps if a.command == "evaluate"
+        for i in range(a.days)
+    ] + [
+        (pd.Timestamp(a.date) - pd.Timedelta(days=i)).date()
+        for a in steps if a.command == "exposure-mc"
+        for i in range(a.spot_history_days + 1)
+    ]
+    if forecast is None and not spot_days:
+        return
+
+    train_start, use_temperature = None, False
+    if forecast is not None:
+        day = pd.Timestamp(forecast.date, tz="UTC") if forecast.date else (
+            pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)
+        )
+        # ein stiller Blick ohne Warten: lohnt SQL auf Vorrat? Gewartet
+        # (--wait) und gemeldet wird einmal im Forecast-Schritt selbst
+        if not forecast.no_preflight and not _sql_ready(day, ctx):
+            # Daten fehlen noch → Forecast wartet bzw. überspringt sich, kein SQL-Pull auf Vorrat
+            prefetch(ctx, spot_days=spot_days, sql=False)
+            return
+        train_start = day - pd.Timedelta(days=forecast.train_days)
+        use_temperature = forecast.with_temp
+
+    prefetch(ctx, train_start=train_start, use_temperature=use_temperature, spot_days=spot_days)
+
+
+def split_chain(argv: list[str]) -> list[list[str]]:
+    chain, current = [], []
+    for token in argv:
+        if token == CHAIN_SEP:
+            chain.append(current)
+            current = []
+        else:
+            current.append(token)
+    chain.append(current)
+    return [c for c in chain if c]
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+
+    # erst ALLE Schritte parsen → Tippfehler fallen vor dem SQL-Pull auf
+    steps = [parser.parse_args(segment) for segment in split_chain(argv) or [[]]]
+
+    trace = next((a for a in steps if a.trace), None)
+    if trace is not None:
+        from src.utils.instrument import enable
+
+        enable(trace.trace, memory=trace.trace_memory)
+
+    from src.config import DB_COMMUNITY_ID
+    from src.context import DataContext
+
+    community = next((a.community for a in steps if a.community is not None), DB_COMMUNITY_ID)
+    freq = next((a.resolution for a in steps if a.resolution is not None), "1h")
+    ctx = DataContext(community, freq=freq)
+    if not any(a.no_prefetch for a in steps):
+        prefetch_chain(steps, ctx)
+    for args in steps:
+        print(f"\n▶ {args.command}")
+        args.func(args, ctx)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
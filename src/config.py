@@ -1,7 +1,4 @@
 
-import sys
-print(sys.executable)
-
 import os #um auf umgebungsvariablen zugreifen zu könenn
 from pathlib import Path
 from dotenv import load_dotenv # damit können  Variablen aus einer .env datei als umgebungsvariablen geholt werden.
@@ -16,9 +13,31 @@ DB_SERVER = os.getenv("DB_SERVER")
 DB_DATABASE = os.getenv("DB_DATABASE")
 DB_COMMUNITY_ID = int(os.getenv("DB_COMMUNITY_ID", "12"))
 
+# Optional: SQLAlchemy-URL statt SQL Server, z.B. lokale Bench-DB
+#   DB_URL=sqlite:///data/bench/nobile.sqlite
+DB_URL = os.getenv("DB_URL")
+
 DATA_DIR = PROJECT_ROOT / "data"
 RAW_DIR = DATA_DIR / "raw"
 PROCESSED_DIR = DATA_DIR / "processed"
 
-RAW_DIR.mkdir(parents=True, exist_ok=True)
-PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
+
+def community_path(path: Path, community_id: int) -> Path:
+    """
+    Community-spezifischer Pfad. Die Default-Community (DB_COMMUNITY_ID)
+    behält die bisherigen Pfade, andere bekommen das Suffix _c<ID>:
+        data/raw/gen → data/raw/gen_c7, df_gen_raw.parquet → df_gen_raw_c7.parquet
+    """
+    if community_id == DB_COMMUNITY_ID:
+        return path
+    return path.with_name(f"{path.stem}_c{community_id}{path.suffix}")
+
+
+def init_dirs() -> None:
+    """
+    Legt die Datenverzeichnisse an.
+    Wird explizit von den Schritten aufgerufen, die schreiben –
+    nicht mehr beim Import (Import soll keine Seiteneffekte haben).
+    """
+    RAW_DIR.mkdir(parents=True, exist_ok=True)
+    PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
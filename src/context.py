@@ -0,0 +1,151 @@
+# src/context.py
+
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import DB_COMMUNITY_ID
+from src.extract import extract_raw
+from src.prep import run_full_preparation
+from src.prices.spot_app import read_spot_price
+from src.weather.era5_loader import load_era5_plz
+
+
+class DataContext:
+    """
+    Gemeinsamer In-Memory-Datenkontext für mehrere Pipeline-Schritte.
+
+    Alles wird beim ersten Zugriff geladen und danach wiederverwendet:
+    - SQL-Rohdaten (extract_raw)
+    - Aufbereitung (run_full_preparation)
+    - ERA5-CSV pro PLZ
+    - Spotpreise pro Tag
+
+    Ohne Kontext (ctx=None) laden die Funktionen wie bisher selbst.
+
+    prep_engine="duckdb": Aufbereitung out-of-core auf dem partitionierten
+    Raw-Parquet (src/prep_ooc.py) statt auf den pandas-Rohframes.
+    prep_engine="store": inkrementell gepflegter Stunden-Store
+    (src/series_store.py) – nur neue/korrigierte Stunden werden aggregiert.
+
+    freq="15min": Viertelstunden-Modus für Prep, Ist-Werte und Spotpreise
+    (nur mit prep_engine="pandas").
+
+    Wechsel von prep_engine verwirft eine bereits gecachte Aufbereitung.
+    """
+
+    def __init__(
+        self,
+        community_id: int = DB_COMMUNITY_ID,
+        prep_engine: str = "pandas",
+        freq: str = "1h",
+    ):
+        self.community_id = community_id
+        self.prep_engine = prep_engine
+        self.freq = freq
+
+        self._raw: tuple[pd.DataFrame, pd.DataFrame] | None = None
+        self._prep: dict | None = None
+        self._era5: dict[str, pd.Series] = {}
+        self._spot: dict[tuple[date, str], pd.DataFrame] = {}
+
+    # --------------------------------------------------
+    # SQL / Prep
+    # --------------------------------------------------
+    @property
+    def prep_engine(self) -> str:
+        return self._prep_engine
+
+    @prep_engine.setter
+    def prep_engine(self, engine: str) -> None:
+        # verkettete Schritte: "prep --engine duckdb" nach einem pandas-Prep
+        if engine != getattr(self, "_prep_engine", engine):
+            self._prep = None
+        self._prep_engine = engine
+
+    def raw(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        if self._raw is None:
+            self._raw = extract_raw(self.community_id)
+        return self._raw
+
+    @property
+    def df_gen_raw(self) -> pd.DataFrame:
+        return self.raw()[0]
+
+    @property
+    def df_con_raw(self) -> pd.DataFrame:
+        return self.raw()[1]
+
+    def prep(self) -> dict:
+        if self._prep is None:
+            if self.freq != "1h" and self.prep_engine != "pandas":
+                raise ValueError(f"prep_engine={self.prep_engine!r} unterstützt nur freq='1h'")
+            if self.prep_engine == "duckdb":
+                self._prep = self._prep_ooc()
+            elif self.prep_engine == "store":
+                from src.series_store import refresh_series_store
+
+                self._prep = refresh_series_store(community_id=self.community_id).to_prep()
+            else:
+                df_gen_raw, df_con_raw = self.raw()
+                self._prep = run_full_preparation(df_gen_raw, df_con_raw, freq=self.freq)
+        return self._prep
+
+    def _prep_ooc(self) -> dict:
+        from src.extract import extract_raw_partitioned, raw_dataset_dirs, raw_dataset_stale
+        from src.prep_ooc import run_full_preparation_ooc
+
+        gen_root, con_root = raw_dataset_dirs(self.community_id)
+        if raw_dataset_stale(self.community_id):
+            extract_raw_partitioned(community_id=self.community_id)
+        return run_full_preparation_ooc(gen_root, con_root)
+
+    def consumption_1h(self) -> pd.Series:
+        """ConsumptionCommunity in der Auflösung self.freq."""
+        return self.prep()["consumption_1h"]["ConsumptionCommunity"]
+
+    # --------------------------------------------------
+    # ERA5 / Preise
+    # --------------------------------------------------
+    def load_era5(self, plz: int | str, era5_dir: Path) -> pd.Series:
+        key = str(plz)
+        if key not in self._era5:
+            self._era5[key] = load_era5_plz(plz, era5_dir)
+        return self._era5[key]
+
+    def spot_prices(self, day: date) -> pd.DataFrame:
+        key = (day, self.freq)
+        if key not in self._spot:
+            self._spot[key] = read_spot_price(day, self.freq)
+        return self._spot[key]
+
+    def fork(
+        self,
+        community_id: int,
+        raw: tuple[pd.DataFrame, pd.DataFrame] | None = None,
+    ) -> "DataContext":
+        """
+        Kontext für eine andere Community, der ERA5- und Spotpreis-Cache
+        mit diesem teilt (beides hängt nicht an der Community).
+        raw: bereits geladene Rohdaten (z.B. aus read_raw_multi).
+        """
+        other = DataContext(community_id, prep_engine=self.prep_engine, freq=self.freq)
+        other._raw = raw
+        other._era5 = self._era5
+        other._spot = self._spot
+        return other
+
+    def release_raw(self) -> None:
+        """Rohdaten freigeben, Aufbereitung bleibt (spart Speicher bei vielen Communities)."""
+        self.prep()
+        self._raw = None
+
+    def invalidate(self) -> None:
+        """Verwirft alle gecachten Daten (z.B. nach neuem SQL-Extract)."""
+        self._raw = None
+        self._prep = None
+        self._era5.clear()
+        self._spot.clear()
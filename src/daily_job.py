@@ -0,0 +1,288 @@
+# src/daily_job.py
+#
+# Produktionstag als inkrementeller DAG (src/utils/dag.py) über die
+# bestehenden Funktionen:
+#
+#   extract ─┬─ prep ─────────────────┬─ features ─ train ─ predict ─┬─ evaluate
+#            └─ era5 ─ temperature ───┘                              │
+#   spot ────────────────────────────────────────────────────────────┘
+#
+# - extract: key = MAX(DateTimeUtc) + Zeilenzahl/Wertsummen pro Tabelle
+#   (src/freshness.py) → ohne neue oder korrigierte SQL-Zeilen wird nicht
+#   neu gezogen, die Raw-Parquets werden geladen
+# - features: Feature-Spec und src/features.py sind Eingaben → neue Spec
+#   (prune-features) oder geänderter Feature-Code baut die Matrizen neu
+# - spot und extract laufen parallel, danach era5 parallel zu prep;
+#   spot nur mit evaluate (nur die Kosten brauchen Spotpreise)
+# - era5 / temperature nur mit use_temperature
+# - train exportiert kompakt (compact_trees), predict rechnet auf den
+#   kompakten Modellen (bit-gleich) → ein Predict ohne Neutraining möglich
+#
+# Zustand: data/processed/daily[_c<ID>]/dag_state_<freq>.json
+# Artefakte pro Tag/Variante: data/processed/daily[_c<ID>]/<Tag>_<Variante>/
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from src.config import PROCESSED_DIR, RAW_DIR, community_path
+from src.context import DataContext
+from src.utils.dag import DagRunner, Node
+
+DAILY_DIR = PROCESSED_DIR / "daily"
+
+
+def daily_root(community_id: int) -> Path:
+    return community_path(DAILY_DIR, community_id)
+
+
+def build_daily_dag(
+    forecast_date: str,
+    ctx: DataContext,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    xgb_hist: bool = False,
+    evaluate: bool = True,
+) -> list[Node]:
+    """Knoten für einen Forecast-Tag; Daten laufen über ctx und die Artefakt-Dateien."""
+    from src.forecast.community_one_day import MODEL_DIR
+    from src.forecast.store import resolution_variant
+
+    cid, freq = ctx.community_id, ctx.freq
+    forecast_start = pd.Timestamp(forecast_date, tz="UTC")
+    forecast_end = forecast_start + pd.Timedelta(days=1) - pd.Timedelta(freq)
+    train_start = forecast_start - pd.Timedelta(days=train_days)
+    day = forecast_start.date()
+
+    base = "with_temp" if use_temperature else "no_temp"
+    variant = resolution_variant(base, freq)
+
+    root = daily_root(cid)
+    day_dir = root / f"{day}_{variant}"
+    raw_paths = [
+        community_path(RAW_DIR / "df_gen_raw.parquet", cid),
+        community_path(RAW_DIR / "df_con_raw.parquet", cid),
+    ]
+    consumption_path = root / f"consumption_{freq}.parquet"
+    spot_path = root / "spot" / f"{day}_{freq}.parquet"
+    temp_path = day_dir / "temperature.parquet"
+    train_path = day_dir / "train.parquet"
+    test_path = day_dir / "test.parquet"
+    model_dir = community_path(MODEL_DIR / f"{day}_{variant}", cid)
+    forecast_path = day_dir / "forecast.parquet"
+    eval_path = day_dir / "evaluation.parquet"
+
+    # Zwischenergebnisse im Speicher (für Nachfolger im selben Lauf)
+    mem: dict = {}
+
+    # --------------------------------------------------
+    # extract
+    # --------------------------------------------------
+    def extract():
+        from src.extract import extract_raw
+
+        ctx._raw = extract_raw(cid)
+        ctx._prep = None
+
+    def load_raw():
+        ctx._raw = tuple(pd.read_parquet(p) for p in raw_paths)
+
+    def sql_watermark():
+        from src.freshness import probe_sql, probe_sql_checksum
+
+        return {"max": probe_sql(community_ids=cid)[cid], "checksum": probe_sql_checksum(community_id=cid)}
+
+    # --------------------------------------------------
+    # prep
+    # --------------------------------------------------
+    def prep():
+        consumption_path.parent.mkdir(parents=True, exist_ok=True)
+        ctx.prep()["consumption_1h"].to_parquet(consumption_path)
+
+    def load_prep():
+        ctx._prep = {"consumption_1h": pd.read_parquet(consumption_path)}
+
+    # --------------------------------------------------
+    # spot
+    # --------------------------------------------------
+    def spot():
+        spot_path.parent.mkdir(parents=True, exist_ok=True)
+        ctx.spot_prices(day).to_parquet(spot_path, index=False)
+
+    def load_spot():
+        ctx._spot[(day, freq)] = pd.read_parquet(spot_path)
+
+    # --------------------------------------------------
+    # ERA5 + Temperatur
+    # --------------------------------------------------
+    def era5():
+        from src.weather.era5_autofill import ensure_era5_coverage
+        from src.weather.temperature import ERA5_DIR
+
+        ensure_era5_coverage(ctx.df_gen_raw, ERA5_DIR, reference_day=train_start.date())
+
+    def temperature():
+        from src.weather.temperature import build_temperature_series
+
+        mem["temp"] = build_temperature_series(
+            df_gen_raw=ctx.df_gen_raw,
+            train_start=train_start,
+            test_end=forecast_end,
+            era5_loader=ctx.load_era5,
+        )
+        temp_path.parent.mkdir(parents=True, exist_ok=True)
+        mem["temp"].rename("temperature").to_frame().to_parquet(temp_path)
+
+    def load_temperature():
+        mem["temp"] = pd.read_parquet(temp_path)["temperature"]
+
+    # --------------------------------------------------
+    # Features → Training → Vorhersage
+    # --------------------------------------------------
+    def features():
+        from src.features import build_dataset_leakage_free
+        from src.forecast.feature_pruning import load_feature_spec, select_features, spec_variant
+
+        X_train, y_train, X_test, _ = build_dataset_leakage_free(
+            series=ctx.consumption_1h(),
+            train_start=train_start,
+            test_start=forecast_start,
+            test_end=forecast_end,
+            temp_series=mem.get("temp"),
+            freq=freq,
+        )
+        if X_test.empty:
+            raise ValueError(f"Keine validen Feature-Zeilen für {day} – fehlen Consumption-Daten?")
+        if len(X_train) < 100:
+            raise ValueError("Zu wenig Trainingsdaten für Forecast")
+
+        spec = load_feature_spec(spec_variant(use_temperature, freq))
+        X_train, X_test = select_features(X_train, spec), select_features(X_test, spec)
+
+        day_dir.mkdir(parents=True, exist_ok=True)
+        X_train.assign(target=y_train).to_parquet(train_path)
+        X_test.to_parquet(test_path)
+        mem["train"], mem["test"] = (X_train, y_train), X_test
+
+    def load_features():
+        train = pd.read_parquet(train_path)
+        mem["train"] = (train.drop(columns="target"), train["target"])
+        mem["test"] = pd.read_parquet(test_path)
+
+    def train():
+        from src.forecast.community_one_day import build_models
+        from src.forecast.compact_trees import export_models
+
+        X_train, y_train = mem["train"]
+        models = build_models(freq=freq, xgb_hist=xgb_hist,
+                              use_temperature=use_temperature, community_id=cid)
+        for model in models.values():
+            model.fit(X_train, y_train)
+        export_models(models, model_dir, feature_names=X_train.columns)
+
+    def predict():
+        from src.forecast.compact_trees import load_models
+        from src.forecast.store import write_forecast
+
+        X_test = mem["test"]
+        result = pd.concat([
+            pd.DataFrame({
+                "DateTimeUtc": X_test.index,
+                "forecast_consumption": model.predict(X_test),
+                "model": name,
+                "use_temperature": use_temperature,
+                "forecast_day": day.isoformat(),
+            })
+            for name, model in load_models(model_dir).items()
+        ]).sort_values("DateTimeUtc")
+        write_forecast(result, variant=variant, community_id=cid)
+        result.to_parquet(forecast_path, index=False)
+
+    def evaluation():
+        from src.evaluation.cost_engine import evaluate_range
+
+        summary = evaluate_range(day.isoformat(), day.isoformat(), variants=[base], ctx=ctx)
+        summary.reset_index().to_parquet(eval_path, index=False)
+
+    # --------------------------------------------------
+    # Knoten
+    # --------------------------------------------------
+    import src.features
+    from src.forecast.community_one_day import load_model_params
+    from src.forecast.feature_pruning import FEATURE_SPEC_PATH
+
+    window = {"day": day, "train_days": train_days, "freq": freq}
+    temp_node = f"temperature:{day}"
+    feature_deps = ["prep", temp_node] if use_temperature else ["prep"]
+
+    nodes = [
+        Node("extract", extract, outputs=raw_paths, key=sql_watermark, params={"community": cid},
+             load=load_raw),
+        Node("prep", prep, deps=["extract"], outputs=[consumption_path],
+             params={"freq": freq, "engine": ctx.prep_engine}, load=load_prep),
+        Node(f"features:{variant}", features, deps=feature_deps, outputs=[train_path, test_path],
+             inputs=[FEATURE_SPEC_PATH, Path(src.features.__file__)], params=window,
+             load=load_features),
+        Node(f"train:{variant}", train, deps=[f"features:{variant}"], outputs=[model_dir],
+             params={**window, "models": load_model_params(variant, cid), "xgb_hist": xgb_hist}),
+        Node(f"predict:{variant}", predict, deps=[f"features:{variant}", f"train:{variant}"],
+             outputs=[forecast_path], params=window),
+    ]
+    if use_temperature:
+        from src.weather.temperature import ERA5_DIR
+
+        nodes += [
+            Node("era5", era5, deps=["extract"], params={"reference_day": train_start.date()}),
+            Node(temp_node, temperature, deps=["extract", "era5"], inputs=[ERA5_DIR],
+                 outputs=[temp_path], params=window, load=load_temperature),
+        ]
+    if evaluate:
+        nodes += [
+            Node("spot", spot, outputs=[spot_path], params={"day": day, "freq": freq}, load=load_spot),
+            Node(f"evaluate:{variant}", evaluation, deps=[f"predict:{variant}", "prep", "spot"],
+                 outputs=[eval_path], params=window),
+        ]
+    return nodes
+
+
+def run_daily_job(
+    forecast_date: Optional[str] = None,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    xgb_hist: bool = False,
+    evaluate: bool = True,
+    max_workers: int = 3,
+    force: Iterable[str] = (),
+    resume: bool = False,
+    dry_run: bool = False,
+    ctx: Optional[DataContext] = None,
+) -> dict[str, str]:
+    """
+    Ein Produktionstag als DAG. Aktuelle Knoten werden übersprungen,
+    force: Knoten (und Nachfolger) neu, resume: nach Fehler beim
+    fehlgeschlagenen Knoten weitermachen. dry_run: nur Plan ausgeben.
+
+    Returns: {Knoten: ok|skipped|failed|blocked} (dry_run: skipped|run)
+    """
+    ctx = ctx or DataContext()
+    if forecast_date is None:
+        forecast_date = (pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)).date().isoformat()
+
+    nodes = build_daily_dag(forecast_date, ctx, train_days, use_temperature, xgb_hist, evaluate)
+    runner = DagRunner(
+        nodes,
+        state_path=daily_root(ctx.community_id) / f"dag_state_{ctx.freq}.json",
+        max_workers=max_workers,
+    )
+
+    print(f"Daily-DAG {forecast_date} ({len(nodes)} Knoten, {ctx.freq})")
+    if dry_run:
+        plan = runner.plan(resume=resume)
+        for name, state in plan.items():
+            print(f"  {'aktuell' if state == 'skipped' else 'läuft':8s} {name}")
+        return plan
+
+    return runner.run(force=force, resume=resume)
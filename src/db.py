@@ -1,8 +1,18 @@
-from sqlalchemy import create_engine
-from sqlalchemy.engine import URL
-from .config import DB_UID, DB_PWD, DB_SERVER, DB_DATABASE
+from .config import DB_UID, DB_PWD, DB_SERVER, DB_DATABASE, DB_URL
+
+def get_engine(url: str | None = None):
+    """
+    SQL Server (NobileConnected) per ODBC – oder, wenn url bzw. DB_URL
+    gesetzt ist, eine beliebige SQLAlchemy-URL (z.B. lokale SQLite-Bench-DB).
+    """
+    # sqlalchemy erst bei Bedarf laden (schneller CLI-Start)
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import URL
+
+    url = url or DB_URL
+    if url:
+        return create_engine(url)
 
-def get_engine():
     odbc_str = (
         "DRIVER={ODBC Driver 17 for SQL Server};"
         f"SERVER={DB_SERVER};"
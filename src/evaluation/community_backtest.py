@@ -2,82 +2,50 @@
 
 import pandas as pd
 from datetime import timedelta
+from typing import Optional
 
-from src.evaluation.community_costs import compute_costs, load_actual_consumption
+from src.config import community_path
+from src.context import DataContext
+from src.evaluation.cost_engine import compare_variants, evaluate_range
 from pathlib import Path
 
 FORECAST_DIR = Path("data/forecasts")
 OUT_DIR = Path("data/processed")
-OUT_DIR.mkdir(exist_ok=True)
 
 def run_temperature_backtest(
     end_date: str,
     n_days: int = 7,
+    ctx: Optional[DataContext] = None,
 ) -> pd.DataFrame:
 
-    end = pd.Timestamp(end_date)
-    days = [end - timedelta(days=i) for i in range(n_days)]
-
-    rows = []
-
-    for day in days:
-        day_str = day.date().isoformat()
-        print(f"\n Backtest {day_str}")
-
-        actuals = load_actual_consumption(day_str)
-
-        results = {}
-
-        for variant in ["no_temp", "with_temp"]:
-            path = FORECAST_DIR / f"community_forecast_{day_str}_{variant}.parquet"
-            if not path.exists():
-                print(f"  ⚠️ fehlt: {path}")
-                continue
-
-            df_fc = pd.read_parquet(path)
-            df_cost = compute_costs(df_fc, actuals, day_str)
-
-            summary = (
-                df_cost
-                .groupby("model")
-                .agg(
-                    daily_exposure_eur=("exposure_eur", "sum"),
-                    bias_eur=("signed_impact_eur", "sum"),
-                    p90_eur=("exposure_eur", lambda x: x.quantile(0.9)),
-                    p95_eur=("exposure_eur", lambda x: x.quantile(0.95)),
-                )
-            )
+    # ein Kontext für alle Tage → SQL/Prep nur einmal statt pro Tag
+    ctx = ctx or DataContext()
 
-            results[variant] = summary
-
-        # ------------------------------
-        # Vergleich no_temp vs with_temp
-        # ------------------------------
-# Vergleich nur wenn beide Varianten existieren
-# ------------------------------
-        if not {"no_temp", "with_temp"}.issubset(results):
-            print(f"  ⏭️ Überspringe {day_str} (Forecasts unvollständig)")
-            continue
-
-        for model in results["no_temp"].index:
-            no_t = results["no_temp"].loc[model]
-            with_t = results["with_temp"].loc[model]
-
-
-            delta = with_t["daily_exposure_eur"] - no_t["daily_exposure_eur"]
-
-            rows.append({
-                "date": day_str,
-                "model": model,
-                "no_temp_eur": round(no_t["daily_exposure_eur"], 2),
-                "with_temp_eur": round(with_t["daily_exposure_eur"], 2),
-                "delta_eur": round(delta, 2),
-                "verdict": "better" if delta < 0 else "worse",
-            })
-
-    df = pd.DataFrame(rows).sort_values(["date", "model"])
-
-    out = OUT_DIR / f"temperature_backtest_{end_date}_{n_days}d.parquet"
+    end = pd.Timestamp(end_date)
+    start = end - timedelta(days=n_days - 1)
+
+    print(f"\n Backtest {start.date()} … {end.date()}")
+
+    # ------------------------------
+    # alle Tage/Varianten in EINEM Join (vektorisiert)
+    # ------------------------------
+    summary = evaluate_range(
+        start.date().isoformat(),
+        end.date().isoformat(),
+        ctx=ctx,
+    )
+
+    # ------------------------------
+    # Vergleich nur wenn beide Varianten existieren
+    # ------------------------------
+    df = compare_variants(summary)
+
+    days_all = {d.date().isoformat() for d in pd.date_range(start, end, freq="D")}
+    for day_str in sorted(days_all - set(df["date"])):
+        print(f"  ⏭️ Überspringe {day_str} (Forecasts unvollständig)")
+
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    out = community_path(OUT_DIR / f"temperature_backtest_{end_date}_{n_days}d.parquet", ctx.community_id)
     df.to_parquet(out, index=False)
     df.to_csv(out.with_suffix(".csv"), index=False)
 
@@ -3,36 +3,56 @@
 import pandas as pd
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
-from src.extract import extract_raw
-from src.prep import run_full_preparation
+from src.config import DB_COMMUNITY_ID
+from src.context import DataContext
+from src.evaluation.cost_engine import summarize_costs
 from src.prices.spot_app import read_spot_price_hourly
 
 
 FORECAST_DIR = Path("data/forecasts")
 EVAL_DIR = Path("data/processed")
-EVAL_DIR.mkdir(parents=True, exist_ok=True)
 
 
 # --------------------------------------------------
 # Loader
 # --------------------------------------------------
 
-def load_forecast(forecast_date: str, variant: str) -> pd.DataFrame:
+def load_forecast(
+    forecast_date: str,
+    variant: str,
+    community_id: int = DB_COMMUNITY_ID,
+    freq: str = "1h",
+) -> pd.DataFrame:
+    from src.forecast.store import read_forecasts, resolution_variant
+
+    df = read_forecasts(
+        forecast_date, forecast_date,
+        variants=[resolution_variant(variant, freq)],
+        community_id=community_id,
+    )
+    if not df.empty:
+        return df
+    if freq != "1h":
+        raise FileNotFoundError(f"Forecast nicht gefunden: {forecast_date} / {variant} ({freq})")
+
+    # Fallback: alte Einzeldatei (vor dem Dataset)
     path = FORECAST_DIR / f"community_forecast_{forecast_date}_{variant}.parquet"
     if not path.exists():
-        raise FileNotFoundError(f"Forecast nicht gefunden: {path}")
+        raise FileNotFoundError(f"Forecast nicht gefunden: {forecast_date} / {variant}")
     return pd.read_parquet(path)
 
 
-def load_actual_consumption(forecast_date: str) -> pd.DataFrame:
-    df_gen_raw, df_con_raw = extract_raw()
-    prep = run_full_preparation(df_gen_raw, df_con_raw)
-
-    consumption = prep["consumption_1h"]["ConsumptionCommunity"]
+def load_actual_consumption(
+    forecast_date: str,
+    ctx: Optional[DataContext] = None,
+) -> pd.DataFrame:
+    ctx = ctx or DataContext()
+    consumption = ctx.consumption_1h()
 
     start = pd.Timestamp(forecast_date, tz="UTC")
-    end = start + pd.Timedelta(hours=23)
+    end = start + pd.Timedelta(days=1) - pd.Timedelta(ctx.freq)
 
     return (
         consumption
@@ -51,6 +71,7 @@ def compute_costs(
     forecast_df: pd.DataFrame,
     actual_df: pd.DataFrame,
     forecast_date: str,
+    spot: Optional[pd.DataFrame] = None,
 ) -> pd.DataFrame:
 
     df = forecast_df.merge(actual_df, on="DateTimeUtc", how="left")
@@ -58,9 +79,11 @@ def compute_costs(
     df["error_kwh"] = df["forecast_consumption"] - df["actual_consumption"]
     df["abs_error_kwh"] = df["error_kwh"].abs()
 
-    spot = read_spot_price_hourly(
-        datetime.fromisoformat(forecast_date).date()
-    )
+    # Spotpreise: vorgeladen (DataContext) oder direkt von APG
+    if spot is None:
+        spot = read_spot_price_hourly(
+            datetime.fromisoformat(forecast_date).date()
+        )
 
     df = df.merge(spot, on="DateTimeUtc", how="left")
 
@@ -117,32 +140,26 @@ def compute_forecast_metrics(
 #  TEMPERATUR-VERGLEICH (SCHRITT A)
 # --------------------------------------------------
 
-def compare_temperature_impact(forecast_date: str):
+def compare_temperature_impact(
+    forecast_date: str,
+    ctx: Optional[DataContext] = None,
+):
     print(f"\n Temperatur-Impact für {forecast_date}")
     print("====================================")
 
-    actuals = load_actual_consumption(forecast_date)
+    ctx = ctx or DataContext()
+    actuals = load_actual_consumption(forecast_date, ctx=ctx)
+    spot = ctx.spot_prices(datetime.fromisoformat(forecast_date).date())
 
     results = {}
     summaries = {}
 
     for variant in ["no_temp", "with_temp"]:
-        forecast = load_forecast(forecast_date, variant)
-        df_cost = compute_costs(forecast, actuals, forecast_date)
-
-        summary = (
-            df_cost
-            .groupby("model")
-            .agg(
-                daily_exposure_eur=("exposure_eur", "sum"),
-                bias_eur=("signed_impact_eur", "sum"),
-                p90_eur=("exposure_eur", lambda x: x.quantile(0.9)),
-                p95_eur=("exposure_eur", lambda x: x.quantile(0.95)),
-            )
-        )
-        metrics = compute_forecast_metrics(df_cost)
+        forecast = load_forecast(forecast_date, variant, community_id=ctx.community_id, freq=ctx.freq)
+        df_cost = compute_costs(forecast, actuals, forecast_date, spot=spot)
 
-        summary = summary.join(metrics)
+        # Exposure/Bias/p90/p95 + Metriken vektorisiert (cost_engine)
+        summary = summarize_costs(df_cost, keys=["model"])
         results[variant] = summary
 
         summaries[variant] = summary
@@ -190,25 +207,10 @@ def compare_temperature_impact(forecast_date: str):
     print(" Δ < 0  → Temperatur verbessert den Forecast ")
     print(" Δ > 0  → Temperatur verschlechtert den Forecast ")
 
-    out_path = EVAL_DIR / f"community_temp_compare_{forecast_date}.parquet"
-    comparison.to_parquet(out_path, index=False)
-    print(f"\n Vergleich gespeichert: {out_path}")
-    
-    metrics = compute_forecast_metrics(df_cost)
-
-    summary = (
-        df_cost
-        .groupby("model")
-        .agg(
-            daily_exposure_eur=("exposure_eur", "sum"),
-            bias_eur=("signed_impact_eur", "sum"),
-            p90_eur=("exposure_eur", lambda x: x.quantile(0.9)),
-            p95_eur=("exposure_eur", lambda x: x.quantile(0.95)),
-        )
-    )
+    from src.forecast.store import TEMP_COMPARE_DATASET_DIR, write_temp_compare
 
-    summary = summary.join(metrics)
-    results[variant] = summary
+    write_temp_compare(comparison, community_id=ctx.community_id)
+    print(f"\n Vergleich gespeichert: {TEMP_COMPARE_DATASET_DIR} ({forecast_date})")
 
     delta_metrics = (
         results["with_temp"][["nMAE_%", "nRMSE_%", "MAE_kWh", "RMSE_kWh"]]
@@ -0,0 +1,232 @@
+# src/evaluation/cost_engine.py
+#
+# Vektorisierte Kosten-Evaluation über einen ganzen Datumsbereich:
+# alle Forecasts, Ist-Werte und Spotpreise werden EINMAL zu einem langen
+# Frame gejoint, danach laufen alle Kennzahlen als groupby über
+# (forecast_day, model, variant) – ohne Python-Lambdas pro Gruppe.
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import DB_COMMUNITY_ID
+from src.context import DataContext
+
+FORECAST_DIR = Path("data/forecasts")
+
+GROUP_KEYS = ["forecast_day", "model", "variant"]
+VARIANTS = ("no_temp", "with_temp")
+
+SUMMARY_COLUMNS = [
+    "daily_exposure_eur", "bias_eur", "p90_eur", "p95_eur",
+    "MAE_kWh", "RMSE_kWh", "nMAE_%", "nRMSE_%", "Capacity_kWh",
+]
+
+
+# --------------------------------------------------
+# Laden (einmal für den ganzen Zeitraum)
+# --------------------------------------------------
+
+def _days(start_date: str, end_date: str) -> list[pd.Timestamp]:
+    return list(pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq="D"))
+
+
+def load_forecasts_range(
+    start_date: str,
+    end_date: str,
+    variants: Iterable[str] = VARIANTS,
+    community_id: int = DB_COMMUNITY_ID,
+    freq: str = "1h",
+) -> pd.DataFrame:
+    """
+    Alle vorhandenen Forecasts im Zeitraum als ein Frame (+ Spalte variant).
+    freq="15min": liest no_temp_15min/… und liefert sie als no_temp/… zurück.
+    """
+    from src.forecast.store import read_forecasts, resolution_variant
+
+    variants = list(variants)
+
+    if freq != "1h":
+        stored = read_forecasts(
+            start_date, end_date,
+            variants=[resolution_variant(v, freq) for v in variants],
+            community_id=community_id,
+        )
+        if stored.empty:
+            return pd.DataFrame(columns=["DateTimeUtc", "forecast_consumption", "model", *GROUP_KEYS])
+        stored["variant"] = stored["variant"].str.removesuffix(f"_{freq}")
+        return stored
+
+    # ein Scan über das partitionierte Dataset
+    stored = read_forecasts(start_date, end_date, variants=variants, community_id=community_id)
+    parts = [stored] if not stored.empty else []
+    have = (
+        set(zip(stored["forecast_day"], stored["variant"])) if not stored.empty else set()
+    )
+
+    # Fallback: alte Einzeldateien für (Tag, Variante), die noch nicht migriert sind
+    for day in _days(start_date, end_date):
+        day_str = day.date().isoformat()
+        for variant in variants:
+            if (day_str, variant) in have:
+                continue
+            path = FORECAST_DIR / f"community_forecast_{day_str}_{variant}.parquet"
+            if not path.exists():
+                continue
+            df = pd.read_parquet(path)
+            df["variant"] = variant
+            df["forecast_day"] = day_str
+            parts.append(df)
+
+    if not parts:
+        return pd.DataFrame(columns=["DateTimeUtc", "forecast_consumption", "model", *GROUP_KEYS])
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def load_spot_range(days: Iterable[pd.Timestamp], ctx: DataContext) -> pd.DataFrame:
+    return pd.concat(
+        [ctx.spot_prices(day.date()) for day in days],
+        ignore_index=True,
+    ).drop_duplicates("DateTimeUtc")
+
+
+def build_cost_frame(
+    forecasts: pd.DataFrame,
+    actual: pd.Series,
+    spot: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Ein Join für alle Tage/Modelle/Varianten.
+    Spalten wie compute_costs (error_kwh, exposure_eur, signed_impact_eur, ...).
+    """
+    actual_df = actual.rename("actual_consumption").rename_axis("DateTimeUtc").reset_index()
+
+    df = (
+        forecasts
+        .merge(actual_df, on="DateTimeUtc", how="left")
+        .merge(spot, on="DateTimeUtc", how="left")
+    )
+
+    df["error_kwh"] = df["forecast_consumption"] - df["actual_consumption"]
+    df["abs_error_kwh"] = df["error_kwh"].abs()
+    df["signed_impact_eur"] = (df["error_kwh"] / 1000) * df["spot_eur_per_mwh"]
+    df["exposure_eur"] = (df["abs_error_kwh"] / 1000) * df["spot_eur_per_mwh"]
+
+    return df
+
+
+# --------------------------------------------------
+# Kennzahlen (vektorisiert)
+# --------------------------------------------------
+
+def summarize_costs(
+    df_cost: pd.DataFrame,
+    keys: list[str] = GROUP_KEYS,
+    cap_quantile: float = 0.995,
+) -> pd.DataFrame:
+    """
+    Exposure/Bias/p90/p95 + compute_forecast_metrics-Kennzahlen
+    (MAE, RMSE, nMAE, nRMSE, Capacity) pro Gruppe.
+    """
+    g = df_cost.groupby(keys, sort=True)
+
+    summary = g.agg(
+        daily_exposure_eur=("exposure_eur", "sum"),
+        bias_eur=("signed_impact_eur", "sum"),
+    )
+    q = g["exposure_eur"].quantile([0.9, 0.95]).unstack()
+    summary["p90_eur"] = q[0.9]
+    summary["p95_eur"] = q[0.95]
+
+    # Metriken nur auf Zeilen mit Forecast UND Ist-Wert (wie compute_forecast_metrics)
+    valid = df_cost["forecast_consumption"].notna() & df_cost["actual_consumption"].notna()
+    err = df_cost["error_kwh"].where(valid)
+    m = pd.DataFrame({
+        "abs_err": err.abs(),
+        "sq_err": err ** 2,
+        "actual": df_cost["actual_consumption"].where(valid),
+    })
+    for k in keys:
+        m[k] = df_cost[k].values
+    gm = m.groupby(keys, sort=True)
+
+    mae = gm["abs_err"].mean()
+    rmse = np.sqrt(gm["sq_err"].mean())
+    cap = gm["actual"].quantile(cap_quantile)
+    cap_max = gm["actual"].max()
+    cap = cap.where(np.isfinite(cap) & (cap > 0), cap_max)
+    denom = cap.where(cap > 0)      # keine positive Capacity → nMAE/nRMSE NaN statt inf
+
+    summary["MAE_kWh"] = mae
+    summary["RMSE_kWh"] = rmse
+    summary["nMAE_%"] = mae / denom * 100
+    summary["nRMSE_%"] = rmse / denom * 100
+    summary["Capacity_kWh"] = cap
+
+    # Gruppen ohne valide Zeile behalten NaN-Metriken (wie summary.join(metrics))
+    return summary
+
+
+def compare_variants(summary: pd.DataFrame) -> pd.DataFrame:
+    """
+    no_temp vs with_temp pro (Tag, Modell) – gleiches Format wie
+    run_temperature_backtest. Nur Tage mit beiden Varianten.
+    """
+    expo = summary["daily_exposure_eur"].unstack("variant")
+    if not set(VARIANTS).issubset(expo.columns):
+        return pd.DataFrame(
+            columns=["date", "model", "no_temp_eur", "with_temp_eur", "delta_eur", "verdict"]
+        )
+
+    expo = expo.dropna(subset=list(VARIANTS))
+    delta = expo["with_temp"] - expo["no_temp"]
+
+    out = pd.DataFrame({
+        "no_temp_eur": expo["no_temp"].round(2),
+        "with_temp_eur": expo["with_temp"].round(2),
+        "delta_eur": delta.round(2),
+        "verdict": np.where(delta < 0, "better", "worse"),
+    }).reset_index().rename(columns={"forecast_day": "date"})
+
+    return out.sort_values(["date", "model"]).reset_index(drop=True)
+
+
+# --------------------------------------------------
+# Einstieg
+# --------------------------------------------------
+
+def evaluate_range(
+    start_date: str,
+    end_date: str,
+    variants: Iterable[str] = VARIANTS,
+    ctx: Optional[DataContext] = None,
+    cap_quantile: float = 0.995,
+) -> pd.DataFrame:
+    """
+    Kosten + Metriken für alle Tage in [start_date, end_date].
+
+    Returns:
+        DataFrame, Index (forecast_day, model, variant)
+    """
+    ctx = ctx or DataContext()
+
+    forecasts = load_forecasts_range(
+        start_date, end_date, variants, community_id=ctx.community_id, freq=ctx.freq
+    )
+    if forecasts.empty:
+        print(f" Keine Forecasts zwischen {start_date} und {end_date}")
+        return pd.DataFrame(
+            columns=SUMMARY_COLUMNS,
+            index=pd.MultiIndex.from_tuples([], names=GROUP_KEYS),
+        )
+
+    days = [pd.Timestamp(d) for d in sorted(forecasts["forecast_day"].unique())]
+    spot = load_spot_range(days, ctx)
+
+    df_cost = build_cost_frame(forecasts, ctx.consumption_1h(), spot)
+    return summarize_costs(df_cost, cap_quantile=cap_quantile)
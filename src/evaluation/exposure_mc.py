@@ -0,0 +1,261 @@
+# src/evaluation/exposure_mc.py
+#
+# Monte-Carlo-Verteilung der Tages-Exposure (EUR) statt eines einzelnen
+# realisierten Werts aus compute_costs:
+#
+# - Residuen: Fehlerhistorie der Backtests (Forecast-Dataset − Ist) pro
+#   Modell/Variante als Matrix Tag × Slot (24 bzw. 96)
+# - Block-Bootstrap nach Tageszeit: der Tag wird in Blöcke fester Länge
+#   geteilt (z.B. 00–04, 04–08 …), jeder Block eines Szenarios kommt aus
+#   einem zufälligen historischen Tag – an derselben Tageszeit. So bleiben
+#   Heteroskedastizität über den Tag und die Autokorrelation innerhalb
+#   eines Blocks erhalten.
+# - Preise: Spotkurve des Zieltags (spot_eur_per_mwh) oder – für
+#   Preisunsicherheit – zufällig gezogene Kurven aus einer Kurvenmatrix
+# - exposure = Σ |e|/1000 · Preis, impact = Σ e/1000 · Preis (wie
+#   build_cost_frame), pro Szenario; daraus VaR/CVaR
+#
+# Alles als Array-Operationen auf Szenario-Blöcken (chunk_size Szenarien
+# auf einmal, keine Python-Schleife pro Szenario). Zwei unabhängige
+# Zufallsströme (Residuen, Preise) aus einem Seed → Ergebnis hängt nicht
+# von chunk_size ab.
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+from src.evaluation.cost_engine import VARIANTS, load_forecasts_range
+
+N_SCENARIOS = 20_000
+CHUNK_SIZE = 16_384
+BLOCK_HOURS = 4
+HISTORY_DAYS = 60
+MIN_HISTORY_DAYS = 7
+ALPHAS = (0.95, 0.99)
+
+
+# ============================================================
+# Residuen-Historie
+# ============================================================
+
+def residual_matrix(errors: pd.Series, freq: str = "1h") -> tuple[np.ndarray, list]:
+    """
+    Fehler (Index DateTimeUtc) → Matrix Tag × Slot. Nur vollständige Tage.
+    Returns: (Matrix, Liste der Tage)
+    """
+    slots = int(pd.Timedelta("1D") / pd.Timedelta(freq))
+    idx = errors.index
+    day = idx.floor("D")
+    slot = ((idx - day) / pd.Timedelta(freq)).astype(int)
+
+    wide = (
+        pd.DataFrame({"day": day, "slot": slot, "e": errors.to_numpy(float)})
+        .pivot_table(index="day", columns="slot", values="e", aggfunc="mean")
+        .reindex(columns=range(slots))
+        .dropna()
+    )
+    return wide.to_numpy(float), list(wide.index)
+
+
+def residual_history(
+    target_day: str,
+    history_days: int = HISTORY_DAYS,
+    variants: Iterable[str] = VARIANTS,
+    ctx: Optional[DataContext] = None,
+) -> dict[tuple[str, str], tuple[np.ndarray, list]]:
+    """
+    Backtest-Fehler der history_days Tage VOR target_day pro (Modell, Variante).
+    Returns: {(model, variant): (Matrix Tag × Slot, Tage)}
+    """
+    ctx = ctx or DataContext()
+    end = pd.Timestamp(target_day) - pd.Timedelta(days=1)
+    start = end - pd.Timedelta(days=history_days - 1)
+
+    forecasts = load_forecasts_range(
+        start.date().isoformat(), end.date().isoformat(), variants,
+        community_id=ctx.community_id, freq=ctx.freq,
+    )
+    if forecasts.empty:
+        return {}
+
+    actual = ctx.consumption_1h().rename("actual_consumption")
+    df = forecasts.merge(actual.rename_axis("DateTimeUtc").reset_index(), on="DateTimeUtc", how="left")
+    df["error_kwh"] = df["forecast_consumption"] - df["actual_consumption"]
+
+    out = {}
+    for (model, variant), g in df.groupby(["model", "variant"], sort=True):
+        errors = g.set_index("DateTimeUtc")["error_kwh"].dropna().sort_index()
+        errors = errors[~errors.index.duplicated(keep="last")]
+        out[(model, variant)] = residual_matrix(errors, ctx.freq)
+    return out
+
+
+# ============================================================
+# Simulation
+# ============================================================
+
+def _block_layout(n_slots: int, block_slots: int) -> np.ndarray:
+    """Slot → Blocknummer (letzter Block ggf. kürzer)."""
+    return np.arange(n_slots) // block_slots
+
+
+def simulate_exposure(
+    residuals: np.ndarray,
+    spot: np.ndarray,
+    n_scenarios: int = N_SCENARIOS,
+    block_slots: int = BLOCK_HOURS,
+    chunk_size: int = CHUNK_SIZE,
+    seed: Optional[int] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    residuals: Tag × Slot (kWh), spot: Slot (eine Kurve) oder Kurve × Slot
+    (pro Szenario zufällig gezogen), EUR/MWh.
+
+    Returns: (exposure_eur, impact_eur), je ein Wert pro Szenario.
+    """
+    residuals = np.asarray(residuals, dtype=float)
+    spot = np.asarray(spot, dtype=float)
+    n_days, n_slots = residuals.shape
+    if spot.shape[-1] != n_slots:
+        raise ValueError(f"Spotkurve hat {spot.shape[-1]} Slots, Residuen {n_slots}")
+    if np.isnan(spot).any():
+        raise ValueError("Spotkurve enthält Lücken")
+
+    block_of_slot = _block_layout(n_slots, block_slots)
+    n_blocks = int(block_of_slot[-1]) + 1
+    slot_idx = np.arange(n_slots)
+    price_mwh = spot / 1000.0          # EUR/kWh
+
+    # getrennte Ströme → identische Szenarien für jede chunk_size
+    rng_err, rng_price = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+
+    exposure = np.empty(n_scenarios)
+    impact = np.empty(n_scenarios)
+
+    for lo in range(0, n_scenarios, chunk_size):
+        n = min(chunk_size, n_scenarios - lo)
+
+        # Block-Bootstrap: ein historischer Tag pro (Szenario, Block),
+        # aufgespannt auf die Slots des Blocks → Fehler n × Slot
+        day_of_block = rng_err.integers(0, n_days, size=(n, n_blocks))
+        err = residuals[day_of_block[:, block_of_slot], slot_idx]
+
+        if price_mwh.ndim == 1:
+            exposure[lo:lo + n] = np.abs(err) @ price_mwh
+            impact[lo:lo + n] = err @ price_mwh
+        else:
+            prices = price_mwh[rng_price.integers(0, len(price_mwh), size=n)]
+            exposure[lo:lo + n] = np.einsum("ij,ij->i", np.abs(err), prices)
+            impact[lo:lo + n] = np.einsum("ij,ij->i", err, prices)
+
+    return exposure, impact
+
+
+def var_cvar(losses: np.ndarray, alpha: float) -> tuple[float, float]:
+    """Value at Risk (α-Quantil) und CVaR (Mittel der Verluste ≥ VaR)."""
+    var = float(np.quantile(losses, alpha))
+    return var, float(losses[losses >= var].mean())
+
+
+def summarize_scenarios(
+    exposure: np.ndarray,
+    impact: np.ndarray,
+    alphas: Iterable[float] = ALPHAS,
+) -> dict:
+    row = {
+        "n_scenarios": len(exposure),
+        "exposure_mean_eur": float(exposure.mean()),
+        "exposure_std_eur": float(exposure.std()),
+        "exposure_p50_eur": float(np.median(exposure)),
+    }
+    for a in alphas:
+        var, cvar = var_cvar(exposure, a)
+        pct = f"{a * 100:g}"
+        row[f"VaR{pct}_eur"] = var
+        row[f"CVaR{pct}_eur"] = cvar
+    row["impact_mean_eur"] = float(impact.mean())
+    row["impact_p05_eur"], row["impact_p95_eur"] = (float(x) for x in np.quantile(impact, [0.05, 0.95]))
+    return row
+
+
+# ============================================================
+# Einstieg
+# ============================================================
+
+def spot_curves(days: Iterable, ctx: DataContext) -> np.ndarray:
+    """Spotkurven mehrerer Tage als Kurve × Slot (Tage mit Lücken entfallen)."""
+    slots = int(pd.Timedelta("1D") / pd.Timedelta(ctx.freq))
+    curves = []
+    for day in days:
+        try:
+            s = ctx.spot_prices(pd.Timestamp(day).date())["spot_eur_per_mwh"].to_numpy(float)
+        except Exception as e:
+            print(f"  ⏭️ Spotpreise {pd.Timestamp(day).date()} fehlen: {e}")
+            continue
+        if len(s) == slots and not np.isnan(s).any():
+            curves.append(s)
+    if not curves:
+        raise ValueError("Keine vollständigen Spotkurven")
+    return np.vstack(curves)
+
+
+def run_exposure_simulation(
+    target_day: str,
+    history_days: int = HISTORY_DAYS,
+    n_scenarios: int = N_SCENARIOS,
+    block_hours: int = BLOCK_HOURS,
+    spot_history_days: int = 0,
+    alphas: Iterable[float] = ALPHAS,
+    seed: Optional[int] = 0,
+    chunk_size: int = CHUNK_SIZE,
+    variants: Iterable[str] = VARIANTS,
+    ctx: Optional[DataContext] = None,
+) -> pd.DataFrame:
+    """
+    Exposure-Verteilung für target_day pro (Modell, Variante).
+    spot_history_days=0: Spotkurve des Zieltags; >0: Kurven des Zieltags
+    und der Tage davor als Preisszenarien (gleich wahrscheinlich).
+
+    Returns: DataFrame, Index (model, variant) – Mittel, Std, VaR/CVaR, …
+    """
+    ctx = ctx or DataContext()
+    alphas = list(alphas)
+    day = pd.Timestamp(target_day)
+    block_slots = int(pd.Timedelta(hours=block_hours) / pd.Timedelta(ctx.freq))
+
+    history = residual_history(target_day, history_days, variants, ctx=ctx)
+    if not history:
+        raise ValueError(f"Keine Backtest-Forecasts in den {history_days} Tagen vor {target_day}")
+
+    spot = spot_curves([day - pd.Timedelta(days=i) for i in range(spot_history_days + 1)], ctx)
+    spot = spot[0] if spot_history_days == 0 else spot
+
+    print(f"Exposure-MC {target_day}: {n_scenarios:,} Szenarien, Blöcke à {block_hours} h, "
+          f"{len(spot) if spot.ndim == 2 else 1} Preiskurve(n)")
+
+    rows = []
+    for (model, variant), (residuals, days) in history.items():
+        if len(days) < MIN_HISTORY_DAYS:
+            print(f"  ⏭️ {model}/{variant}: nur {len(days)} vollständige Tage Historie")
+            continue
+        exposure, impact = simulate_exposure(
+            residuals, spot, n_scenarios, block_slots, chunk_size, seed
+        )
+        rows.append({
+            "model": model,
+            "variant": variant,
+            "n_history_days": len(days),
+            **summarize_scenarios(exposure, impact, alphas),
+        })
+
+    if not rows:
+        raise ValueError(f"Zu wenig Historie (< {MIN_HISTORY_DAYS} vollständige Tage) für {target_day}")
+
+    result = pd.DataFrame(rows).set_index(["model", "variant"]).sort_index()
+    result.insert(0, "target_day", day.date().isoformat())
+
+    return result
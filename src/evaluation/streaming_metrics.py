@@ -0,0 +1,312 @@
+# src/evaluation/streaming_metrics.py
+#
+# Streaming-/mergebare Akkumulatoren für die Kosten-Evaluation.
+# Statt alle Fehlerzeilen im Speicher zu halten, wird pro Gruppe
+# (z.B. forecast_day, model, variant) nur ein kleiner Zustand geführt:
+#
+#   - Summen (exakt):   n, Σ|e|, Σe², Σe, Σ exposure, Σ signed impact
+#   - Quantile (Sketch): exposure p90/p95, actual p99.5 (Capacity)
+#
+# Tage können einzeln oder in parallelen Workern gefaltet und danach mit
+# merge() kombiniert werden (Zustand = dicts/ints → picklebar). merge()
+# übernimmt Gruppen des anderen Akkumulators als Kopie.
+#
+# CLI: evaluate --range --streaming (Gesamtstatistik pro Modell/Variante
+# über den ganzen Zeitraum, ohne alle Kostenzeilen im Speicher).
+#
+# Fehlergrenzen:
+#   - MAE, RMSE, Bias, Exposure-/Impact-Summen: exakt (bis auf float-Rundung)
+#   - Quantile: DDSketch-Verfahren mit relativer Genauigkeit alpha
+#     (Default 0.5 %). Das Ergebnis liegt innerhalb ±alpha·|x| des
+#     Ordnungsstatistik-Werts x = x_(⌊q·(n−1)⌋). Die exakte Berechnung
+#     (pandas, lineare Interpolation) liegt zwischen x_(⌊q·(n−1)⌋) und
+#     x_(⌈q·(n−1)⌉); bei wenigen Zeilen pro Gruppe (24 h) kann der Abstand
+#     daher größer sein als alpha – bei langen Zeiträumen verschwindet er.
+#   - nMAE/nRMSE erben die Genauigkeit der Capacity (relativ ≤ alpha).
+
+from __future__ import annotations
+
+import copy
+import math
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+
+EXPOSURE_QUANTILES = (0.9, 0.95)
+CAP_QUANTILE = 0.995
+
+
+# ============================================================
+# Quantil-Sketch (DDSketch, relative Genauigkeit)
+# ============================================================
+
+class QuantileSketch:
+    """
+    Mergebarer Quantil-Sketch mit logarithmischen Buckets.
+    Werte ≤ min_value (Betrag) landen im Null-Bucket, negative Werte
+    in einem eigenen Store.
+    """
+
+    def __init__(self, alpha: float = 0.005, min_value: float = 1e-9):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+
+        self.pos: dict[int, int] = {}
+        self.neg: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def _keys(self, x: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(x) / self._log_gamma).astype(np.int64)
+
+    @staticmethod
+    def _add(store: dict[int, int], keys: np.ndarray) -> None:
+        uniq, cnt = np.unique(keys, return_counts=True)
+        for k, c in zip(uniq.tolist(), cnt.tolist()):
+            store[k] = store.get(k, 0) + c
+
+    def update(self, values) -> None:
+        x = np.asarray(values, dtype=float)
+        x = x[np.isfinite(x)]
+        if x.size == 0:
+            return
+
+        pos = x[x > self.min_value]
+        neg = -x[x < -self.min_value]
+
+        if pos.size:
+            self._add(self.pos, self._keys(pos))
+        if neg.size:
+            self._add(self.neg, self._keys(neg))
+
+        self.zero += int(x.size - pos.size - neg.size)
+        self.count += int(x.size)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Sketches mit unterschiedlichem alpha nicht mergebar")
+        for k, c in other.pos.items():
+            self.pos[k] = self.pos.get(k, 0) + c
+        for k, c in other.neg.items():
+            self.neg[k] = self.neg.get(k, 0) + c
+        self.zero += other.zero
+        self.count += other.count
+        return self
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+
+        rank = q * (self.count - 1)
+        seen = 0
+
+        # negativ: betragsmäßig größte zuerst
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return -self._value(k)
+
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return self._value(k)
+
+        return self._value(max(self.pos)) if self.pos else 0.0
+
+
+# ============================================================
+# Metrik-Akkumulator (eine Gruppe)
+# ============================================================
+
+class MetricAccumulator:
+    """Streaming-Pendant zu summarize_costs für EINE Gruppe."""
+
+    def __init__(self, alpha: float = 0.005):
+        self.alpha = alpha
+
+        # Kosten (alle Zeilen, NaN wird übersprungen wie bei .sum())
+        self.exposure_sum = 0.0
+        self.signed_sum = 0.0
+        self.exposure_sketch = QuantileSketch(alpha)
+
+        # Fehler-Metriken (nur Zeilen mit Forecast UND Ist-Wert)
+        self.n = 0
+        self.abs_err_sum = 0.0
+        self.sq_err_sum = 0.0
+        self.err_sum = 0.0
+        self.actual_max = float("-inf")
+        self.actual_sketch = QuantileSketch(alpha)
+
+    def update(self, df_cost: pd.DataFrame) -> "MetricAccumulator":
+        exposure = df_cost["exposure_eur"].to_numpy(float)
+        signed = df_cost["signed_impact_eur"].to_numpy(float)
+
+        self.exposure_sum += float(np.nansum(exposure))
+        self.signed_sum += float(np.nansum(signed))
+        self.exposure_sketch.update(exposure)
+
+        fc = df_cost["forecast_consumption"].to_numpy(float)
+        act = df_cost["actual_consumption"].to_numpy(float)
+        valid = ~np.isnan(fc) & ~np.isnan(act)
+        if valid.any():
+            err = fc[valid] - act[valid]
+            self.n += int(valid.sum())
+            self.abs_err_sum += float(np.abs(err).sum())
+            self.sq_err_sum += float((err ** 2).sum())
+            self.err_sum += float(err.sum())
+            self.actual_max = max(self.actual_max, float(act[valid].max()))
+            self.actual_sketch.update(act[valid])
+
+        return self
+
+    def merge(self, other: "MetricAccumulator") -> "MetricAccumulator":
+        self.exposure_sum += other.exposure_sum
+        self.signed_sum += other.signed_sum
+        self.exposure_sketch.merge(other.exposure_sketch)
+
+        self.n += other.n
+        self.abs_err_sum += other.abs_err_sum
+        self.sq_err_sum += other.sq_err_sum
+        self.err_sum += other.err_sum
+        self.actual_max = max(self.actual_max, other.actual_max)
+        self.actual_sketch.merge(other.actual_sketch)
+        return self
+
+    def result(self, cap_quantile: float = CAP_QUANTILE) -> dict:
+        out = {
+            "daily_exposure_eur": self.exposure_sum,
+            "bias_eur": self.signed_sum,
+            "p90_eur": self.exposure_sketch.quantile(0.9),
+            "p95_eur": self.exposure_sketch.quantile(0.95),
+        }
+
+        if self.n == 0:
+            nan = float("nan")
+            out.update({
+                "MAE_kWh": nan, "RMSE_kWh": nan, "nMAE_%": nan,
+                "nRMSE_%": nan, "Capacity_kWh": nan, "Bias_kWh": nan,
+            })
+            return out
+
+        mae = self.abs_err_sum / self.n
+        rmse = math.sqrt(self.sq_err_sum / self.n)
+
+        cap = self.actual_sketch.quantile(cap_quantile)
+        if not np.isfinite(cap) or cap <= 0:
+            cap = self.actual_max
+        # keine positive Capacity → keine normierten Fehler (wie summarize_costs)
+        denom = cap if np.isfinite(cap) and cap > 0 else float("nan")
+
+        out.update({
+            "MAE_kWh": mae,
+            "RMSE_kWh": rmse,
+            "nMAE_%": mae / denom * 100,
+            "nRMSE_%": rmse / denom * 100,
+            "Capacity_kWh": cap,
+            "Bias_kWh": self.err_sum / self.n,
+        })
+        return out
+
+
+# ============================================================
+# Gruppierte Akkumulatoren
+# ============================================================
+
+class GroupedAccumulator:
+    """
+    Dict (Gruppenschlüssel → MetricAccumulator).
+    keys=["model", "variant"] faltet z.B. alle Tage zu einer Gesamtstatistik.
+    """
+
+    def __init__(self, keys: Iterable[str] = ("forecast_day", "model", "variant"), alpha: float = 0.005):
+        self.keys = list(keys)
+        self.alpha = alpha
+        self.groups: dict[tuple, MetricAccumulator] = {}
+
+    def update(self, df_cost: pd.DataFrame) -> "GroupedAccumulator":
+        for key, g in df_cost.groupby(self.keys, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            acc = self.groups.get(key)
+            if acc is None:
+                acc = self.groups[key] = MetricAccumulator(self.alpha)
+            acc.update(g)
+        return self
+
+    def merge(self, other: "GroupedAccumulator") -> "GroupedAccumulator":
+        if other.keys != self.keys:
+            raise ValueError(f"Gruppenschlüssel passen nicht: {self.keys} vs {other.keys}")
+        for key, acc in other.groups.items():
+            if key in self.groups:
+                self.groups[key].merge(acc)
+            else:
+                self.groups[key] = copy.deepcopy(acc)
+        return self
+
+    def result(self, cap_quantile: float = CAP_QUANTILE) -> pd.DataFrame:
+        rows = [
+            {**dict(zip(self.keys, key)), **acc.result(cap_quantile)}
+            for key, acc in self.groups.items()
+        ]
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows).set_index(self.keys).sort_index()
+
+
+def merge_accumulators(
+    accs: Iterable[GroupedAccumulator],
+    keys: Iterable[str] = ("forecast_day", "model", "variant"),
+    alpha: float = 0.005,
+) -> GroupedAccumulator:
+    """Neuer Akkumulator aus allen accs (Eingaben bleiben unverändert; leer → keys/alpha)."""
+    accs = list(accs)
+    if not accs:
+        return GroupedAccumulator(keys, alpha)
+    out = GroupedAccumulator(accs[0].keys, accs[0].alpha)
+    for acc in accs:
+        out.merge(acc)
+    return out
+
+
+# ============================================================
+# Einstieg: Tag für Tag falten
+# ============================================================
+
+def streaming_evaluate_range(
+    start_date: str,
+    end_date: str,
+    keys: Iterable[str] = ("model", "variant"),
+    ctx: Optional[DataContext] = None,
+    alpha: float = 0.005,
+) -> GroupedAccumulator:
+    """
+    Faltet den Zeitraum Tag für Tag in einen GroupedAccumulator –
+    Speicher wächst mit der Zahl der Gruppen, nicht der Zeilen.
+    """
+    from src.evaluation.cost_engine import build_cost_frame, load_forecasts_range
+
+    ctx = ctx or DataContext()
+    acc = GroupedAccumulator(keys, alpha)
+    actual = ctx.consumption_1h()
+
+    for day in pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq="D"):
+        day_str = day.date().isoformat()
+        forecasts = load_forecasts_range(day_str, day_str, community_id=ctx.community_id, freq=ctx.freq)
+        if forecasts.empty:
+            continue
+
+        df_cost = build_cost_frame(forecasts, actual, ctx.spot_prices(day.date()))
+        acc.update(df_cost)
+
+    return acc
@@ -1,6 +1,13 @@
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
 import pandas as pd
 from .db import get_engine
-from .config import DB_COMMUNITY_ID, RAW_DIR
+from .utils.instrument import span, timed
+from .config import DB_COMMUNITY_ID, RAW_DIR, community_path, init_dirs
 
 QUERY_GEN = """
 SELECT
@@ -13,12 +20,12 @@ SELECT
     MP.Number,
     A.PostalCode,
     A.City
-FROM [NobileConnected].[dbo].[MeterGeneration] MG
-JOIN [NobileConnected].[dbo].[MeteringPoint] MP 
+FROM {schema}MeterGeneration MG
+JOIN {schema}MeteringPoint MP 
     ON MG.MeteringPointId = MP.ID
-LEFT JOIN [NobileConnected].[dbo].[Adress] A 
+LEFT JOIN {schema}Adress A 
     ON MP.AdressId = A.ID
-WHERE MG.CommunityId = {community_id}
+WHERE MG.CommunityId IN ({community_ids}){time_filter}
 ORDER BY MG.DateTimeUtc;
 """
 
@@ -33,28 +40,284 @@ SELECT
     MP.Number,
     A.PostalCode,
     A.City
-FROM [NobileConnected].[dbo].[MeterConsumption] MC
-JOIN [NobileConnected].[dbo].[MeteringPoint] MP 
+FROM {schema}MeterConsumption MC
+JOIN {schema}MeteringPoint MP 
     ON MC.MeteringPointId = MP.ID
-LEFT JOIN [NobileConnected].[dbo].[Adress] A 
+LEFT JOIN {schema}Adress A 
     ON MP.AdressId = A.ID
-WHERE MC.CommunityId = {community_id}
+WHERE MC.CommunityId IN ({community_ids}){time_filter}
 ORDER BY MC.DateTimeUtc;
 """
 
-def extract_raw():
+# Tabellen-Präfix je Dialekt: SQL Server mit Datenbank/Schema,
+# lokale Stand-ins (SQLite) ohne
+SCHEMA_PREFIX = {
+    "mssql": "[NobileConnected].[dbo].",
+}
+
+
+def sql_ts(ts: pd.Timestamp) -> str:
+    # DateTimeUtc ist in SQL naive UTC; Format vergleicht auch als Text
+    # korrekt (SQLite speichert Zeitstempel als 'YYYY-MM-DD HH:MM:SS')
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.tz_localize(None).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def render_query(
+    template: str,
+    engine,
+    community_id: int | Iterable[int] = DB_COMMUNITY_ID,
+    since: pd.Timestamp | None = None,
+    until: pd.Timestamp | None = None,
+) -> str:
+    """
+    QUERY_GEN / QUERY_CON für den Dialekt der Engine (optional [since, until)).
+    community_id: eine ID oder mehrere (ein Round-Trip für alle).
+    """
+    ids = [community_id] if isinstance(community_id, int) else list(community_id)
+    alias = "MG" if "MeterGeneration" in template else "MC"
+
+    time_filter = ""
+    if since is not None:
+        time_filter += f"\n  AND {alias}.DateTimeUtc >= '{sql_ts(since)}'"
+    if until is not None:
+        time_filter += f"\n  AND {alias}.DateTimeUtc < '{sql_ts(until)}'"
+
+    return template.format(
+        schema=SCHEMA_PREFIX.get(engine.dialect.name, ""),
+        community_ids=", ".join(str(int(i)) for i in ids),
+        time_filter=time_filter,
+    )
+
+
+def read_table(
+    engine,
+    template: str,
+    community_id: int | Iterable[int] = DB_COMMUNITY_ID,
+    since: pd.Timestamp | None = None,
+    until: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """Eine Tabelle (QUERY_GEN oder QUERY_CON) – einzeln, z.B. für parallele Pulls."""
+    name = "generation" if "MeterGeneration" in template else "consumption"
+    with span(f"extract.sql_{name}") as sp:
+        df = pd.read_sql(
+            render_query(template, engine, community_id, since, until), engine, parse_dates=["DateTimeUtc"]
+        )
+        sp.rows = len(df)
+    return df
+
+
+def read_raw(
+    engine,
+    community_id: int = DB_COMMUNITY_ID,
+    since: pd.Timestamp | None = None,
+    until: pd.Timestamp | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Liest df_gen_raw / df_con_raw (ohne zu speichern)."""
+    df_gen_raw = read_table(engine, QUERY_GEN, community_id, since, until)
+    df_con_raw = read_table(engine, QUERY_CON, community_id, since, until)
+    return df_gen_raw, df_con_raw
+
+
+def read_raw_multi(
+    engine,
+    community_ids: Iterable[int],
+    since: pd.Timestamp | None = None,
+) -> dict[int, tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Rohdaten mehrerer Communities mit EINER Abfrage pro Tabelle,
+    danach nach CommunityId aufgeteilt.
+    """
+    community_ids = [int(c) for c in community_ids]
+    df_gen_all, df_con_all = read_raw(engine, community_ids, since)
+
+    gen_by = dict(tuple(df_gen_all.groupby("CommunityId", sort=False)))
+    con_by = dict(tuple(df_con_all.groupby("CommunityId", sort=False)))
+
+    return {
+        cid: (
+            gen_by.get(cid, df_gen_all.iloc[0:0]).reset_index(drop=True),
+            con_by.get(cid, df_con_all.iloc[0:0]).reset_index(drop=True),
+        )
+        for cid in community_ids
+    }
+
+
+@timed("extract_raw")
+def extract_raw(community_id: int = DB_COMMUNITY_ID):
     engine = get_engine()
 
-    df_gen_raw = pd.read_sql(QUERY_GEN.format(community_id=DB_COMMUNITY_ID), engine)
-    df_con_raw = pd.read_sql(QUERY_CON.format(community_id=DB_COMMUNITY_ID), engine)
+    df_gen_raw, df_con_raw = read_raw(engine, community_id)
+    save_raw(df_gen_raw, df_con_raw, community_id)
+    return df_gen_raw, df_con_raw
+
 
+def save_raw(df_gen_raw: pd.DataFrame, df_con_raw: pd.DataFrame, community_id: int = DB_COMMUNITY_ID) -> None:
     # Speichern (damit du nicht immer SQL ziehen musst)
-    gen_path = RAW_DIR / "df_gen_raw.parquet"
-    con_path = RAW_DIR / "df_con_raw.parquet"
-    df_gen_raw.to_parquet(gen_path, index=False)
-    df_con_raw.to_parquet(con_path, index=False)
+    init_dirs()
+    gen_path = community_path(RAW_DIR / "df_gen_raw.parquet", community_id)
+    con_path = community_path(RAW_DIR / "df_con_raw.parquet", community_id)
+    with span("extract.parquet_write", rows=len(df_gen_raw) + len(df_con_raw)):
+        df_gen_raw.to_parquet(gen_path, index=False)
+        df_con_raw.to_parquet(con_path, index=False)
 
     print(f" Gespeichert: {gen_path}")
     print(f" Gespeichert: {con_path}")
 
-    return df_gen_raw, df_con_raw
+
+def extract_raw_since(
+    since: pd.Timestamp,
+    community_id: int = DB_COMMUNITY_ID,
+    until: pd.Timestamp | None = None,
+):
+    """
+    Inkrementeller Pull: nur Zeilen mit since <= DateTimeUtc (< until).
+    Liefert für jede enthaltene Stunde ALLE Rohzeilen (vollständige Stunden
+    zwischen den auf die volle Stunde abgerundeten Grenzen).
+    Wird nicht gespeichert – siehe HourlySeriesStore.
+    """
+    engine = get_engine()
+
+    def _hour(ts):
+        ts = pd.Timestamp(ts)
+        return (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).floor("h")
+
+    return read_raw(engine, community_id, since=_hour(since),
+                    until=None if until is None else _hour(until))
+
+
+# ============================================================
+# Partitionierter Raw-Export (für Out-of-Core-Prep)
+# ============================================================
+
+RAW_GEN_DATASET = RAW_DIR / "gen"
+RAW_CON_DATASET = RAW_DIR / "con"
+
+
+def raw_dataset_dirs(community_id: int = DB_COMMUNITY_ID) -> tuple[Path, Path]:
+    return (
+        community_path(RAW_GEN_DATASET, community_id),
+        community_path(RAW_CON_DATASET, community_id),
+    )
+
+TEXT_COLS = ["EnergySource", "Number", "PostalCode", "City"]
+NUM_COLS = ["Generation", "GenerationCommunity", "Consumption", "ConsumptionCommunity"]
+
+
+def _normalize_raw_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    # gleiche Typen in jedem Chunk, sonst passt das Dataset-Schema nicht
+    df = df.copy()
+    df["DateTimeUtc"] = pd.to_datetime(df["DateTimeUtc"], utc=True)
+    for c in TEXT_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype("string")
+    for c in NUM_COLS:
+        if c in df.columns:
+            df[c] = df[c].astype(float)
+    df["year"] = df["DateTimeUtc"].dt.year.astype("int16")
+    df["month"] = df["DateTimeUtc"].dt.month.astype("int8")
+    return df
+
+
+def write_raw_partitioned(df: pd.DataFrame, root: Path) -> None:
+    """Hängt Rohdaten an ein nach year/month partitioniertes Parquet-Dataset an."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    table = pa.Table.from_pandas(_normalize_raw_chunk(df), preserve_index=False)
+    root.mkdir(parents=True, exist_ok=True)
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=["year", "month"],
+        partitioning_flavor="hive",
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def extract_raw_partitioned(
+    chunksize: int = 500_000,
+    community_id: int = DB_COMMUNITY_ID,
+) -> tuple[Path, Path]:
+    """
+    Wie extract_raw, aber chunkweise direkt in RAW_DIR/gen und RAW_DIR/con
+    (year=/month=) – der komplette Frame liegt nie im Speicher.
+    """
+    engine = get_engine()
+    gen_root, con_root = raw_dataset_dirs(community_id)
+
+    for query, root in (
+        (QUERY_GEN, gen_root),
+        (QUERY_CON, con_root),
+    ):
+        # Voll-Extract → altes Dataset ersetzen
+        if root.exists():
+            shutil.rmtree(root)
+
+        n = 0
+        for chunk in pd.read_sql(
+            render_query(query, engine, community_id), engine, chunksize=chunksize, parse_dates=["DateTimeUtc"]
+        ):
+            write_raw_partitioned(chunk, root)
+            n += len(chunk)
+
+        print(f" Gespeichert: {root} ({n} Zeilen)")
+
+    return gen_root, con_root
+
+
+_PARTITION_RE = re.compile(r"year=(\d+)[/\\]month=(\d+)")
+
+
+def raw_dataset_latest(root: Path) -> Optional[pd.Timestamp]:
+    """Neuester DateTimeUtc im partitionierten Raw-Dataset (None: leer/fehlt)."""
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    if not root.exists():
+        return None
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    # nur der jüngste Monat muss gelesen werden
+    parts = {tuple(map(int, m.groups())) for f in dataset.files if (m := _PARTITION_RE.search(f))}
+    if not parts:
+        return None
+    year, month = max(parts)
+    col = dataset.to_table(
+        columns=["DateTimeUtc"],
+        filter=(ds.field("year") == year) & (ds.field("month") == month),
+    )["DateTimeUtc"]
+    latest = pc.max(col).as_py()
+    if latest is None:
+        return None
+    latest = pd.Timestamp(latest)
+    return latest.tz_localize("UTC") if latest.tzinfo is None else latest.tz_convert("UTC")
+
+
+def raw_dataset_stale(community_id: int = DB_COMMUNITY_ID) -> bool:
+    """
+    True, wenn das partitionierte Raw-Dataset fehlt oder hinter dem
+    SQL-Stand (MAX(DateTimeUtc), src/freshness.py) zurückliegt. Ist SQL nicht
+    erreichbar, wird das vorhandene Dataset mit Warnung weiterverwendet.
+    """
+    from src.freshness import probe_sql
+
+    gen_root, con_root = raw_dataset_dirs(community_id)
+    local = {"MeterGeneration": raw_dataset_latest(gen_root), "MeterConsumption": raw_dataset_latest(con_root)}
+    if any(ts is None for ts in local.values()):
+        return True
+
+    try:
+        remote = probe_sql(community_ids=community_id)[community_id]
+    except Exception as e:
+        print(f" ⚠️ SQL-Stand nicht prüfbar ({type(e).__name__}: {e}) – "
+              f"nutze Raw-Dataset bis {local['MeterConsumption']:%Y-%m-%d %H:%M} UTC")
+        return False
+
+    behind = [t for t, ts in remote.items() if ts is not None and ts > local[t]]
+    for t in behind:
+        print(f" Raw-Dataset veraltet: {t} bis {local[t]:%Y-%m-%d %H:%M}, "
+              f"SQL bis {remote[t]:%Y-%m-%d %H:%M} UTC → neu extrahieren")
+    return bool(behind)
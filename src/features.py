@@ -3,12 +3,23 @@
 import numpy as np
 import pandas as pd
 
+from src.utils.instrument import span, timed
+
 
 # ============================================================
 # Rolling slope (leakage-frei)
 # ============================================================
 
+# Fenster pro Block beim Slope (begrenzt den Speicher der Fenstermatrix)
+SLOPE_BLOCK = 4096
+
+
 def rolling_slope(series: pd.Series, window: int):
+    """
+    OLS-Steigung über die letzten window Werte (inkl. aktuellem).
+    Vektorisiert: Fenster als strided View, cov = Fenster @ (x − x̄),
+    blockweise statt einer Python-Schleife pro Zeile. Fenster mit NaN → NaN.
+    """
     y = series.to_numpy(float)
     n = len(y)
 
@@ -19,17 +30,37 @@ def rolling_slope(series: pd.Series, window: int):
     x_mean = x.mean()
     x_var = np.sum((x - x_mean) ** 2)
 
-    slopes = np.full(n, np.nan)
+    # Σ (x − x̄)(y − ȳ) = Σ (x − x̄)·y, da Σ (x − x̄) = 0
+    xc = x - x_mean
+    windows = np.lib.stride_tricks.sliding_window_view(y, window)
 
-    for i in range(window - 1, n):
-        y_win = y[i - window + 1 : i + 1]
-        y_mean = y_win.mean()
-        cov = np.sum((x - x_mean) * (y_win - y_mean))
-        slopes[i] = cov / x_var
+    slopes = np.full(n, np.nan)
+    for i in range(0, len(windows), SLOPE_BLOCK):
+        block = windows[i : i + SLOPE_BLOCK]
+        slopes[window - 1 + i : window - 1 + i + len(block)] = (block @ xc) / x_var
 
     return slopes
 
 
+# ============================================================
+# Zeitbasierte Fenster (Auflösung 1h oder 15min)
+# ============================================================
+
+def steps(span_: str | int, freq: str = "1h") -> int:
+    """Zeitspanne → Anzahl Zeilen bei Auflösung freq. int = Stunden."""
+    if isinstance(span_, (int, np.integer)):
+        span_ = f"{int(span_)}h"
+    return int(pd.Timedelta(span_) // pd.Timedelta(freq))
+
+
+def _hours_label(span_: str | int) -> str:
+    # Featurenamen in Stunden → im 1h-Modus unverändert (lag_24, roll_mean_6, …)
+    if isinstance(span_, (int, np.integer)):
+        return str(int(span_))
+    h = pd.Timedelta(span_) / pd.Timedelta("1h")
+    return str(int(h)) if h == int(h) else f"{h:g}"
+
+
 # ============================================================
 # Feature Engineering (LEAKAGE-FREE)
 # ============================================================
@@ -37,10 +68,16 @@ def rolling_slope(series: pd.Series, window: int):
 def make_features_no_leakage(
     series: pd.Series,
     temp_series: pd.Series | None = None,
-    lag_list=(24, 48, 72, 168, 336),
-    roll_windows=(6, 12, 24, 72, 168, 336),
-    diff_list=(1, 24, 168),
+    lag_list=("24h", "48h", "72h", "168h", "336h"),
+    roll_windows=("6h", "12h", "24h", "72h", "168h", "336h"),
+    diff_list=("1h", "24h", "168h"),
+    freq: str = "1h",
+    dtype=np.float64,
 ):
+    """
+    Lags/Fenster als Zeitspannen ("24h"; int = Stunden), umgerechnet auf die
+    Auflösung freq. dtype=np.float32 halbiert Speicher im 15min-Modus.
+    """
     idx = series.index
     values = series.to_numpy(float)
     n = len(values)
@@ -50,62 +87,128 @@ def make_features_no_leakage(
 
     # ---------------- LAGS ----------------
     for L in lag_list:
+        k = steps(L, freq)
         arr = np.full(n, np.nan)
-        if L < n:
-            arr[L:] = values[:-L]
-        feats[f"lag_{L}"] = arr
+        if k < n:
+            arr[k:] = values[:-k]
+        feats[f"lag_{_hours_label(L)}"] = arr
 
     # ---------------- ROLLINGS ------------
     for w in roll_windows:
-        roll = s.rolling(w, min_periods=1)
+        k = steps(w, freq)
+        name = _hours_label(w)
+        roll = s.rolling(k, min_periods=1)
 
-        feats[f"roll_mean_{w}"] = roll.mean().to_numpy()
-        feats[f"roll_std_{w}"] = roll.std().to_numpy()
-        feats[f"roll_min_{w}"] = roll.min().to_numpy()
-        feats[f"roll_max_{w}"] = roll.max().to_numpy()
+        feats[f"roll_mean_{name}"] = roll.mean().to_numpy()
+        feats[f"roll_std_{name}"] = roll.std().to_numpy()
+        feats[f"roll_min_{name}"] = roll.min().to_numpy()
+        feats[f"roll_max_{name}"] = roll.max().to_numpy()
 
-        feats[f"roll_slope_{w}"] = rolling_slope(s, w)
+        feats[f"roll_slope_{name}"] = rolling_slope(s, k)
 
     # ---------------- DIFFS ---------------
     for d in diff_list:
+        k = steps(d, freq)
         arr = np.full(n, np.nan)
-        if d < n:
-            arr[d:] = values[d:] - values[:-d]
-        feats[f"diff_{d}"] = arr
+        if k < n:
+            arr[k:] = values[k:] - values[:-k]
+        feats[f"diff_{_hours_label(d)}"] = arr
+
+    feats = {name: a.astype(dtype, copy=False) for name, a in feats.items()}
 
     # ---------------- KALENDER ------------
     feats["hour"] = idx.hour
     feats["weekday"] = idx.weekday
     feats["month"] = idx.month
     feats["is_weekend"] = (idx.weekday >= 5).astype(int)
+    if pd.Timedelta(freq) < pd.Timedelta("1h"):
+        feats["minute"] = idx.minute
 
     # ---------------- TEMPERATUR ----------
     if temp_series is not None:
-        temp_series = temp_series.reindex(idx)
+        k24, k168 = steps("24h", freq), steps("168h", freq)
+        temp_series = temp_series.reindex(idx).astype(dtype)
         feats["temp"] = temp_series
-        feats["temp_lag_24"] = temp_series.shift(24)
-        feats["temp_lag_168"] = temp_series.shift(168)
-        feats["temp_diff_24"] = temp_series - temp_series.shift(24)
+        feats["temp_lag_24"] = temp_series.shift(k24)
+        feats["temp_lag_168"] = temp_series.shift(k168)
+        feats["temp_diff_24"] = temp_series - temp_series.shift(k24)
 
     return pd.DataFrame(feats, index=idx)
 
 
+# ============================================================
+# Verlaufsfeatures für viele Reihen auf einmal (day-ahead)
+# ============================================================
+
+def shift_2d(a: np.ndarray, k: int) -> np.ndarray:
+    """Verschiebt alle Spalten um k Zeilen nach unten (NaN vorne)."""
+    out = np.full_like(a, np.nan)
+    if k < len(a):
+        out[k:] = a[: len(a) - k]
+    return out
+
+
+def history_features_2d(
+    values: np.ndarray,
+    lag_list=(24, 48, 72, 168, 336),
+    roll_windows=(24, 168),
+    horizon: int = 24,
+) -> dict[str, np.ndarray]:
+    """
+    Lags/Rollings/Diffs für alle Spalten von values (Zeit × Reihe) in einem
+    Durchlauf. Rollings und Diffs nutzen nur Werte ≥ horizon zurück, damit
+    die Features zum Forecast-Zeitpunkt (Vortag) bekannt sind.
+    """
+    feats = {}
+
+    # ---------------- LAGS ----------------
+    for L in lag_list:
+        feats[f"lag_{L}"] = shift_2d(values, L)
+
+    # ---------------- ROLLINGS ------------
+    # DataFrame.rolling läuft spaltenweise in Cython über alle Reihen
+    known = pd.DataFrame(shift_2d(values, horizon))
+    for w in roll_windows:
+        roll = known.rolling(w, min_periods=1)
+        feats[f"roll_mean_{w}"] = roll.mean().to_numpy(values.dtype)
+        feats[f"roll_std_{w}"] = roll.std().to_numpy(values.dtype)
+        feats[f"roll_max_{w}"] = roll.max().to_numpy(values.dtype)
+
+    # ---------------- DIFFS ---------------
+    last = shift_2d(values, horizon)
+    feats["diff_24"] = last - shift_2d(values, horizon + 24)
+    feats["diff_168"] = last - shift_2d(values, horizon + 168)
+
+    return feats
+
+
 # ============================================================
 # Dataset Builder (Train/Test – leakage-frei)
 # ============================================================
 
+@timed("build_dataset_leakage_free")
 def build_dataset_leakage_free(
     series: pd.Series,
     train_start: pd.Timestamp,
     test_start: pd.Timestamp,
     test_end: pd.Timestamp,
     temp_series: pd.Series | None = None,
+    freq: str = "1h",
 ):
-    max_window = 336
+    """
+    freq="15min": Viertelstunden-Modus – gleiche Zeitfenster, 4× so viele
+    Zeilen, Features als float32; Temperatur (stündlich) wird interpoliert.
+    """
+    max_window = pd.Timedelta("336h")
+    fine = pd.Timedelta(freq) < pd.Timedelta("1h")
+    dtype = np.float32 if fine else np.float64
+
+    series = series.asfreq(freq).astype(float)
 
-    series = series.asfreq("1h").astype(float)
+    if temp_series is not None and fine:
+        temp_series = temp_series.asfreq(freq).interpolate(limit_direction="forward")
 
-    hist_start = train_start - pd.Timedelta(hours=max_window)
+    hist_start = train_start - max_window
 
     s_hist = series[(series.index >= hist_start) & (series.index < train_start)]
     s_train = series[(series.index >= train_start) & (series.index < test_start)]
@@ -117,20 +220,26 @@ def build_dataset_leakage_free(
     y_train = hist_train.loc[s_train.index]
     y_test = s_test.dropna()
 
-    feats_train_all = make_features_no_leakage(
-        hist_train,
-        temp_series=temp_series,
-    )
+    with span("features.train", rows=len(hist_train)):
+        feats_train_all = make_features_no_leakage(
+            hist_train,
+            temp_series=temp_series,
+            freq=freq,
+            dtype=dtype,
+        )
 
     X_train = feats_train_all.loc[y_train.index]
     mask_tr = X_train.notna().all(axis=1) & y_train.notna()
     X_train = X_train[mask_tr]
     y_train = y_train[mask_tr]
 
-    feats_test_all = make_features_no_leakage(
-        pd.concat([hist_train, y_test]),
-        temp_series=temp_series,
-    )
+    with span("features.test", rows=len(hist_train) + len(y_test)):
+        feats_test_all = make_features_no_leakage(
+            pd.concat([hist_train, y_test]),
+            temp_series=temp_series,
+            freq=freq,
+            dtype=dtype,
+        )
 
     X_test = feats_test_all.loc[y_test.index]
     mask_te = X_test.notna().all(axis=1) & y_test.notna()
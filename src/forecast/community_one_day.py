@@ -1,18 +1,21 @@
 # src/forecast/community_one_day.py
 
+import argparse
+import json
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
-from sklearn.ensemble import RandomForestRegressor
-from xgboost import XGBRegressor
-import plotly.graph_objects as go
+# sklearn / xgboost / plotly werden erst in run_one_day_forecast geladen
+# (schneller Import, z.B. für --help)
 
 # Projekt-interne Imports
-from src.extract import extract_raw
-from src.prep import run_full_preparation
+from src.config import DB_COMMUNITY_ID, community_path
+from src.context import DataContext
 from src.features import build_dataset_leakage_free
 from src.weather.temperature import build_temperature_series
+from src.utils.instrument import span, timed
+from src.utils.plotting import line_trace, write_html
 
 
 
@@ -21,13 +24,89 @@ from src.weather.temperature import build_temperature_series
 # Output-Verzeichnis
 # ============================================================
 FORECAST_DIR = Path("data/forecasts")
-FORECAST_DIR.mkdir(parents=True, exist_ok=True)
 
+# Kompakt exportierte Modelle (src/forecast/compact_trees.py),
+# ein Verzeichnis pro Tag/Variante mit RF.npz, XGB.npz
+MODEL_DIR = Path("data/models")
 
+# ============================================================
+# Modell-Parameter (Default = bisherige Handwerte, getunte Werte
+# kommen aus MODEL_PARAMS_PATH – siehe src/forecast/tuning.py;
+# eine Datei pro Community, darin ein Eintrag pro Variante)
+# ============================================================
+MODEL_PARAMS_PATH = Path("data/processed/model_params.json")
+
+DEFAULT_MODEL_PARAMS = {
+    "RF": {
+        "n_estimators": 400,
+        "max_depth": 15,
+    },
+    "XGB": {
+        "n_estimators": 400,
+        "max_depth": 4,
+        "learning_rate": 0.05,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+    },
+}
+
+
+def load_model_params(
+    variant: str = "no_temp",
+    community_id: int = DB_COMMUNITY_ID,
+    path: Path = MODEL_PARAMS_PATH,
+) -> dict:
+    """
+    Default-Parameter, überschrieben durch die für Variante (z.B.
+    "with_temp_15min") und Community getunten Werte (falls vorhanden).
+    """
+    params = {name: dict(p) for name, p in DEFAULT_MODEL_PARAMS.items()}
+    entry = _tuned_variants(community_path(path, community_id)).get(variant, {})
+    for name, p in entry.get("params", {}).items():
+        params.setdefault(name, {}).update(p)
+    return params
+
+
+def save_model_params(
+    variant: str,
+    params: dict,
+    meta: dict,
+    community_id: int = DB_COMMUNITY_ID,
+    path: Path = MODEL_PARAMS_PATH,
+) -> Path:
+    """Getunte Parameter einer Variante speichern (andere Varianten bleiben)."""
+    path = community_path(path, community_id)
+    variants = _tuned_variants(path)
+    variants[variant] = {**meta, "params": params}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"variants": variants}, indent=2, default=str), encoding="utf-8")
+    return path
+
+
+def _tuned_variants(path: Path) -> dict:
+    """{Variante: Eintrag}; alte Dateien (ein Eintrag, stündlich) → ihre Variante."""
+    if not path.exists():
+        return {}
+    tuned = json.loads(path.read_text(encoding="utf-8"))
+    if "variants" in tuned:
+        return tuned["variants"]
+    legacy = "with_temp" if tuned.get("use_temperature") else "no_temp"
+    return {legacy: tuned}
+
+
+@timed("run_one_day_forecast")
 def run_one_day_forecast(
     forecast_date: Optional[str] = None,
     train_days: int = 45,
     use_temperature: bool = False,
+    ctx: Optional[DataContext] = None,
+    plot: bool = True,
+    export_models: bool = False,
+    xgb_hist: bool = False,
+    online: bool = False,
+    online_only: bool = False,
+    preflight: bool = True,
+    wait_minutes: float = 0.0,
 ):
 
     """
@@ -35,7 +114,19 @@ def run_one_day_forecast(
 
     - forecast_date=None            → PRODUKTION (morgen)
     - forecast_date="YYYY-MM-DD"    → SIMULATION
+    - ctx: gemeinsamer DataContext (SQL/ERA5 nur einmal laden)
+    - plot=False: kein HTML-Plot (Produktion, schneller)
+    - Auflösung kommt aus ctx.freq ("1h" oder "15min"; Variante dann *_15min)
+    - export_models=True: trainierte Modelle kompakt nach MODEL_DIR
+    - xgb_hist=True: XGB mit hist + Early Stopping (src/forecast/xgb_hist.py)
+    - online=True: zusätzlich RLS + SNAIVE (src/forecast/online.py), Zustand
+      wird pro Community/Variante fortgeschrieben; online_only=True: nur
+      diese (schneller Fallback ohne RF/XGB-Training)
+    - preflight=True: vor Extract/Prep per MAX(DateTimeUtc) prüfen, ob die
+      Consumption den Zieltag abdeckt (src/freshness.py); wait_minutes > 0:
+      so lange mit Backoff auf die Daten warten
     """
+    ctx = ctx or DataContext()
 
     # ========================================================
     # 0) Zeitdefinition
@@ -50,24 +141,35 @@ def run_one_day_forecast(
         forecast_start = pd.Timestamp(forecast_date, tz="UTC")
         mode = "SIMULATION"
 
-    forecast_end = forecast_start + pd.Timedelta(hours=23)
+    forecast_end = forecast_start + pd.Timedelta(days=1) - pd.Timedelta(ctx.freq)
     train_start = forecast_start - pd.Timedelta(days=train_days)
 
-    print(f"Running one-day forecast for {forecast_start.date()} ({mode})")
+    print(f"Running one-day forecast for {forecast_start.date()} ({mode}, {ctx.freq})")
 
     # ========================================================
-    # 1) Rohdaten laden
+    # 0b) Pre-Flight: Daten für den Zieltag schon da?
     # ========================================================
-    df_gen_raw, df_con_raw = extract_raw()
+    if preflight and not _data_ready(forecast_start, ctx, wait_minutes):
+        print(" Keine Consumption-Daten für den Zieltag – Forecast übersprungen.")
+        return None
+
+    # SQL (Generation ∥ Consumption) und ERA5-CSVs gemeinsam statt nacheinander
+    from src.io_stage import prefetch
 
-    prep = run_full_preparation(df_gen_raw, df_con_raw)
-    consumption_1h = prep["consumption_1h"]["ConsumptionCommunity"]
+    prefetch(ctx, train_start=train_start, use_temperature=use_temperature)
+
+    # ========================================================
+    # 1) Rohdaten laden
+    # ========================================================
+    with span("forecast.load_prep"):
+        consumption_1h = ctx.consumption_1h()
 
     if use_temperature:
         temp_series = build_temperature_series(
-            df_gen_raw=df_gen_raw,
+            df_gen_raw=ctx.df_gen_raw,
             train_start=train_start,
             test_end=forecast_end,
+            era5_loader=ctx.load_era5,
         )
         print(" Temperatur aktiv:", temp_series.shape)
     else:
@@ -75,6 +177,164 @@ def run_one_day_forecast(
 
 
 
+    from src.forecast.store import FORECAST_DATASET_DIR, resolution_variant, write_forecast
+
+    suffix = resolution_variant("with_temp" if use_temperature else "no_temp", ctx.freq)
+    export_dir = None
+    if export_models:
+        export_dir = community_path(MODEL_DIR / f"{forecast_start.date()}_{suffix}", ctx.community_id)
+    state_dir = None
+    if online or online_only:
+        from src.forecast.online import online_state_dir
+
+        state_dir = online_state_dir(suffix, ctx.community_id)
+
+    # ========================================================
+    # 2)–4) Features, Training, Vorhersage
+    # ========================================================
+    result = fit_predict_day(
+        consumption_1h=consumption_1h,
+        temp_series=temp_series,
+        train_start=train_start,
+        forecast_start=forecast_start,
+        forecast_end=forecast_end,
+        use_temperature=use_temperature,
+        freq=ctx.freq,
+        export_dir=export_dir,
+        xgb_hist=xgb_hist,
+        online=online,
+        online_only=online_only,
+        online_state_dir=state_dir,
+        community_id=ctx.community_id,
+    )
+    if result is None:
+        return None
+
+    # ========================================================
+    # 5) Speichern (ZUERST!) – ins partitionierte Forecast-Dataset
+    # ========================================================
+    with span("forecast.parquet_write", rows=len(result)):
+        write_forecast(result, variant=suffix, community_id=ctx.community_id)
+    print(f" Forecast gespeichert: {FORECAST_DATASET_DIR} ({forecast_start.date()}, {suffix})")
+
+    out_path = community_path(
+        FORECAST_DIR / f"community_forecast_{forecast_start.date()}_{suffix}.parquet", ctx.community_id
+    )
+
+    # ========================================================
+    # 6) Plot (erst NACH dem Speichern!, optional)
+    # ========================================================
+    if plot:
+        with span("forecast.plot"):
+            plot_forecast(
+                result,
+                out_path.with_suffix(".html"),
+                title=f"Community Forecast {forecast_start.date()} ({mode})",
+            )
+
+    return result
+
+
+def _data_ready(forecast_start: pd.Timestamp, ctx: DataContext, wait_minutes: float = 0.0) -> bool:
+    """Freshness-Check; ist die DB nicht erreichbar, entscheidet der Lauf selbst."""
+    from src.freshness import wait_for_data
+
+    try:
+        with span("forecast.preflight"):
+            f = wait_for_data(
+                forecast_start,
+                community_id=ctx.community_id,
+                freq=ctx.freq,
+                timeout_s=wait_minutes * 60,
+                ctx=ctx,
+            )
+    except Exception as e:
+        print(f" ⚠️ Freshness-Check fehlgeschlagen ({type(e).__name__}: {e}) – Lauf startet trotzdem")
+        return True
+    return f.ready
+
+
+def make_model(name: str, params: dict, n_jobs: int = -1):
+    from sklearn.ensemble import RandomForestRegressor
+    from xgboost import XGBRegressor
+
+    if name == "RF":
+        return RandomForestRegressor(**params, n_jobs=n_jobs, random_state=42)
+    if name == "XGB":
+        return XGBRegressor(
+            **params,
+            objective="reg:squarederror",
+            n_jobs=n_jobs,
+            random_state=42,
+        )
+    raise ValueError(f"Unbekanntes Modell: {name}")
+
+
+def build_models(
+    n_jobs: int = -1,
+    params: Optional[dict] = None,
+    freq: str = "1h",
+    xgb_hist: bool = False,
+    use_temperature: bool = False,
+    community_id: int = DB_COMMUNITY_ID,
+) -> dict:
+    """
+    RF + XGB mit den Produktions-Hyperparametern (getunt für Variante und
+    Community, falls vorhanden).
+
+    freq feiner als 1h: RF-Bäume ziehen nur den Anteil 1h/freq der Zeilen
+    (max_samples) – gleiche Stichprobengröße pro Baum wie im Stundenmodus,
+    damit die Trainingszeit nicht mit der 4× größeren Datenmenge wächst.
+
+    xgb_hist: XGB über src/forecast/xgb_hist.py (Early Stopping auf dem
+    Tail, n_estimators nur Obergrenze).
+    """
+    if params is None:
+        from src.forecast.store import resolution_variant
+
+        variant = resolution_variant("with_temp" if use_temperature else "no_temp", freq)
+        params = load_model_params(variant, community_id)
+    models = {name: make_model(name, p, n_jobs) for name, p in params.items()}
+
+    if xgb_hist and "XGB" in models:
+        from src.forecast.xgb_hist import HistXGBRegressor
+
+        models["XGB"] = HistXGBRegressor(params["XGB"], n_jobs=n_jobs)
+
+    ratio = pd.Timedelta(freq) / pd.Timedelta("1h")
+    if ratio < 1 and "RF" in models:
+        models["RF"].set_params(max_samples=ratio)
+    return models
+
+
+def fit_predict_day(
+    consumption_1h: pd.Series,
+    temp_series: Optional[pd.Series],
+    train_start: pd.Timestamp,
+    forecast_start: pd.Timestamp,
+    forecast_end: pd.Timestamp,
+    use_temperature: bool = False,
+    n_jobs: int = -1,
+    freq: str = "1h",
+    export_dir: Optional[Path] = None,
+    xgb_hist: bool = False,
+    online: bool = False,
+    online_only: bool = False,
+    online_state_dir: Optional[Path] = None,
+    model_names: Optional[Iterable[str]] = None,
+    community_id: int = DB_COMMUNITY_ID,
+) -> Optional[pd.DataFrame]:
+    """
+    Kern eines Tages-Forecasts (ohne Laden/Speichern/Plot):
+    Features → Training → Vorhersage. None, wenn keine Test-Features.
+    export_dir: trainierte Modelle zusätzlich kompakt als <name>.npz ablegen.
+    xgb_hist: XGB mit hist + Early Stopping (siehe build_models).
+    online / online_only: RLS + SNAIVE zusätzlich / statt RF und XGB;
+    Zustand aus online_state_dir (None → Kaltstart, nichts gespeichert).
+    model_names: nur diese Modelle aus build_models (z.B. ["RF"], wenn XGB
+    anderswo per Walk-Forward läuft).
+    community_id: getunte Modell-Parameter dieser Community (load_model_params).
+    """
     # ========================================================
     # 2) Feature-Dataset (leakage-frei)
     # ========================================================
@@ -84,6 +344,7 @@ def run_one_day_forecast(
         test_start=forecast_start,
         test_end=forecast_end,
         temp_series=temp_series,
+        freq=freq,
     )
 
     # --- sauberer Abbruch ---
@@ -95,36 +356,40 @@ def run_one_day_forecast(
     if len(X_train) < 100:
         raise ValueError(" Zu wenig Trainingsdaten für Forecast")
 
+    # reduziertes Feature-Set (src/forecast/feature_pruning.py), falls vorhanden
+    from src.forecast.feature_pruning import load_feature_spec, select_features, spec_variant
+
+    features = load_feature_spec(spec_variant(use_temperature, freq))
+    if features is not None:
+        X_train = select_features(X_train, features)
+        X_test = select_features(X_test, features)
+
     # ========================================================
     # 3) Modelle
     # ========================================================
-    models = {
-        "RF": RandomForestRegressor(
-            n_estimators=400,
-            max_depth=15,
-            n_jobs=-1,
-            random_state=42,
-        ),
-        "XGB": XGBRegressor(
-            n_estimators=400,
-            max_depth=4,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            objective="reg:squarederror",
-            n_jobs=-1,
-            random_state=42,
-        ),
-    }
+    models = {} if online_only else build_models(
+        n_jobs=n_jobs, freq=freq, xgb_hist=xgb_hist,
+        use_temperature=use_temperature, community_id=community_id,
+    )
+    if model_names is not None:
+        models = {name: m for name, m in models.items() if name in set(model_names)}
+
+    online_models = {}
+    if online or online_only:
+        from src.forecast.online import build_online_models
+
+        online_models = build_online_models(online_state_dir)
 
     forecasts = []
 
     # ========================================================
-    # 4) Trainieren & Vorhersagen
+    # 4) Trainieren & Vorhersagen (Online-Modelle: nur neue Stunden)
     # ========================================================
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        y_hat = model.predict(X_test)
+    for name, model in {**online_models, **models}.items():
+        with span(f"forecast.fit_{name}", rows=len(X_train), n_features=X_train.shape[1]):
+            model.fit(X_train, y_train)
+        with span(f"forecast.predict_{name}", rows=len(X_test)):
+            y_hat = model.predict(X_test)
 
         df_out = pd.DataFrame(
             {
@@ -138,42 +403,78 @@ def run_one_day_forecast(
 
         forecasts.append(df_out)
 
-    result = pd.concat(forecasts).sort_values("DateTimeUtc")
+    if online_models:
+        for name, model in online_models.items():
+            mode = "Kaltstart" if model.cold_start_ else "Update"
+            print(f" {name}: {mode} in {model.update_seconds_ * 1e3:.1f} ms")
+        if online_state_dir is not None:
+            from src.forecast.online import save_online_models
 
-    # ========================================================
-    # 5) Speichern (ZUERST!)
-    # ========================================================
-    suffix = "with_temp" if use_temperature else "no_temp"
-    out_path = FORECAST_DIR / f"community_forecast_{forecast_start.date()}_{suffix}.parquet"
+            save_online_models(online_models, online_state_dir)
 
-    result.to_parquet(out_path, index=False)
-    print(f" Forecast gespeichert: {out_path}")
+    if export_dir is not None and models:
+        from src.forecast.compact_trees import export_models
+
+        with span("forecast.export_models"):
+            export_models(models, export_dir, feature_names=X_train.columns)
+        print(f" Modelle exportiert: {export_dir}")
+
+    return pd.concat(forecasts).sort_values("DateTimeUtc")
+
+
+def plot_forecast(result: pd.DataFrame, plot_path: Path, title: str) -> Path:
+    """Forecast-Plot pro Modell; nutzt das gemeinsame lokale plotly.js."""
+    import plotly.graph_objects as go
 
-    # ========================================================
-    # 6) Plot (erst NACH dem Speichern!)
-    # ========================================================
     fig = go.Figure()
 
     for model in result["model"].unique():
         df_m = result[result["model"] == model]
         fig.add_trace(
-            go.Scatter(
-                x=df_m["DateTimeUtc"],
+            line_trace(
+                x=pd.DatetimeIndex(df_m["DateTimeUtc"]),
                 y=df_m["forecast_consumption"],
                 name=f"Forecast {model}",
             )
         )
 
     fig.update_layout(
-        title=f"Community Forecast {forecast_start.date()} ({mode})",
+        title=title,
         xaxis_title="Zeit (UTC)",
         yaxis_title="Consumption",
         template="plotly_white",
     )
 
-    plot_path = out_path.with_suffix(".html")
-    fig.write_html(plot_path)
+    write_html(fig, plot_path)
 
     print(f" Plot gespeichert: {plot_path}")
-
-    return result
+    return plot_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="24h Community-Forecast (Consumption)")
+    parser.add_argument("--date", default=None, help="YYYY-MM-DD (Simulation), leer = morgen")
+    parser.add_argument("--train-days", type=int, default=45)
+    parser.add_argument("--with-temp", action="store_true", help="ERA5-Temperatur als Feature")
+    parser.add_argument("--no-plot", action="store_true", help="keinen HTML-Plot schreiben")
+    parser.add_argument("--export-models", action="store_true", help="Modelle kompakt nach data/models")
+    parser.add_argument("--xgb-hist", action="store_true", help="XGB mit hist + Early Stopping")
+    parser.add_argument("--online", action="store_true", help="zusätzlich RLS + saisonal-naiv")
+    parser.add_argument("--online-only", action="store_true", help="nur RLS + saisonal-naiv")
+    parser.add_argument("--wait", type=float, default=0.0, metavar="MIN",
+                        help="bis zu MIN Minuten auf die Consumption des Zieltags warten")
+    parser.add_argument("--no-preflight", action="store_true", help="kein Freshness-Check vorab")
+    args = parser.parse_args()
+
+    run_one_day_forecast(
+        forecast_date=args.date,
+        train_days=args.train_days,
+        use_temperature=args.with_temp,
+        plot=not args.no_plot,
+        export_models=args.export_models,
+        xgb_hist=args.xgb_hist,
+        online=args.online,
+        online_only=args.online_only,
+        preflight=not args.no_preflight,
+        wait_minutes=args.wait,
+    )
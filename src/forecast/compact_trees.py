@@ -0,0 +1,358 @@
+# src/forecast/compact_trees.py
+#
+# Kompaktes Array-Format für fertig trainierte Baum-Ensembles (RF + XGB).
+#
+# - Alle Bäume in flache Knoten-Arrays (Feature, Schwelle, linkes/rechtes
+#   Kind, Default-Richtung bei NaN, Wert) – ein .npz statt Pickle.
+# - Vektorisierte Batch-Vorhersage: alle Zeilen × alle Bäume gleichzeitig,
+#   eine Ebene pro Schritt (Blätter zeigen auf sich selbst).
+# - Vorhersagen identisch zum Original:
+#     RF : sklearn vergleicht float32-X mit x <= t (t float64) → Schwelle auf
+#          die float32-Grenze gerundet, dann strikt x < t'
+#     XGB: x < t in float32, Schwellen/Blätter exakt aus dem JSON-Modell,
+#          Summe Baum für Baum in float32 wie im XGB-Predictor
+# - Kategoriale XGB-Splits (globales Modell) werden nicht unterstützt.
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+# Zeilen × Bäume pro Vorhersage-Block (begrenzt den Zwischenspeicher)
+BATCH_CELLS = 1 << 22
+
+FORMAT_VERSION = 1
+
+# XGB-Zielfunktionen mit Identitäts-Link (Vorhersage = base_score + Σ Blätter)
+XGB_IDENTITY_OBJECTIVES = {
+    "reg:squarederror",
+    "reg:absoluteerror",
+    "reg:pseudohubererror",
+    "reg:quantileerror",
+}
+
+ARRAY_FIELDS = ("feature", "threshold", "left", "right", "default_left", "value", "roots")
+
+
+class CompactEnsemble:
+    """
+    Flaches Baum-Ensemble.
+
+    Knoten-Arrays (Länge = Knoten aller Bäume):
+        feature       int16/int32  Spaltenindex (Blatt: 0)
+        threshold     float32      links, wenn x < threshold
+        left, right   int32        globale Knotenindizes (Blatt: auf sich selbst)
+        default_left  bool         Richtung bei NaN
+        value         float32/64   Blattwert
+    roots: Wurzelknoten pro Baum.
+    aggregate: "mean" (RF) oder "sum" (XGB, + base_score).
+    """
+
+    def __init__(
+        self,
+        arrays: dict,
+        feature_names: list[str],
+        aggregate: str,
+        base_score: float = 0.0,
+        max_depth: Optional[int] = None,
+        source: str = "",
+    ):
+        for name in ARRAY_FIELDS:
+            setattr(self, name, arrays[name])
+        self.feature_names = list(feature_names)
+        self.aggregate = aggregate
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth if max_depth is not None else _depth(arrays))
+        self.source = source
+        # [links, rechts] verschränkt: Kind = children[2 * node + geht_rechts]
+        self._children = np.stack([self.left, self.right], axis=1).ravel()
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAY_FIELDS)
+
+    # --------------------------------------------------
+    # Vorhersage
+    # --------------------------------------------------
+    def _input(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            missing = [c for c in self.feature_names if c not in X.columns]
+            if missing:
+                raise ValueError(f"Fehlende Features: {missing}")
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Erwarte {len(self.feature_names)} Features, bekommen {X.shape}")
+        return X
+
+    def _leaf_nodes(self, X) -> np.ndarray:
+        """Blatt-Knoten (Baum × Zeile), blockweise über die Zeilen."""
+        X = self._input(X)
+        block = max(1, BATCH_CELLS // max(self.n_trees, 1))
+        parts = [self._apply_block(X[i:i + block]) for i in range(0, len(X), block)]
+        return np.concatenate(parts, axis=1) if parts else np.empty((self.n_trees, 0), np.int32)
+
+    def _apply_block(self, X: np.ndarray) -> np.ndarray:
+        n, n_features = X.shape
+        flat = np.ascontiguousarray(X).ravel()
+        row_offset = np.arange(n, dtype=np.int64) * n_features
+        has_nan = bool(np.isnan(flat).any())
+
+        # baum-major: benachbarte Zellen lesen denselben Baum (Cache)
+        node = np.broadcast_to(self.roots[:, None], (self.n_trees, n)).copy()
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            # NaN < t ist False → rechts; Default-Richtung nur, wenn nötig
+            go_right = ~(x < self.threshold.take(node))
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~self.default_left.take(node), go_right)
+            node = self._children.take(2 * node + go_right)
+        return node
+
+    def apply(self, X) -> np.ndarray:
+        """Blatt-Knoten pro (Zeile, Baum) – wie sklearn apply(), aber globale Indizes."""
+        return self._leaf_nodes(X).T
+
+    def predict(self, X) -> np.ndarray:
+        # Summe über Achse 0 läuft Baum für Baum (sequentiell) – gleiche
+        # Reihenfolge wie sklearn (float64, / n_trees) bzw. XGBoost
+        # (base_score + Blätter in float32) → bitgleiche Vorhersagen
+        leaves = self.value.take(self._leaf_nodes(X))
+        if self.aggregate == "mean":
+            return leaves.sum(axis=0) / self.n_trees
+        return leaves.sum(axis=0, initial=np.float32(self.base_score))
+
+    # --------------------------------------------------
+    # Speichern / Laden
+    # --------------------------------------------------
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "feature_names": self.feature_names,
+            "aggregate": self.aggregate,
+            "base_score": self.base_score,
+            "max_depth": self.max_depth,
+            "source": self.source,
+        }
+        # unkomprimiert: Laden = reines Lesen der Arrays
+        with open(path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)),
+                     **{name: getattr(self, name) for name in ARRAY_FIELDS})
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "CompactEnsemble":
+        with np.load(Path(path), allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Unbekannte Format-Version in {path}: {meta.get('format_version')}")
+            arrays = {name: z[name] for name in ARRAY_FIELDS}
+        return cls(
+            arrays,
+            feature_names=meta["feature_names"],
+            aggregate=meta["aggregate"],
+            base_score=meta["base_score"],
+            max_depth=meta["max_depth"],
+            source=meta.get("source", ""),
+        )
+
+
+# ============================================================
+# Hilfsfunktionen
+# ============================================================
+
+def _feature_dtype(n_features: int):
+    return np.int16 if n_features < np.iinfo(np.int16).max else np.int32
+
+
+def _depth(arrays: dict) -> int:
+    """Maximale Baumtiefe (Anzahl Splits von der Wurzel bis zum tiefsten Blatt)."""
+    left, right = arrays["left"], arrays["right"]
+    depth = 0
+    frontier = np.asarray(arrays["roots"])
+    while True:
+        frontier = frontier[left[frontier] != frontier]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+def _concat_trees(trees: list[dict], n_features: int, value_dtype) -> dict:
+    """Baum-lokale Knotenindizes → globale, Blätter auf sich selbst."""
+    sizes = np.array([len(t["feature"]) for t in trees])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    out = {name: [] for name in ("feature", "threshold", "left", "right", "default_left", "value")}
+    for t, off in zip(trees, offsets):
+        own = np.arange(len(t["feature"])) + off
+        leaf = t["left"] < 0
+        out["feature"].append(np.where(leaf, 0, t["feature"]))
+        out["threshold"].append(t["threshold"])
+        out["left"].append(np.where(leaf, own, t["left"] + off))
+        out["right"].append(np.where(leaf, own, t["right"] + off))
+        out["default_left"].append(t["default_left"])
+        out["value"].append(t["value"])
+
+    return {
+        "feature": np.concatenate(out["feature"]).astype(_feature_dtype(n_features)),
+        "threshold": np.concatenate(out["threshold"]).astype(np.float32),
+        "left": np.concatenate(out["left"]).astype(np.int32),
+        "right": np.concatenate(out["right"]).astype(np.int32),
+        "default_left": np.concatenate(out["default_left"]).astype(bool),
+        "value": np.concatenate(out["value"]).astype(value_dtype),
+        "roots": offsets.astype(np.int32),
+    }
+
+
+def _strict_threshold_f32(t: np.ndarray) -> np.ndarray:
+    """
+    sklearn: x <= t mit float32-x und float64-t.
+    Äquivalent für alle float32-x: x < nextafter(t32, +inf),
+    t32 = größter float32-Wert ≤ t.
+    """
+    t32 = t.astype(np.float32)
+    too_big = t32.astype(np.float64) > t
+    t32[too_big] = np.nextafter(t32[too_big], np.float32(-np.inf))
+    return np.nextafter(t32, np.float32(np.inf))
+
+
+# ============================================================
+# sklearn RandomForest
+# ============================================================
+
+def compile_sklearn_forest(model, feature_names: Optional[Iterable[str]] = None) -> CompactEnsemble:
+    """RandomForestRegressor / ExtraTreesRegressor (single output)."""
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Nur Single-Output-Forests werden unterstützt")
+
+    n_features = model.n_features_in_
+    if feature_names is None:
+        feature_names = getattr(model, "feature_names_in_", [f"f{i}" for i in range(n_features)])
+
+    trees = []
+    for est in model.estimators_:
+        tr = est.tree_
+        mgl = getattr(tr, "missing_go_to_left", None)
+        trees.append({
+            "feature": tr.feature,
+            "threshold": _strict_threshold_f32(tr.threshold),
+            "left": tr.children_left,
+            "right": tr.children_right,
+            # ohne NaN-Support im Training: NaN <= t ist False → rechts
+            "default_left": mgl.astype(bool) if mgl is not None else np.zeros(tr.node_count, bool),
+            "value": tr.value[:, 0, 0],
+        })
+
+    return CompactEnsemble(
+        _concat_trees(trees, n_features, np.float64),
+        feature_names=list(feature_names),
+        aggregate="mean",
+        max_depth=max(est.tree_.max_depth for est in model.estimators_),
+        source=type(model).__name__,
+    )
+
+
+# ============================================================
+# XGBoost
+# ============================================================
+
+def _xgb_base_score(learner: dict) -> float:
+    raw = learner["learner_model_param"]["base_score"]
+    # XGBoost ≥ 2: "[1.53E0]" (Vektor), älter: "1.53E0"
+    return float(np.asarray(json.loads(raw) if raw.startswith("[") else float(raw)).ravel()[0])
+
+
+def compile_xgboost(model, feature_names: Optional[Iterable[str]] = None) -> CompactEnsemble:
+    """XGBRegressor oder Booster (gbtree, numerische Splits, Identitäts-Link)."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+
+    raw = json.loads(booster.save_raw(raw_format="json"))
+    learner = raw["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in XGB_IDENTITY_OBJECTIVES:
+        raise ValueError(f"XGB-Zielfunktion nicht unterstützt: {objective}")
+    if int(learner["learner_model_param"].get("num_target", "1")) > 1:
+        raise ValueError("Nur Single-Target-XGB-Modelle werden unterstützt")
+    gb = learner["gradient_booster"]
+    if gb["name"] != "gbtree":
+        raise ValueError(f"XGB-Booster nicht unterstützt: {gb['name']}")
+    gb_model = gb["model"]
+
+    # Early Stopping: predict() nutzt nur die Bäume bis best_iteration
+    tree_json = gb_model["trees"]
+    try:
+        best = model.best_iteration
+    except AttributeError:
+        best = None
+    if best is not None:
+        indptr = gb_model.get("iteration_indptr")
+        if indptr is not None:
+            tree_json = tree_json[: indptr[best + 1]]
+        else:
+            n_parallel = int(gb_model["gbtree_model_param"].get("num_parallel_tree", "1"))
+            tree_json = tree_json[: (best + 1) * n_parallel]
+
+    n_features = int(learner["learner_model_param"]["num_feature"])
+    if feature_names is None:
+        feature_names = booster.feature_names or [f"f{i}" for i in range(n_features)]
+
+    trees = []
+    for t in tree_json:
+        if any(t.get("split_type", [])):
+            raise ValueError("Kategoriale XGB-Splits werden nicht unterstützt")
+        left = np.asarray(t["left_children"], dtype=np.int64)
+        cond = np.asarray(t["split_conditions"], dtype=np.float32)
+        leaf = left < 0
+        trees.append({
+            "feature": np.asarray(t["split_indices"], dtype=np.int64),
+            "threshold": np.where(leaf, np.float32(0), cond),
+            "left": left,
+            "right": np.asarray(t["right_children"], dtype=np.int64),
+            "default_left": np.asarray(t["default_left"], dtype=bool),
+            # Blätter: split_conditions enthält den Blattwert (inkl. learning_rate)
+            "value": np.where(leaf, cond, np.float32(0)),
+        })
+
+    return CompactEnsemble(
+        _concat_trees(trees, n_features, np.float32),
+        feature_names=list(feature_names),
+        aggregate="sum",
+        base_score=_xgb_base_score(learner),
+        source=type(model).__name__,
+    )
+
+
+def compile_ensemble(model, feature_names: Optional[Iterable[str]] = None) -> CompactEnsemble:
+    """Dispatch nach Modelltyp (RF/ExtraTrees oder XGB)."""
+    if hasattr(model, "estimators_"):
+        return compile_sklearn_forest(model, feature_names)
+    if hasattr(model, "get_booster") or type(model).__name__ == "Booster":
+        return compile_xgboost(model, feature_names)
+    raise ValueError(f"Modelltyp nicht unterstützt: {type(model).__name__}")
+
+
+def export_models(models: dict, out_dir: Path, feature_names: Optional[Iterable[str]] = None) -> dict:
+    """Kompiliert {name: fitted_model} nach out_dir/<name>.npz."""
+    return {
+        name: compile_ensemble(model, feature_names).save(Path(out_dir) / f"{name}.npz")
+        for name, model in models.items()
+    }
+
+
+def load_models(model_dir: Path) -> dict[str, CompactEnsemble]:
+    """Alle *.npz eines Export-Verzeichnisses: {name: CompactEnsemble}."""
+    return {p.stem: CompactEnsemble.load(p) for p in sorted(Path(model_dir).glob("*.npz"))}
@@ -0,0 +1,306 @@
+# src/forecast/feature_pruning.py
+#
+# Feature-Pruning über einen Rolling-Backtest (Folds wie im Tuning):
+#
+# 0) Die jüngsten holdout_folds Folds bleiben für Schritt 4 zurück –
+#    Auswahl und Bewertung laufen auf getrennten Tagen
+# 1) Importance pro Fold – Permutation (MAE-Anstieg auf dem Testtag) oder
+#    Gain (feature_importances_) – gemittelt über die Auswahl-Folds
+# 2) Features unter min_importance (Anteil an der Gesamt-Importance) fallen weg
+# 3) Redundanz: stark korrelierte Features (|r| ≥ corr_threshold, z.B.
+#    roll_mean/min/max benachbarter Fenster) → nur das wichtigste bleibt
+# 4) Kosten/Nutzen: RF/XGB auf vollem vs. reduziertem Set (Fit-/Predict-Zeit,
+#    MAE) nur über die Holdout-Folds (out-of-sample für die Auswahl)
+#
+# Ergebnis → FEATURE_SPEC_PATH (pro Variante, liest fit_predict_day),
+# Report → REPORT_PATH. Gespeichert wird nur, wenn die MAE keines Modells
+# um mehr als max_mae_increase (relativ) steigt.
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+from src.forecast.community_one_day import build_models, load_model_params, make_model
+from src.forecast.tuning import FoldCache, build_folds, rolling_origins
+
+FEATURE_SPEC_PATH = Path("data/processed/feature_spec.json")
+REPORT_PATH = Path("data/processed/feature_pruning_report.json")
+
+MIN_IMPORTANCE = 0.005
+CORR_THRESHOLD = 0.98
+MAX_MAE_INCREASE = 0.02
+HOLDOUT_FOLDS = 2
+
+
+# ============================================================
+# Feature-Spec
+# ============================================================
+
+def spec_variant(use_temperature: bool, freq: str = "1h") -> str:
+    from src.forecast.store import resolution_variant
+
+    return resolution_variant("with_temp" if use_temperature else "no_temp", freq)
+
+
+def load_feature_spec(variant: str, path: Path = FEATURE_SPEC_PATH) -> Optional[list[str]]:
+    """Reduziertes Feature-Set der Variante oder None (= alle Features)."""
+    if not path.exists():
+        return None
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    entry = spec.get("variants", {}).get(variant)
+    return entry["features"] if entry else None
+
+
+def save_feature_spec(variant: str, features: list[str], meta: dict, path: Path = FEATURE_SPEC_PATH) -> None:
+    spec = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {"variants": {}}
+    spec["variants"][variant] = {"features": features, **meta}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(spec, indent=2, default=str), encoding="utf-8")
+
+
+def select_features(X: pd.DataFrame, features: Optional[Iterable[str]]) -> pd.DataFrame:
+    """Spalten laut Spec (Reihenfolge der Spec); fehlende werden ignoriert."""
+    if features is None:
+        return X
+    cols = [c for c in features if c in X.columns]
+    missing = len(list(features)) - len(cols)
+    if missing:
+        print(f" ⚠️ Feature-Spec: {missing} Features fehlen im Datensatz – ignoriert")
+    return X[cols]
+
+
+# ============================================================
+# Importance
+# ============================================================
+
+def fold_importance(
+    model_name: str,
+    fold: tuple,
+    method: str = "permutation",
+    n_repeats: int = 5,
+    seed: int = 0,
+    n_jobs: int = -1,
+    params: Optional[dict] = None,
+) -> pd.Series:
+    """Importance eines Folds (Index = Feature); params: siehe load_model_params."""
+    X_train, y_train, X_test, y_test = fold
+    params = params or load_model_params()
+    model = make_model(model_name, params[model_name], n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+
+    if method == "gain":
+        return pd.Series(model.feature_importances_, index=X_train.columns)
+
+    if method == "permutation":
+        from sklearn.inspection import permutation_importance
+
+        res = permutation_importance(
+            model, X_test, y_test,
+            scoring="neg_mean_absolute_error",
+            n_repeats=n_repeats,
+            random_state=seed,
+        )
+        return pd.Series(res.importances_mean, index=X_train.columns)
+
+    raise ValueError(f"Unbekannte Importance-Methode: {method}")
+
+
+def rolling_importance(folds: list[tuple], model_name: str = "RF", method: str = "permutation", **kwargs) -> pd.DataFrame:
+    """Fold × Feature; Anteil an der Summe pro Fold (negative Werte → 0)."""
+    rows = []
+    for i, fold in enumerate(folds):
+        imp = fold_importance(model_name, fold, method=method, **kwargs).clip(lower=0)
+        total = imp.sum()
+        rows.append(imp / total if total > 0 else imp)
+        print(f"  Fold {i + 1}/{len(folds)}: Top {', '.join(imp.nlargest(3).index)}")
+    return pd.DataFrame(rows).reset_index(drop=True)
+
+
+def prune(
+    importance: pd.Series,
+    X: pd.DataFrame,
+    min_importance: float = MIN_IMPORTANCE,
+    corr_threshold: float = CORR_THRESHOLD,
+) -> tuple[list[str], dict[str, str]]:
+    """
+    Greedy nach Importance: Feature bleibt, wenn es über min_importance
+    liegt und mit keinem bereits behaltenen |r| ≥ corr_threshold hat.
+
+    Returns:
+        behaltene Features, {verworfenes Feature: Grund}
+    """
+    corr = X[importance.index].astype(float).corr().abs().fillna(0.0)
+    keep: list[str] = []
+    dropped: dict[str, str] = {}
+
+    for feat in importance.sort_values(ascending=False).index:
+        if importance[feat] < min_importance:
+            dropped[feat] = f"importance {importance[feat]:.4f} < {min_importance}"
+            continue
+        twin = next((k for k in keep if corr.loc[feat, k] >= corr_threshold), None)
+        if twin is not None:
+            dropped[feat] = f"redundant zu {twin} (|r|={corr.loc[feat, twin]:.3f})"
+            continue
+        keep.append(feat)
+
+    if not keep:
+        keep = [importance.idxmax()]
+        dropped.pop(keep[0], None)
+    # Reihenfolge wie im Datensatz
+    return [c for c in X.columns if c in keep], dropped
+
+
+# ============================================================
+# Kosten / Nutzen
+# ============================================================
+
+def compare_feature_sets(
+    folds: list[tuple],
+    feature_sets: dict[str, list[str]],
+    n_jobs: int = -1,
+    params: Optional[dict] = None,
+) -> pd.DataFrame:
+    """Pro Set/Modell: mittlere Fit-/Predict-Zeit und MAE über die Folds."""
+    rows = []
+    for set_name, cols in feature_sets.items():
+        for X_train, y_train, X_test, y_test in folds:
+            for model_name, model in build_models(n_jobs=n_jobs, params=params).items():
+                t0 = time.perf_counter()
+                model.fit(X_train[cols], y_train)
+                t1 = time.perf_counter()
+                y_hat = model.predict(X_test[cols])
+                t2 = time.perf_counter()
+                rows.append({
+                    "feature_set": set_name,
+                    "model": model_name,
+                    "n_features": len(cols),
+                    "fit_s": t1 - t0,
+                    "predict_s": t2 - t1,
+                    "mae": float(np.mean(np.abs(y_hat - y_test.to_numpy()))),
+                })
+    return (
+        pd.DataFrame(rows)
+        .groupby(["feature_set", "model"], as_index=False)
+        .agg(n_features=("n_features", "first"), fit_s=("fit_s", "mean"),
+             predict_s=("predict_s", "mean"), mae=("mae", "mean"))
+    )
+
+
+# ============================================================
+# Einstieg
+# ============================================================
+
+def run_feature_pruning(
+    last_day: str,
+    n_folds: int = 6,
+    step_days: int = 7,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    method: str = "permutation",
+    model_name: str = "RF",
+    min_importance: float = MIN_IMPORTANCE,
+    corr_threshold: float = CORR_THRESHOLD,
+    max_mae_increase: float = MAX_MAE_INCREASE,
+    holdout_folds: int = HOLDOUT_FOLDS,
+    save: bool = True,
+    ctx: Optional[DataContext] = None,
+    cache: Optional[FoldCache] = None,
+    spec_path: Path = FEATURE_SPEC_PATH,
+    report_path: Path = REPORT_PATH,
+) -> dict:
+    """
+    Importance über den Rolling-Backtest → reduziertes Feature-Set →
+    Vergleich voll vs. reduziert auf den jüngsten holdout_folds Folds
+    (nicht an der Auswahl beteiligt). Spec wird nur gespeichert, wenn die
+    MAE jedes Modells um höchstens max_mae_increase steigt.
+    """
+    ctx = ctx or DataContext()
+    series = ctx.consumption_1h()
+    origins = rolling_origins(last_day, n_folds, step_days)
+
+    temp_series = None
+    if use_temperature:
+        from src.weather.temperature import build_temperature_series
+
+        temp_series = build_temperature_series(
+            df_gen_raw=ctx.df_gen_raw,
+            train_start=origins[0] - pd.Timedelta(days=train_days),
+            test_end=origins[-1] + pd.Timedelta(days=1) - pd.Timedelta(ctx.freq),
+            era5_loader=ctx.load_era5,
+        )
+
+    folds = build_folds(series, origins, train_days, temp_series, cache=cache, freq=ctx.freq)
+    if not folds:
+        raise ValueError(" Keine gültigen Folds für das Feature-Pruning")
+    if len(folds) <= holdout_folds:
+        raise ValueError(f" {len(folds)} gültige Folds – mindestens {holdout_folds + 1} nötig "
+                         f"({holdout_folds} Holdout + Auswahl)")
+    selection, holdout = folds[:-holdout_folds], folds[-holdout_folds:]
+
+    print(f"Feature-Importance ({method}, {model_name}) über {len(selection)} Folds "
+          f"({len(holdout)} Holdout-Folds für den Vergleich)")
+    params = load_model_params(spec_variant(use_temperature, ctx.freq), ctx.community_id)
+    per_fold = rolling_importance(selection, model_name=model_name, method=method, params=params)
+    importance = per_fold.mean().sort_values(ascending=False)
+
+    full = list(selection[-1][0].columns)
+    keep, dropped = prune(importance, selection[-1][0], min_importance, corr_threshold)
+    print(f" {len(keep)}/{len(full)} Features behalten, {len(dropped)} verworfen")
+
+    comparison = compare_feature_sets(holdout, {"full": full, "pruned": keep}, params=params)
+    # Spec gilt für alle Modelle → das am stärksten verschlechterte zählt
+    mae = comparison.pivot(index="model", columns="feature_set", values="mae")
+    mae_change_by_model = (mae["pruned"] / mae["full"] - 1).to_dict()
+    mae_change = float(max(mae_change_by_model.values()))
+    accepted = mae_change <= max_mae_increase
+
+    variant = spec_variant(use_temperature, ctx.freq)
+    report = {
+        "created": pd.Timestamp.now(tz="UTC").isoformat(),
+        "variant": variant,
+        "last_day": last_day,
+        "n_folds": len(folds),
+        "n_holdout_folds": len(holdout),
+        "method": method,
+        "model": model_name,
+        "min_importance": min_importance,
+        "corr_threshold": corr_threshold,
+        "importance": importance.round(6).to_dict(),
+        "features": keep,
+        "dropped": dropped,
+        "comparison": comparison.to_dict(orient="records"),
+        "mae_change_by_model": mae_change_by_model,
+        "mae_change": mae_change,
+        "accepted": accepted,
+    }
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+
+    print("\n Voll vs. reduziert (Mittel über Holdout-Folds)")
+    for r in comparison.itertuples():
+        print(f"  {r.feature_set:6s} {r.model:3s} {r.n_features:3d} Features  "
+              f"fit {r.fit_s:6.2f}s  predict {r.predict_s * 1e3:7.1f}ms  MAE {r.mae:.3f}")
+    changes = ", ".join(f"{m} {c:+.1%}" for m, c in mae_change_by_model.items())
+    print(f"  MAE-Änderung: {changes} (Grenze {max_mae_increase:+.1%})")
+
+    if not accepted:
+        print(" Reduziertes Set verworfen – Spec unverändert")
+    elif save:
+        save_feature_spec(variant, keep, {
+            "created": report["created"],
+            "method": method,
+            "n_full": len(full),
+            "mae_change": mae_change,
+        }, spec_path)
+        print(f" Feature-Spec gespeichert: {spec_path} ({variant})")
+    print(f" Report: {report_path}")
+
+    return report
@@ -0,0 +1,316 @@
+# src/forecast/global_model.py
+#
+# Globales Modell über alle Zählpunkte: EIN Fit auf dem (Stunde × Zählpunkt)-
+# Panel statt eines RF/XGB pro Zählpunkt.
+#
+# - Features werden vektorisiert auf der breiten Panel-Matrix berechnet
+#   (eine Spalte pro Zählpunkt) und danach in Langform gestapelt.
+# - Day-ahead-sicher: alle Verlaufsfeatures nutzen nur Werte ≥ 24h zurück.
+# - Zielgröße pro Zählpunkt auf dessen Trainingsmittel normiert, damit das
+#   Modell Form statt Niveau lernt; MeteringPointId als Kategorie.
+# - max_train_rows begrenzt die Trainingszeilen (Zufallsstichprobe) →
+#   Trainingszeit wächst sub-linear mit der Zahl der Zählpunkte.
+# - Community-Forecast = Bottom-up-Summe der Zählpunkt-Forecasts. Zählpunkte
+#   ohne vollständige Features bekommen einen Ersatz über ihren Anteil am
+#   Trainingsverbrauch (fallback=True), sonst wäre die Summe zu niedrig.
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+from src.features import history_features_2d, shift_2d
+from src.forecast.community_one_day import load_model_params, make_model
+from src.utils.instrument import span, timed
+from src.weather.temperature import build_temperature_series
+
+PANEL_LAGS = (24, 48, 72, 168, 336)
+PANEL_ROLL_WINDOWS = (24, 168)
+
+# Verlaufsfeatures enden 24h vor dem Zielzeitpunkt
+HORIZON = 24
+
+MAX_TRAIN_ROWS = 400_000
+
+
+# ============================================================
+# Panel
+# ============================================================
+
+def meter_panel(df_raw: pd.DataFrame, value_col: str = "ConsumptionCommunity") -> pd.DataFrame:
+    """Stündliche Summe pro Zählpunkt: Index DateTimeUtc (UTC), Spalten MeteringPointId."""
+    ts = pd.to_datetime(df_raw["DateTimeUtc"], utc=True).dt.floor("h")
+    panel = (
+        df_raw[value_col]
+        .groupby([ts, df_raw["MeteringPointId"]])
+        .sum(min_count=1)
+        .unstack("MeteringPointId")
+        .sort_index()
+    )
+    return panel.asfreq("1h")
+
+
+def panel_features(
+    panel: pd.DataFrame,
+    scale: pd.Series,
+    temp_series: Optional[pd.Series] = None,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Features für alle (Stunde, Zählpunkt) in einem Durchlauf.
+
+    Returns:
+        X (Langform, zeitmajor: Zeile = t * n_meter + m), y (normiert)
+    """
+    idx = panel.index
+    n_t, n_m = panel.shape
+
+    values = (panel / scale).to_numpy(np.float32)
+    feats = history_features_2d(values, PANEL_LAGS, PANEL_ROLL_WINDOWS, HORIZON)
+
+    cols = {name: a.ravel() for name, a in feats.items()}
+
+    # ---------------- KALENDER ------------
+    cols["hour"] = np.repeat(idx.hour.to_numpy(), n_m)
+    cols["weekday"] = np.repeat(idx.weekday.to_numpy(), n_m)
+    cols["month"] = np.repeat(idx.month.to_numpy(), n_m)
+    cols["is_weekend"] = np.repeat((idx.weekday >= 5).astype(int), n_m)
+
+    # ---------------- TEMPERATUR ----------
+    if temp_series is not None:
+        t = temp_series.reindex(idx).to_numpy(np.float32)
+        cols["temp"] = np.repeat(t, n_m)
+        cols["temp_lag_24"] = np.repeat(shift_2d(t, 24), n_m)
+
+    # ---------------- ZÄHLPUNKT -----------
+    cols["meter"] = pd.Categorical(np.tile(panel.columns.to_numpy(), n_t), categories=panel.columns)
+    cols["meter_scale"] = np.tile(scale.to_numpy(np.float32), n_t)
+
+    X = pd.DataFrame(cols)
+    y = values.ravel()
+    return X, y
+
+
+def _model_input(X: pd.DataFrame, name: str) -> pd.DataFrame:
+    # RF kennt keine Kategorien → Codes als ordinales Merkmal
+    if name == "RF":
+        X = X.copy()
+        X["meter"] = X["meter"].cat.codes
+    return X
+
+
+def make_global_model(name: str, params: dict, n_jobs: int = -1):
+    model = make_model(name, params, n_jobs)
+    if name == "XGB":
+        model.set_params(tree_method="hist", enable_categorical=True)
+    return model
+
+
+# ============================================================
+# Forecast
+# ============================================================
+
+def fit_predict_global(
+    panel: pd.DataFrame,
+    train_start: pd.Timestamp,
+    forecast_start: pd.Timestamp,
+    forecast_end: pd.Timestamp,
+    temp_series: Optional[pd.Series] = None,
+    models: Iterable[str] = ("XGB",),
+    max_train_rows: int = MAX_TRAIN_ROWS,
+    n_jobs: int = -1,
+    seed: int = 42,
+    params: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Ein Modell pro Typ über alle Zählpunkte.
+    params: Modell-Parameter (Default: load_model_params()).
+
+    Returns:
+        DateTimeUtc | MeteringPointId | forecast_consumption | model
+        (None, wenn keine Test-Features)
+    """
+    hist_start = train_start - pd.Timedelta(hours=max(PANEL_LAGS) + HORIZON)
+    panel = panel.loc[hist_start:forecast_end]
+    panel = panel.reindex(pd.date_range(hist_start, forecast_end, freq="1h"))
+
+    # Normierung nur aus dem Trainingsfenster (kein Leakage)
+    scale = panel.loc[train_start:forecast_start - pd.Timedelta(hours=1)].mean()
+    scale = scale.where(scale > 0, 1.0).fillna(1.0)
+
+    with span("global.features", rows=panel.size, meters=panel.shape[1]):
+        X, y = panel_features(panel, scale, temp_series)
+
+    # int64-ns statt Timestamp-Objekten → Masken bleiben reine Array-Vergleiche
+    ts = np.repeat(panel.index.asi8, panel.shape[1])
+    feat_ok = X.drop(columns="meter").notna().all(axis=1).to_numpy()
+
+    train_mask = (ts >= train_start.value) & (ts < forecast_start.value) & feat_ok & ~np.isnan(y)
+    test_mask = (ts >= forecast_start.value) & (ts <= forecast_end.value) & feat_ok
+
+    train_rows = np.flatnonzero(train_mask)
+    if len(train_rows) > max_train_rows:
+        rng = np.random.default_rng(seed)
+        train_rows = np.sort(rng.choice(train_rows, max_train_rows, replace=False))
+    test_rows = np.flatnonzero(test_mask)
+
+    if len(test_rows) == 0:
+        print(" Keine validen Feature-Zeilen für Forecast-Zeitraum.")
+        return None
+    if len(train_rows) < 100:
+        raise ValueError(" Zu wenig Trainingsdaten für globales Modell")
+
+    X_train, y_train = X.iloc[train_rows], y[train_rows]
+    X_test = X.iloc[test_rows]
+    meter_scale = X_test["meter_scale"].to_numpy()
+
+    params = params or load_model_params()
+    forecasts = []
+
+    for name in models:
+        model = make_global_model(name, params[name], n_jobs)
+        with span(f"global.fit_{name}", rows=len(X_train), n_features=X_train.shape[1]):
+            model.fit(_model_input(X_train, name), y_train)
+        with span(f"global.predict_{name}", rows=len(X_test)):
+            y_hat = model.predict(_model_input(X_test, name)) * meter_scale
+
+        forecasts.append(pd.DataFrame({
+            "DateTimeUtc": ts[test_rows],
+            "MeteringPointId": X_test["meter"].to_numpy(),
+            "forecast_consumption": y_hat,
+            "model": name,
+        }))
+
+    out = pd.concat(forecasts, ignore_index=True)
+    out["DateTimeUtc"] = pd.to_datetime(out["DateTimeUtc"], utc=True)
+    return out
+
+
+def meter_shares(panel: pd.DataFrame, train_start: pd.Timestamp, forecast_start: pd.Timestamp) -> pd.Series:
+    """Mittlerer Verbrauch pro Zählpunkt im Trainingsfenster (nur aktive Zählpunkte)."""
+    share = panel.loc[train_start:forecast_start - pd.Timedelta(hours=1)].mean()
+    return share[share > 0]
+
+
+def fill_missing_meters(meter_fc: pd.DataFrame, shares: pd.Series) -> pd.DataFrame:
+    """
+    Ersatz-Forecast für (Modell, Stunde, Zählpunkt) ohne Modell-Forecast:
+    fc_m = Σ fc_vorhanden · share_m / Σ share_vorhanden. Ersatzzeilen mit
+    fallback=True.
+    """
+    meter_fc = meter_fc.assign(fallback=False)
+    wide = (
+        meter_fc.pivot_table(index=["model", "DateTimeUtc"], columns="MeteringPointId",
+                             values="forecast_consumption", aggfunc="sum", observed=True)
+        .reindex(columns=shares.index)
+    )
+    present = wide.notna().to_numpy()
+    s = shares.to_numpy(float)
+    if present.all():
+        return meter_fc
+
+    # Forecast pro Einheit Trainingsverbrauch, aus den vorhandenen Zählpunkten
+    per_share = wide.sum(axis=1, min_count=1).to_numpy() / (present * s).sum(axis=1)
+    fill = pd.DataFrame(np.outer(per_share, s), index=wide.index, columns=wide.columns).where(~present)
+
+    rows = fill.stack().rename("forecast_consumption").reset_index()
+    rows["fallback"] = True
+    return pd.concat([meter_fc, rows], ignore_index=True)
+
+
+def reconcile_bottom_up(meter_fc: pd.DataFrame) -> pd.DataFrame:
+    """Community-Forecast als Summe der Zählpunkt-Forecasts (pro Modell/Stunde)."""
+    if "fallback" not in meter_fc:
+        meter_fc = meter_fc.assign(fallback=False)
+    return (
+        meter_fc.assign(fallback_kwh=meter_fc["forecast_consumption"].where(meter_fc["fallback"], 0.0))
+        .groupby(["model", "DateTimeUtc"], as_index=False)
+        .agg(forecast_consumption=("forecast_consumption", "sum"),
+             n_meters=("MeteringPointId", "nunique"),
+             n_fallback=("fallback", "sum"),
+             fallback_kwh=("fallback_kwh", "sum"))
+        .sort_values(["DateTimeUtc", "model"])
+        .reset_index(drop=True)
+    )
+
+
+@timed("run_global_forecast")
+def run_global_forecast(
+    forecast_date: Optional[str] = None,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    models: Iterable[str] = ("XGB",),
+    max_train_rows: int = MAX_TRAIN_ROWS,
+    ctx: Optional[DataContext] = None,
+) -> Optional[tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Zählpunkt-Forecasts mit globalem Modell + Bottom-up-Community-Forecast.
+
+    Speichert:
+    - Zählpunkte  → METER_FORECAST_DATASET_DIR
+    - Community   → Forecast-Dataset, variant="global_no_temp"/"global_with_temp"
+    """
+    from src.forecast.store import write_forecast, write_meter_forecast
+
+    ctx = ctx or DataContext()
+
+    if forecast_date is None:
+        forecast_start = pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)
+    else:
+        forecast_start = pd.Timestamp(forecast_date, tz="UTC")
+    forecast_end = forecast_start + pd.Timedelta(hours=23)
+    train_start = forecast_start - pd.Timedelta(days=train_days)
+
+    with span("global.panel"):
+        panel = meter_panel(ctx.df_con_raw)
+    print(f"Global forecast {forecast_start.date()}: {panel.shape[1]} Zählpunkte")
+
+    temp_series = None
+    if use_temperature:
+        temp_series = build_temperature_series(
+            df_gen_raw=ctx.df_gen_raw,
+            train_start=train_start,
+            test_end=forecast_end,
+            era5_loader=ctx.load_era5,
+        )
+
+    meter_fc = fit_predict_global(
+        panel,
+        train_start=train_start,
+        forecast_start=forecast_start,
+        forecast_end=forecast_end,
+        temp_series=temp_series,
+        models=models,
+        max_train_rows=max_train_rows,
+        params=load_model_params("with_temp" if use_temperature else "no_temp", ctx.community_id),
+    )
+    if meter_fc is None:
+        return None
+
+    meter_fc = fill_missing_meters(meter_fc, meter_shares(panel, train_start, forecast_start))
+    day = forecast_start.date().isoformat()
+    meter_fc["use_temperature"] = use_temperature
+    meter_fc["forecast_day"] = day
+
+    community_fc = reconcile_bottom_up(meter_fc)
+    community_fc["use_temperature"] = use_temperature
+    community_fc["forecast_day"] = day
+
+    n_fallback = int(community_fc["n_fallback"].max())
+    if n_fallback:
+        gap = community_fc["fallback_kwh"].sum() / community_fc["forecast_consumption"].sum()
+        print(f" ⚠️ bis zu {n_fallback} Zählpunkte ohne vollständige Features – "
+              f"Ersatz über Verbrauchsanteil ({gap:.1%} der Summe)")
+
+    suffix = "with_temp" if use_temperature else "no_temp"
+    write_meter_forecast(meter_fc, variant=f"global_{suffix}", community_id=ctx.community_id)
+    write_forecast(
+        community_fc.drop(columns=["n_meters", "n_fallback", "fallback_kwh"]),
+        variant=f"global_{suffix}",
+        community_id=ctx.community_id,
+    )
+    print(f" Forecast gespeichert ({day}, global_{suffix})")
+
+    return meter_fc, community_fc
@@ -0,0 +1,183 @@
+# src/forecast/multi_community.py
+#
+# Nächtlicher Lauf über viele Communities:
+#
+# - SQL: Rohdaten für batch_size Communities mit EINER Abfrage pro Tabelle
+#   (read_raw_multi), nur ab dem frühesten benötigten Zeitpunkt (Lag-Historie,
+#   PLZ-Lookback, Evaluationsfenster), danach Aufbereitung pro Community im
+#   Parent.
+# - ERA5 und Spotpreise: alle Community-Kontexte teilen denselben Cache
+#   (DataContext.fork) – jede PLZ-CSV / jeder Preistag wird einmal geladen.
+# - Training: pro Community ein Task im Prozess-Pool; der Parent bereitet
+#   währenddessen den nächsten Batch auf und schreibt fertige Ergebnisse
+#   zwischen den Batches weg (höchstens MAX_PENDING_FACTOR × max_workers
+#   Tasks gleichzeitig in der Warteschlange).
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from src.context import DataContext
+from src.forecast.community_one_day import fit_predict_day
+from src.utils.instrument import span, timed
+
+# Historie vor train_start, die build_dataset_leakage_free braucht (336h + Reserve)
+HISTORY_DAYS = 15
+
+# Generation vor train_start für die PLZ-Gewichte (get_active_plz)
+PLZ_LOOKBACK_DAYS = 42
+
+# Rückstau im Pool: darüber wartet der Parent, bevor er den nächsten Batch zieht
+MAX_PENDING_FACTOR = 2
+
+
+def _community_task(
+    community_id: int,
+    consumption_1h: pd.Series,
+    temp_series: Optional[pd.Series],
+    train_start: pd.Timestamp,
+    forecast_start: pd.Timestamp,
+    forecast_end: pd.Timestamp,
+    freq: str = "1h",
+) -> tuple[int, Optional[pd.DataFrame]]:
+    # n_jobs=1: Parallelität kommt vom Pool, nicht von RF/XGB
+    result = fit_predict_day(
+        consumption_1h=consumption_1h,
+        temp_series=temp_series,
+        train_start=train_start,
+        forecast_start=forecast_start,
+        forecast_end=forecast_end,
+        use_temperature=temp_series is not None,
+        n_jobs=1,
+        freq=freq,
+        community_id=community_id,
+    )
+    return community_id, result
+
+
+def _batches(items: list[int], size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+@timed("run_multi_community")
+def run_multi_community(
+    community_ids: Iterable[int],
+    forecast_date: Optional[str] = None,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    max_workers: Optional[int] = None,
+    batch_size: int = 10,
+    evaluate_days: int = 0,
+    ctx: Optional[DataContext] = None,
+) -> dict[int, Optional[pd.DataFrame]]:
+    """
+    24h-Forecast für alle community_ids; Ergebnisse landen wie beim
+    Einzel-Forecast im Forecast-Dataset (Partition community=<ID>).
+
+    evaluate_days > 0: danach evaluate_range über die letzten n Tage vor
+    forecast_date pro Community (Spotpreise nur einmal geladen).
+    """
+    from src.db import get_engine
+    from src.extract import read_raw_multi
+    from src.forecast.store import resolution_variant, write_forecast
+    from src.weather.temperature import build_temperature_series
+
+    base = ctx or DataContext()
+    community_ids = [int(c) for c in community_ids]
+    max_workers = max_workers or os.cpu_count()
+
+    if forecast_date is None:
+        forecast_start = pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)
+    else:
+        forecast_start = pd.Timestamp(forecast_date, tz="UTC")
+    forecast_end = forecast_start + pd.Timedelta(days=1) - pd.Timedelta(base.freq)
+    train_start = forecast_start - pd.Timedelta(days=train_days)
+    hist_start = train_start - pd.Timedelta(days=HISTORY_DAYS)
+
+    # frühester Zeitpunkt, den irgendein Schritt liest → SQL erst ab dort
+    since = hist_start
+    if use_temperature:
+        since = min(since, train_start - pd.Timedelta(days=PLZ_LOOKBACK_DAYS))
+    if evaluate_days > 0:
+        since = min(since, forecast_start - pd.Timedelta(days=evaluate_days))
+
+    suffix = resolution_variant("with_temp" if use_temperature else "no_temp", base.freq)
+    print(f"Multi-community forecast {forecast_start.date()}: {len(community_ids)} Communities ({suffix})")
+
+    engine = get_engine()
+    contexts: dict[int, DataContext] = {}
+    results: dict[int, Optional[pd.DataFrame]] = {}
+
+    def collect(pending: set, block: bool) -> set:
+        """Fertige Tasks wegschreiben; block: auf mindestens einen warten."""
+        done, pending = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for fut in done:
+            cid, result = fut.result()
+            results[cid] = result
+            if result is None:
+                print(f"  ⏭️ Community {cid}: keine Test-Features")
+                continue
+            write_forecast(result, variant=suffix, community_id=cid)
+            print(f" Community {cid}: Forecast gespeichert")
+        return pending
+
+    with ProcessPoolExecutor(max_workers=max_workers) as ex:
+        pending: set = set()
+
+        for batch in _batches(community_ids, batch_size):
+            # Rückstau begrenzen: Eingaben fertiger Tasks werden freigegeben
+            pending = collect(pending, block=False)
+            while len(pending) > MAX_PENDING_FACTOR * max_workers:
+                pending = collect(pending, block=True)
+
+            with span("multi_community.sql", communities=len(batch)):
+                raw_by_id = read_raw_multi(engine, batch, since=since)
+
+            for cid in batch:
+                c = base.fork(cid, raw=raw_by_id.pop(cid))
+                if c.df_con_raw.empty:
+                    print(f"  ⏭️ Community {cid}: keine Consumption-Daten")
+                    results[cid] = None
+                    continue
+
+                with span("multi_community.prep", community=cid):
+                    consumption_1h = c.consumption_1h().loc[hist_start:forecast_end]
+
+                temp_series = None
+                if use_temperature:
+                    temp_series = build_temperature_series(
+                        df_gen_raw=c.df_gen_raw,
+                        train_start=train_start,
+                        test_end=forecast_end,
+                        lookback_days=PLZ_LOOKBACK_DAYS,
+                        era5_loader=c.load_era5,
+                    )
+
+                c.release_raw()
+                if evaluate_days > 0:
+                    contexts[cid] = c
+                pending.add(ex.submit(
+                    _community_task, cid, consumption_1h, temp_series,
+                    train_start, forecast_start, forecast_end, base.freq,
+                ))
+
+        while pending:
+            pending = collect(pending, block=True)
+
+    if evaluate_days > 0:
+        from src.evaluation.cost_engine import evaluate_range
+
+        end = (forecast_start - pd.Timedelta(days=1)).date().isoformat()
+        start = (forecast_start - pd.Timedelta(days=evaluate_days)).date().isoformat()
+        for cid, c in contexts.items():
+            summary = evaluate_range(start, end, ctx=c)
+            if not summary.empty:
+                print(f"\n Community {cid}:")
+                print(summary.round(2))
+
+    return dict(sorted(results.items()))
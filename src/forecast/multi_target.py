@@ -0,0 +1,246 @@
+# src/forecast/multi_target.py
+#
+# Day-ahead-Forecast für Consumption UND jede Erzeugungsquelle in einem Lauf:
+#
+#   consumption, pv_sued, pv_ostwest, water, wind, biomass (+ net_position)
+#
+# - Kalender- und Temperaturfeatures werden einmal gebaut und geteilt.
+# - Lags/Rollings aller Targets in EINEM vektorisierten Durchlauf
+#   (history_features_2d auf der Matrix Zeit × Target).
+# - Training der (Target × Modell)-Paare parallel im Thread-Pool
+#   (RF/XGB geben beim Fitten den GIL frei).
+# - net_position = Σ Erzeugung − Consumption (positiv = Überschuss), nur für
+#   Stunden, in denen ALLE Targets einen Forecast haben – sonst NaN.
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+from src.features import history_features_2d, shift_2d
+from src.forecast.community_one_day import load_model_params, make_model
+from src.utils.instrument import span, timed
+from src.weather.temperature import build_temperature_series
+
+CONSUMPTION_TARGET = "consumption"
+
+# Historie vor train_start für die längsten Lags
+HISTORY_HOURS = 336
+
+
+# ============================================================
+# Targets + Features
+# ============================================================
+
+def target_frame(prep: dict) -> pd.DataFrame:
+    """Stündliche Community-Werte: eine Spalte pro Target (UTC-Index, nur freq='1h')."""
+    cols = {CONSUMPTION_TARGET: prep["consumption_1h"]["ConsumptionCommunity"]}
+    for name, df in prep["generation_1h_by_source"].items():
+        cols[name] = df["GenerationCommunity"]
+    return pd.DataFrame(cols).sort_index().asfreq("1h")
+
+
+def shared_features(idx: pd.DatetimeIndex, temp_series: Optional[pd.Series] = None) -> dict:
+    """Kalender (+ Temperatur) – für alle Targets gleich."""
+    feats = {
+        "hour": idx.hour.to_numpy(),
+        "weekday": idx.weekday.to_numpy(),
+        "month": idx.month.to_numpy(),
+        "is_weekend": (idx.weekday >= 5).astype(int),
+    }
+    if temp_series is not None:
+        t = temp_series.reindex(idx).to_numpy(float)
+        feats["temp"] = t
+        feats["temp_lag_24"] = shift_2d(t, 24)
+    return feats
+
+
+def multi_target_features(
+    targets: pd.DataFrame,
+    temp_series: Optional[pd.Series] = None,
+) -> dict[str, pd.DataFrame]:
+    """Feature-Tabelle pro Target; Verlaufsfeatures aller Targets in einem Pass."""
+    history = history_features_2d(targets.to_numpy(float))
+    shared = shared_features(targets.index, temp_series)
+
+    out = {}
+    for j, name in enumerate(targets.columns):
+        cols = {f: a[:, j] for f, a in history.items()}
+        cols.update(shared)
+        out[name] = pd.DataFrame(cols, index=targets.index)
+    return out
+
+
+# ============================================================
+# Forecast
+# ============================================================
+
+def _fit_predict(model, X_train, y_train, X_test, label: str) -> np.ndarray:
+    with span(f"multi.fit_{label}", rows=len(X_train)):
+        model.fit(X_train, y_train)
+    return model.predict(X_test)
+
+
+def fit_predict_multi(
+    targets: pd.DataFrame,
+    train_start: pd.Timestamp,
+    forecast_start: pd.Timestamp,
+    forecast_end: pd.Timestamp,
+    temp_series: Optional[pd.Series] = None,
+    models: Iterable[str] = ("RF", "XGB"),
+    max_workers: Optional[int] = None,
+    params: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    params: Modell-Parameter (Default: load_model_params() der Variante no_temp).
+
+    Returns:
+        DateTimeUtc | target | model | forecast_kwh   (None ohne Test-Features)
+    """
+    with span("multi.features", rows=targets.size, targets=targets.shape[1]):
+        feats = multi_target_features(targets, temp_series)
+
+    idx = targets.index
+    train_idx = (idx >= train_start) & (idx < forecast_start)
+    test_idx = (idx >= forecast_start) & (idx <= forecast_end)
+
+    params = params or load_model_params()
+    jobs = []
+    for name, X in feats.items():
+        y = targets[name]
+        ok = X.notna().all(axis=1)
+        tr = train_idx & ok & y.notna()
+        te = test_idx & ok
+        if te.sum() == 0 or tr.sum() < 100:
+            print(f" ⚠️ {name}: zu wenig Daten – übersprungen")
+            continue
+        for model_name in models:
+            jobs.append((name, model_name, X[tr], y[tr], X[te]))
+
+    if not jobs:
+        print(" Keine validen Feature-Zeilen für Forecast-Zeitraum.")
+        return None
+
+    # Parallel über (Target × Modell); jedes Modell single-threaded
+    max_workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _fit_predict,
+                make_model(model_name, params[model_name], n_jobs=1),
+                X_train, y_train, X_test, f"{name}_{model_name}",
+            )
+            for name, model_name, X_train, y_train, X_test in jobs
+        ]
+        preds = [f.result() for f in futures]
+
+    out = pd.concat(
+        [
+            pd.DataFrame({
+                "DateTimeUtc": X_test.index,
+                "target": name,
+                "model": model_name,
+                "forecast_kwh": y_hat,
+            })
+            for (name, model_name, _, _, X_test), y_hat in zip(jobs, preds)
+        ],
+        ignore_index=True,
+    )
+    return pd.concat([out, net_position(out, expected=targets.columns)], ignore_index=True)
+
+
+def net_position(forecasts: pd.DataFrame, expected: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Σ Erzeugung − Consumption pro Modell und Stunde.
+    expected: alle Targets, die in die Bilanz gehören (Default: die
+    vorhandenen). Fehlt eines (z.B. übersprungen), ist net_position NaN –
+    eine fehlende Erzeugung ist nicht null Erzeugung.
+    """
+    wide = forecasts.pivot_table(
+        index=["model", "DateTimeUtc"], columns="target", values="forecast_kwh"
+    )
+    expected = list(wide.columns if expected is None else expected)
+    if CONSUMPTION_TARGET not in expected:
+        return forecasts.iloc[0:0]
+    wide = wide.reindex(columns=expected)
+
+    missing = [t for t in expected if wide[t].isna().any()]
+    if missing:
+        print(f" ⚠️ net_position unvollständig – ohne Forecast: {', '.join(missing)} (dort NaN)")
+
+    complete = wide.notna().all(axis=1)
+    gen = wide.drop(columns=CONSUMPTION_TARGET).sum(axis=1)
+    net = (gen - wide[CONSUMPTION_TARGET]).where(complete).rename("forecast_kwh").reset_index()
+    net["target"] = "net_position"
+    return net[["DateTimeUtc", "target", "model", "forecast_kwh"]]
+
+
+@timed("run_multi_target_forecast")
+def run_multi_target_forecast(
+    forecast_date: Optional[str] = None,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    models: Iterable[str] = ("RF", "XGB"),
+    max_workers: Optional[int] = None,
+    ctx: Optional[DataContext] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    24h-Forecast aller Targets; gespeichert in TARGET_FORECAST_DATASET_DIR.
+    Nur stündlich: Lags/Rollings (history_features_2d) zählen in Stunden.
+    """
+    from src.forecast.store import write_target_forecast
+
+    ctx = ctx or DataContext()
+    if ctx.freq != "1h":
+        raise ValueError(f"Multi-Target-Forecast unterstützt nur freq='1h' (nicht {ctx.freq!r})")
+
+    if forecast_date is None:
+        forecast_start = pd.Timestamp.today(tz="UTC").floor("D") + pd.Timedelta(days=1)
+    else:
+        forecast_start = pd.Timestamp(forecast_date, tz="UTC")
+    forecast_end = forecast_start + pd.Timedelta(hours=23)
+    train_start = forecast_start - pd.Timedelta(days=train_days)
+
+    suffix = "with_temp" if use_temperature else "no_temp"
+    targets = target_frame(ctx.prep())
+    print(f"Multi-target forecast {forecast_start.date()}: {', '.join(targets.columns)}")
+
+    temp_series = None
+    if use_temperature:
+        temp_series = build_temperature_series(
+            df_gen_raw=ctx.df_gen_raw,
+            train_start=train_start,
+            test_end=forecast_end,
+            era5_loader=ctx.load_era5,
+        )
+
+    # Historie für die längsten Lags mitnehmen, Rest abschneiden
+    hist_start = train_start - pd.Timedelta(hours=HISTORY_HOURS)
+    targets = targets.loc[hist_start:forecast_end]
+    targets = targets.reindex(pd.date_range(hist_start, forecast_end, freq="1h"))
+
+    result = fit_predict_multi(
+        targets,
+        train_start=train_start,
+        forecast_start=forecast_start,
+        forecast_end=forecast_end,
+        temp_series=temp_series,
+        models=models,
+        max_workers=max_workers,
+        params=load_model_params(suffix, ctx.community_id),
+    )
+    if result is None:
+        return None
+
+    result["use_temperature"] = use_temperature
+    result["forecast_day"] = forecast_start.date().isoformat()
+
+    write_target_forecast(result, variant=suffix, community_id=ctx.community_id)
+    print(f" Forecast gespeichert ({forecast_start.date()}, {suffix}, {result['target'].nunique()} Targets)")
+
+    return result
@@ -0,0 +1,292 @@
+# src/forecast/online.py
+#
+# Online-Modelle neben RF/XGB: kein tägliches Neutraining, sondern ein
+# persistenter Zustand, der nur mit den neuesten Stunden fortgeschrieben wird.
+#
+# - RLS  : Recursive Least Squares mit Vergessensfaktor = exponentiell
+#          gewichtete Ridge-Regression auf den bestehenden Features.
+#          Kaltstart: Ridge in geschlossener Form auf dem Trainingsfenster,
+#          danach pro neuer Stunde ein Rang-1-Update (O(d²), d ≈ 40 →
+#          ein Tag in ~1 ms).
+# - SNAIVE: saisonal-naiv, Mittel der letzten n Wochen zur selben Zeit.
+#
+# Beide haben fit/predict wie sklearn und laufen in fit_predict_day in
+# derselben Schleife wie RF/XGB (gleiches Forecast-Dataset, gleiche
+# Kostenauswertung). fit() = Zustand bis zum Ende von X/y fortschreiben
+# (Watermark last_ts), älterer Zustand als die Daten → Kaltstart.
+#
+# Zustand: data/models/online[_c<ID>]/<Variante>/<Modell>.npz
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import community_path
+
+ONLINE_STATE_DIR = Path("data/models/online")
+
+FORGET = 0.999       # pro Stunde → effektives Gedächtnis ~1000 h (≈ 6 Wochen)
+RIDGE_ALPHA = 1.0
+SEASON = "168h"
+N_SEASONS = 2
+
+STATE_VERSION = 1
+
+
+# ============================================================
+# Zustand speichern / laden
+# ============================================================
+
+def _save_state(path: Path, meta: dict, arrays: dict) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"state_version": STATE_VERSION, **meta}
+    with open(path, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta, default=str)), **arrays)
+    return path
+
+
+def _load_state(path: Path) -> tuple[dict, dict]:
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        arrays = {k: z[k] for k in z.files if k != "meta"}
+    if meta.get("state_version") != STATE_VERSION:
+        raise ValueError(f"Unbekannte Zustands-Version in {path}: {meta.get('state_version')}")
+    return meta, arrays
+
+
+def _state_ts(path: Path) -> Optional[pd.Timestamp]:
+    if not path.exists():
+        return None
+    meta, _ = _load_state(path)
+    return pd.Timestamp(meta["last_ts"]) if meta.get("last_ts") else None
+
+
+# ============================================================
+# Recursive Least Squares
+# ============================================================
+
+class RecursiveLeastSquares:
+    """
+    Exponentiell gewichtete Ridge-Regression, rekursiv aktualisiert.
+
+    Zustand: Gewichte w (inkl. Achsenabschnitt), inverse Informations-
+    matrix P, Standardisierung (aus dem Kaltstart, danach fix), last_ts.
+    """
+
+    name = "RLS"
+
+    def __init__(self, forget: float = FORGET, alpha: float = RIDGE_ALPHA):
+        self.forget = forget
+        self.alpha = alpha
+        self.feature_names: Optional[list[str]] = None
+        self.w = self.P = self.mean = self.scale = None
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.n_updates = 0
+        self.update_seconds_ = 0.0
+        self.cold_start_ = False
+
+    # --------------------------------------------------
+    # Design-Matrix
+    # --------------------------------------------------
+    def _design(self, X: pd.DataFrame) -> np.ndarray:
+        Z = (X[self.feature_names].to_numpy(float) - self.mean) / self.scale
+        return np.hstack([Z, np.ones((len(Z), 1))])
+
+    def _cold_start(self, X: pd.DataFrame, y: pd.Series) -> None:
+        self.feature_names = list(X.columns)
+        values = X.to_numpy(float)
+        self.mean = values.mean(axis=0)
+        self.scale = values.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+
+        A = self._design(X)
+        n, d = A.shape
+        # jüngste Zeile Gewicht 1, ältere forget^Alter – wie das rekursive Update
+        weights = self.forget ** np.arange(n - 1, -1, -1)
+        reg = self.alpha * self.forget ** n * np.eye(d)
+        reg[-1, -1] = 1e-8   # Achsenabschnitt nicht bestrafen
+
+        info = (A * weights[:, None]).T @ A + reg
+        self.P = np.linalg.inv(info)
+        self.w = self.P @ ((A * weights[:, None]).T @ y.to_numpy(float))
+        self.n_updates = n
+        self.cold_start_ = True
+
+    def _update(self, A: np.ndarray, y: np.ndarray) -> None:
+        lam = self.forget
+        w, P = self.w, self.P
+        for x, target in zip(A, y):
+            Px = P @ x
+            k = Px / (lam + x @ Px)
+            w = w + k * (target - x @ w)
+            P = (P - np.outer(k, Px)) / lam
+        # Symmetrie erhalten (numerische Drift über viele Updates)
+        self.w, self.P = w, (P + P.T) / 2
+        self.n_updates += len(y)
+
+    # --------------------------------------------------
+    # sklearn-Schnittstelle
+    # --------------------------------------------------
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "RecursiveLeastSquares":
+        """Nur Zeilen nach last_ts; ohne passenden Zustand Kaltstart auf X/y."""
+        t0 = time.perf_counter()
+        self.cold_start_ = False
+
+        stale = (
+            self.w is None
+            or list(X.columns) != self.feature_names
+            or (self.last_ts is not None and self.last_ts > X.index[-1])
+        )
+        if stale:
+            self._cold_start(X, y)
+        else:
+            new = X.index > self.last_ts
+            if new.any():
+                self._update(self._design(X[new]), y[new].to_numpy(float))
+
+        self.last_ts = X.index[-1]
+        self.update_seconds_ = time.perf_counter() - t0
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        return self._design(X) @ self.w
+
+    # --------------------------------------------------
+    # Persistenz
+    # --------------------------------------------------
+    def save(self, path: Path) -> Path:
+        return _save_state(path, {
+            "model": self.name,
+            "forget": self.forget,
+            "alpha": self.alpha,
+            "feature_names": self.feature_names,
+            "last_ts": self.last_ts.isoformat() if self.last_ts is not None else None,
+            "n_updates": self.n_updates,
+        }, {"w": self.w, "P": self.P, "mean": self.mean, "scale": self.scale})
+
+    @classmethod
+    def load(cls, path: Path) -> "RecursiveLeastSquares":
+        meta, arrays = _load_state(path)
+        model = cls(forget=meta["forget"], alpha=meta["alpha"])
+        model.feature_names = meta["feature_names"]
+        model.w, model.P = arrays["w"], arrays["P"]
+        model.mean, model.scale = arrays["mean"], arrays["scale"]
+        model.last_ts = pd.Timestamp(meta["last_ts"]) if meta["last_ts"] else None
+        model.n_updates = meta["n_updates"]
+        return model
+
+
+# ============================================================
+# Saisonal-naiv
+# ============================================================
+
+class SeasonalNaive:
+    """Mittel der letzten n_seasons Werte im Abstand season (Default: 2 Wochen)."""
+
+    name = "SNAIVE"
+
+    def __init__(self, season: str = SEASON, n_seasons: int = N_SEASONS):
+        self.season = season
+        self.n_seasons = n_seasons
+        self.history: Optional[pd.Series] = None
+        self.last_ts: Optional[pd.Timestamp] = None
+        self.update_seconds_ = 0.0
+        self.cold_start_ = False
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "SeasonalNaive":
+        t0 = time.perf_counter()
+        self.cold_start_ = (
+            self.history is None
+            or (self.last_ts is not None and self.last_ts > y.index[-1])
+        )
+        if self.cold_start_:
+            history = y
+        else:
+            history = pd.concat([self.history, y[y.index > self.last_ts]])
+
+        keep_from = y.index[-1] - self.n_seasons * pd.Timedelta(self.season)
+        self.history = history[history.index > keep_from].astype(float)
+        self.last_ts = y.index[-1]
+        self.update_seconds_ = time.perf_counter() - t0
+        return self
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        idx = X.index
+        season = pd.Timedelta(self.season)
+        lagged = np.column_stack([
+            self.history.reindex(idx - k * season).to_numpy(float)
+            for k in range(1, self.n_seasons + 1)
+        ])
+        with np.errstate(invalid="ignore"):
+            y_hat = np.nanmean(lagged, axis=1)
+        # Lücke in der Historie → lag_168-Feature, sonst NaN
+        if np.isnan(y_hat).any() and "lag_168" in X.columns:
+            y_hat = np.where(np.isnan(y_hat), X["lag_168"].to_numpy(float), y_hat)
+        return y_hat
+
+    def save(self, path: Path) -> Path:
+        return _save_state(path, {
+            "model": self.name,
+            "season": self.season,
+            "n_seasons": self.n_seasons,
+            "last_ts": self.last_ts.isoformat() if self.last_ts is not None else None,
+        }, {
+            "ts": self.history.index.asi8,
+            "values": self.history.to_numpy(float),
+        })
+
+    @classmethod
+    def load(cls, path: Path) -> "SeasonalNaive":
+        meta, arrays = _load_state(path)
+        model = cls(season=meta["season"], n_seasons=meta["n_seasons"])
+        model.history = pd.Series(arrays["values"], index=pd.to_datetime(arrays["ts"], utc=True))
+        model.last_ts = pd.Timestamp(meta["last_ts"]) if meta["last_ts"] else None
+        return model
+
+
+# ============================================================
+# Modellfamilie
+# ============================================================
+
+ONLINE_MODELS = {
+    RecursiveLeastSquares.name: RecursiveLeastSquares,
+    SeasonalNaive.name: SeasonalNaive,
+}
+
+
+def online_state_dir(variant: str, community_id: int, root: Path = ONLINE_STATE_DIR) -> Path:
+    return community_path(root, community_id) / variant
+
+
+def build_online_models(state_dir: Optional[Path] = None) -> dict:
+    """RLS + SNAIVE, Zustand aus state_dir (falls vorhanden, sonst Kaltstart)."""
+    models = {}
+    for name, cls in ONLINE_MODELS.items():
+        path = state_dir / f"{name}.npz" if state_dir is not None else None
+        models[name] = cls.load(path) if path is not None and path.exists() else cls()
+    return models
+
+
+def save_online_models(models: dict, state_dir: Path) -> list[str]:
+    """
+    Speichert die Zustände der Online-Modelle in models. Ein gespeicherter
+    Zustand, der weiter reicht (z.B. Simulation eines älteren Tages),
+    wird nicht überschrieben.
+    """
+    saved = []
+    for name, model in models.items():
+        if name not in ONLINE_MODELS or model.last_ts is None:
+            continue
+        path = state_dir / f"{name}.npz"
+        stored = _state_ts(path)
+        if stored is not None and stored > model.last_ts:
+            continue
+        model.save(path)
+        saved.append(name)
+    return saved
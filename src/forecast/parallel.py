@@ -0,0 +1,185 @@
+# src/forecast/parallel.py
+#
+# Forecasts für viele Tage parallel im Prozess-Pool.
+# Der Parent lädt/aufbereitet die Daten EINMAL und legt Stundenreihe und
+# ERA5-Temperaturmatrix in Shared Memory (src/utils/shared_data.py);
+# Worker bekommen nur Metadaten + Tagesparameter und arbeiten zero-copy.
+#
+# xgb_hist (ohne Temperatur): XGB läuft nicht pro Tag im Worker, sondern im
+# Parent als Walk-Forward auf EINER Feature-Tabelle + Quantil-Referenz
+# (src/forecast/xgb_hist.py) – Early Stopping nur im ersten Fenster, danach
+# ein Fit pro Tag. Die Worker trainieren währenddessen nur RF.
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from src.config import DB_COMMUNITY_ID
+from src.context import DataContext
+from src.forecast.community_one_day import fit_predict_day
+from src.utils.shared_data import SharedFrames, get_shared, init_worker
+
+
+def _window(forecast_date: str, train_days: int, freq: str = "1h"):
+    forecast_start = pd.Timestamp(forecast_date, tz="UTC")
+    forecast_end = forecast_start + pd.Timedelta(days=1) - pd.Timedelta(freq)
+    train_start = forecast_start - pd.Timedelta(days=train_days)
+    return train_start, forecast_start, forecast_end
+
+
+def _forecast_task(
+    forecast_date: str,
+    train_days: int,
+    weights: Optional[pd.Series],
+    freq: str = "1h",
+    xgb_hist: bool = False,
+    model_names: Optional[list[str]] = None,
+    community_id: int = DB_COMMUNITY_ID,
+) -> tuple[str, Optional[pd.DataFrame]]:
+    from src.weather.temperature import weighted_temperature
+
+    train_start, forecast_start, forecast_end = _window(forecast_date, train_days, freq)
+    consumption_1h = get_shared("consumption")
+
+    temp_series = None
+    if weights is not None:
+        temp_series = weighted_temperature(get_shared("era5"), weights, train_start, forecast_end)
+
+    # n_jobs=1: Parallelität kommt vom Pool, nicht von RF/XGB
+    result = fit_predict_day(
+        consumption_1h=consumption_1h,
+        temp_series=temp_series,
+        train_start=train_start,
+        forecast_start=forecast_start,
+        forecast_end=forecast_end,
+        use_temperature=weights is not None,
+        n_jobs=1,
+        freq=freq,
+        xgb_hist=xgb_hist,
+        model_names=model_names,
+        community_id=community_id,
+    )
+    return forecast_date, result
+
+
+def xgb_walk_forward(
+    consumption: pd.Series,
+    forecast_dates: list[str],
+    train_days: int,
+    freq: str = "1h",
+    n_jobs: int = 1,
+    community_id: int = DB_COMMUNITY_ID,
+) -> dict[str, pd.DataFrame]:
+    """XGB (hist) für alle Tage auf einem gemeinsamen HistMatrixCache."""
+    from src.forecast.community_one_day import load_model_params
+    from src.forecast.feature_pruning import load_feature_spec, spec_variant
+    from src.forecast.xgb_hist import HistMatrixCache, walk_forward
+
+    variant = spec_variant(False, freq)
+    cache = HistMatrixCache.from_series(consumption, freq=freq, features=load_feature_spec(variant))
+    starts = [_window(d, train_days, freq)[1] for d in forecast_dates]
+    preds = walk_forward(
+        cache, starts, train_days, load_model_params(variant, community_id)["XGB"],
+        horizon=pd.Timedelta(days=1) - pd.Timedelta(freq), n_jobs=n_jobs,
+    )
+    return {
+        start.date().isoformat(): pd.DataFrame({
+            "DateTimeUtc": y_hat.index,
+            "forecast_consumption": y_hat.to_numpy(),
+            "model": "XGB",
+            "use_temperature": False,
+            "forecast_day": start.date().isoformat(),
+        })
+        for start, y_hat in preds.items()
+        if len(y_hat)
+    }
+
+
+def run_forecasts_parallel(
+    forecast_dates: Iterable[str],
+    train_days: int = 45,
+    use_temperature: bool = False,
+    max_workers: Optional[int] = None,
+    ctx: Optional[DataContext] = None,
+    lookback_days: int = 42,
+    xgb_hist: bool = False,
+) -> dict[str, Optional[pd.DataFrame]]:
+    """
+    Simulations-Forecasts für mehrere Tage im Prozess-Pool.
+    Ergebnisse werden im Parent ins Forecast-Dataset geschrieben.
+    """
+    from src.forecast.store import resolution_variant, write_forecast
+
+    ctx = ctx or DataContext()
+    forecast_dates = [pd.Timestamp(d).date().isoformat() for d in forecast_dates]
+    max_workers = max_workers or os.cpu_count()
+
+    frames = {"consumption": ctx.consumption_1h().astype(float)}
+    weights_by_day: dict[str, Optional[pd.Series]] = {d: None for d in forecast_dates}
+
+    # --------------------------------------------------
+    # Temperatur: Gewichte pro Tag + EINE ERA5-Matrix für alle Tage
+    # --------------------------------------------------
+    if use_temperature:
+        from src.weather.era5_autofill import ensure_era5_coverage
+        from src.weather.plz_weights import get_active_plz
+        from src.weather.temperature import ERA5_DIR
+
+        for d in forecast_dates:
+            train_start, _, _ = _window(d, train_days)
+            ensure_era5_coverage(ctx.df_gen_raw, ERA5_DIR, train_start.date(), lookback_days)
+            weights_by_day[d] = get_active_plz(ctx.df_gen_raw, train_start, lookback_days)
+
+        all_plz = sorted({str(p) for w in weights_by_day.values() for p in w.index})
+        first = min(_window(d, train_days)[0] for d in forecast_dates)
+        last = max(_window(d, train_days)[2] for d in forecast_dates)
+
+        era5 = pd.concat(
+            {plz: ctx.load_era5(plz, ERA5_DIR) for plz in all_plz},
+            axis=1,
+        ).loc[first:last]
+        frames["era5"] = era5
+
+    # --------------------------------------------------
+    # Pool: Daten einmal veröffentlichen, Worker hängen sich an
+    # --------------------------------------------------
+    results: dict[str, Optional[pd.DataFrame]] = {}
+    suffix = resolution_variant("with_temp" if use_temperature else "no_temp", ctx.freq)
+
+    # Temperatur-Gewichte sind pro Tag verschieden → keine gemeinsame Feature-Tabelle
+    walk = xgb_hist and not use_temperature
+    worker_models = ["RF"] if walk else None
+
+    with SharedFrames(frames) as shared:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=init_worker,
+            initargs=(shared.meta,),
+        ) as ex:
+            futures = [
+                ex.submit(_forecast_task, d, train_days, weights_by_day[d], ctx.freq, xgb_hist,
+                          worker_models, ctx.community_id)
+                for d in forecast_dates
+            ]
+            # XGB im Parent, während die Worker RF trainieren
+            xgb_by_day = (
+                xgb_walk_forward(frames["consumption"], forecast_dates, train_days, ctx.freq,
+                                 community_id=ctx.community_id)
+                if walk else {}
+            )
+            for fut in as_completed(futures):
+                day, result = fut.result()
+                if result is not None and day in xgb_by_day:
+                    result = pd.concat([result, xgb_by_day[day]], ignore_index=True)
+                results[day] = result
+                if result is None:
+                    print(f"  ⏭️ {day}: keine Test-Features")
+                    continue
+                write_forecast(result, variant=suffix, community_id=ctx.community_id)
+                print(f" Forecast {day} ({suffix}) gespeichert")
+
+    return dict(sorted(results.items()))
@@ -0,0 +1,316 @@
+# src/forecast/store.py
+#
+# Append-only, hive-partitioniertes Dataset für Forecasts und
+# Evaluationsergebnisse (statt einer kleinen Parquet-Datei pro Tag/Variante):
+#
+#   data/forecasts/dataset/community=12/forecast_day=2025-02-16/variant=with_temp/model=RF/part-….parquet
+#   data/processed/temp_compare/community=12/forecast_day=2025-02-16/part-….parquet
+#
+# - Schreiben hängt nur neue Dateien an (run_ts pro Lauf); beim Lesen gewinnt
+#   der jüngste Lauf je Partition – ganz, nicht zeilenweise: schreibt ein
+#   Neulauf weniger Slots, bleiben keine Zeilen des alten Laufs übrig.
+# - Lesen eines Zeitraums = EIN Scan mit Predicate-Pushdown auf die
+#   Partitionen (+ Row-Group-Statistiken für DateTimeUtc).
+# - compact_dataset() fasst pro Partition alle Dateien zu einer zusammen.
+
+from __future__ import annotations
+
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.config import DATA_DIR, DB_COMMUNITY_ID, PROCESSED_DIR
+
+FORECAST_DATASET_DIR = DATA_DIR / "forecasts" / "dataset"
+METER_FORECAST_DATASET_DIR = DATA_DIR / "forecasts" / "meters"
+TARGET_FORECAST_DATASET_DIR = DATA_DIR / "forecasts" / "targets"
+TEMP_COMPARE_DATASET_DIR = PROCESSED_DIR / "temp_compare"
+
+FORECAST_PARTITIONS = pa.schema([
+    ("community", pa.int32()),
+    ("forecast_day", pa.string()),
+    ("variant", pa.string()),
+    ("model", pa.string()),
+])
+
+TEMP_COMPARE_PARTITIONS = pa.schema([
+    ("community", pa.int32()),
+    ("forecast_day", pa.string()),
+])
+
+# Ein Lauf schreibt pro Schlüssel alle Zeilen (alle Slots, Zählpunkte bzw.
+# Targets) → beim Lesen gilt pro Schlüssel nur der jüngste run_ts
+FORECAST_KEYS = ["community", "forecast_day", "variant", "model"]
+METER_FORECAST_KEYS = FORECAST_KEYS
+TARGET_FORECAST_KEYS = FORECAST_KEYS
+TEMP_COMPARE_KEYS = ["community", "forecast_day"]
+
+ROW_GROUP_SIZE = 64 * 1024
+
+
+# ============================================================
+# Generisch
+# ============================================================
+
+def _partitioning(schema: pa.Schema):
+    return ds.partitioning(schema, flavor="hive")
+
+
+def append_partitioned(df: pd.DataFrame, root: Path, partitions: pa.Schema) -> None:
+    """Hängt df als neue Datei(en) an – bestehende Dateien bleiben unberührt."""
+    df = df.copy()
+    df["run_ts"] = pd.Timestamp.now(tz="UTC")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for field in partitions:
+        idx = table.schema.get_field_index(field.name)
+        table = table.set_column(idx, field.name, table.column(field.name).cast(field.type))
+
+    root.mkdir(parents=True, exist_ok=True)
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=_partitioning(partitions),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        max_rows_per_group=ROW_GROUP_SIZE,
+        min_rows_per_group=0,
+    )
+
+
+def latest_run(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Nur die Zeilen des jüngsten Laufs (max run_ts) je Schlüssel."""
+    if not keys:
+        return df[df["run_ts"] == df["run_ts"].max()]
+    newest = df.groupby(keys, sort=False, dropna=False)["run_ts"].transform("max")
+    return df[df["run_ts"] == newest]
+
+
+def read_partitioned(
+    root: Path,
+    partitions: pa.Schema,
+    keys: list[str],
+    filter_expr=None,
+) -> pd.DataFrame:
+    """Ein Scan über das Dataset, Filter werden auf Partitionen/Row-Groups gepusht."""
+    if not root.exists():
+        return pd.DataFrame()
+
+    dataset = ds.dataset(root, format="parquet", partitioning=_partitioning(partitions))
+    df = dataset.to_table(filter=filter_expr).to_pandas()
+    if df.empty:
+        return df
+
+    # kategorische Partition-Spalten → normale Werte
+    for field in partitions:
+        if isinstance(df[field.name].dtype, pd.CategoricalDtype):
+            df[field.name] = df[field.name].astype(object)
+
+    return latest_run(df, keys).reset_index(drop=True)
+
+
+def compact_dataset(root: Path, partitions: pa.Schema, keys: list[str]) -> int:
+    """
+    Fasst pro Leaf-Partition alle Dateien zu EINER zusammen (nur der
+    jüngste Lauf bleibt). Gibt die Zahl der kompaktierten Partitionen zurück.
+    """
+    if not root.exists():
+        return 0
+
+    leaf_dirs = {p.parent for p in root.rglob("*.parquet")}
+    n = 0
+
+    for leaf in sorted(leaf_dirs):
+        files = sorted(leaf.glob("*.parquet"))
+        if len(files) < 2:
+            continue
+
+        table = pa.concat_tables([pq.read_table(f) for f in files], promote_options="default")
+        df = table.to_pandas()
+        # Partitionsspalten stehen im Pfad, nicht in der Datei
+        present = [k for k in keys if k in df.columns]
+        df = latest_run(df, present)
+
+        tmp = leaf / f"part-{uuid.uuid4().hex}-0.parquet.tmp"
+        pq.write_table(
+            pa.Table.from_pandas(df, preserve_index=False),
+            tmp,
+            row_group_size=ROW_GROUP_SIZE,
+        )
+        for f in files:
+            f.unlink()
+        tmp.rename(tmp.with_suffix(""))
+        n += 1
+
+    return n
+
+
+# ============================================================
+# Forecasts
+# ============================================================
+
+def resolution_variant(variant: str, freq: str = "1h") -> str:
+    """Variantenname im Dataset: 1h wie bisher, sonst mit Suffix (no_temp_15min)."""
+    return variant if freq == "1h" else f"{variant}_{freq}"
+
+
+def write_forecast(
+    result: pd.DataFrame,
+    variant: str,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = FORECAST_DATASET_DIR,
+) -> None:
+    df = result.copy()
+    df["community"] = community_id
+    df["variant"] = variant
+    append_partitioned(df, root, FORECAST_PARTITIONS)
+
+
+def read_forecasts(
+    start_date: str,
+    end_date: str,
+    variants: Optional[Iterable[str]] = None,
+    models: Optional[Iterable[str]] = None,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = FORECAST_DATASET_DIR,
+) -> pd.DataFrame:
+    """Alle Forecasts im Zeitraum [start_date, end_date] in einem Scan."""
+    f = (
+        (ds.field("community") == community_id)
+        & (ds.field("forecast_day") >= start_date)
+        & (ds.field("forecast_day") <= end_date)
+    )
+    if variants is not None:
+        f &= ds.field("variant").isin(list(variants))
+    if models is not None:
+        f &= ds.field("model").isin(list(models))
+
+    return read_partitioned(root, FORECAST_PARTITIONS, FORECAST_KEYS, f)
+
+
+def write_meter_forecast(
+    result: pd.DataFrame,
+    variant: str,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = METER_FORECAST_DATASET_DIR,
+) -> None:
+    """Zählpunkt-Forecasts (globales Modell), gleiche Partitionen wie Community."""
+    df = result.copy()
+    df["community"] = community_id
+    df["variant"] = variant
+    df["MeteringPointId"] = df["MeteringPointId"].astype("int64")
+    append_partitioned(df, root, FORECAST_PARTITIONS)
+
+
+def read_meter_forecasts(
+    start_date: str,
+    end_date: str,
+    variants: Optional[Iterable[str]] = None,
+    meters: Optional[Iterable[int]] = None,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = METER_FORECAST_DATASET_DIR,
+) -> pd.DataFrame:
+    f = (
+        (ds.field("community") == community_id)
+        & (ds.field("forecast_day") >= start_date)
+        & (ds.field("forecast_day") <= end_date)
+    )
+    if variants is not None:
+        f &= ds.field("variant").isin(list(variants))
+    if meters is not None:
+        f &= ds.field("MeteringPointId").isin(list(meters))
+
+    return read_partitioned(root, FORECAST_PARTITIONS, METER_FORECAST_KEYS, f)
+
+
+def write_target_forecast(
+    result: pd.DataFrame,
+    variant: str,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = TARGET_FORECAST_DATASET_DIR,
+) -> None:
+    """Multi-Target-Forecasts (consumption, Erzeugung je Quelle, net_position)."""
+    df = result.copy()
+    df["community"] = community_id
+    df["variant"] = variant
+    append_partitioned(df, root, FORECAST_PARTITIONS)
+
+
+def read_target_forecasts(
+    start_date: str,
+    end_date: str,
+    variants: Optional[Iterable[str]] = None,
+    targets: Optional[Iterable[str]] = None,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = TARGET_FORECAST_DATASET_DIR,
+) -> pd.DataFrame:
+    f = (
+        (ds.field("community") == community_id)
+        & (ds.field("forecast_day") >= start_date)
+        & (ds.field("forecast_day") <= end_date)
+    )
+    if variants is not None:
+        f &= ds.field("variant").isin(list(variants))
+    if targets is not None:
+        f &= ds.field("target").isin(list(targets))
+
+    return read_partitioned(root, FORECAST_PARTITIONS, TARGET_FORECAST_KEYS, f)
+
+
+def migrate_legacy_forecasts(
+    legacy_dir: Path = DATA_DIR / "forecasts",
+    community_id: int = DB_COMMUNITY_ID,
+) -> int:
+    """Importiert alte community_forecast_{date}_{variant}.parquet ins Dataset."""
+    n = 0
+    for variant in ("no_temp", "with_temp"):
+        for path in sorted(legacy_dir.glob(f"community_forecast_*_{variant}.parquet")):
+            df = pd.read_parquet(path)
+            df["forecast_day"] = path.stem.split("_")[2]
+            write_forecast(df, variant, community_id)
+            n += 1
+    return n
+
+
+# ============================================================
+# Evaluationsergebnisse (Temperatur-Vergleich)
+# ============================================================
+
+def write_temp_compare(
+    comparison: pd.DataFrame,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = TEMP_COMPARE_DATASET_DIR,
+) -> None:
+    df = comparison.copy()
+    df["community"] = community_id
+    df["forecast_day"] = df["forecast_date"]
+    append_partitioned(df, root, TEMP_COMPARE_PARTITIONS)
+
+
+def read_temp_compare(
+    start_date: str,
+    end_date: str,
+    community_id: int = DB_COMMUNITY_ID,
+    root: Path = TEMP_COMPARE_DATASET_DIR,
+) -> pd.DataFrame:
+    f = (
+        (ds.field("community") == community_id)
+        & (ds.field("forecast_day") >= start_date)
+        & (ds.field("forecast_day") <= end_date)
+    )
+    return read_partitioned(root, TEMP_COMPARE_PARTITIONS, TEMP_COMPARE_KEYS, f)
+
+
+def compact_all() -> dict:
+    return {
+        "forecasts": compact_dataset(FORECAST_DATASET_DIR, FORECAST_PARTITIONS, FORECAST_KEYS),
+        "meter_forecasts": compact_dataset(METER_FORECAST_DATASET_DIR, FORECAST_PARTITIONS, METER_FORECAST_KEYS),
+        "target_forecasts": compact_dataset(TARGET_FORECAST_DATASET_DIR, FORECAST_PARTITIONS, TARGET_FORECAST_KEYS),
+        "temp_compare": compact_dataset(TEMP_COMPARE_DATASET_DIR, TEMP_COMPARE_PARTITIONS, TEMP_COMPARE_KEYS),
+    }
@@ -0,0 +1,347 @@
+# src/forecast/tuning.py
+#
+# Hyperparameter-Suche für RF/XGB auf Basis von build_dataset_leakage_free:
+# - Rolling-Origin-CV: jeder Fold = ein Forecast-Tag mit eigenem Trainingsfenster
+# - Features pro Fold EINMAL bauen und cachen (Speicher + Disk)
+# - Successive Halving: alle Configs auf wenigen Folds, nur die besten
+#   1/eta kommen in die nächste Runde mit mehr Folds
+# - Fits laufen parallel im Thread-Pool (RF/XGB geben die GIL frei,
+#   die gecachten Matrizen werden geteilt statt kopiert)
+# - XGB (xgb_hist=True): EINE Feature-Tabelle + Quantil-Referenz über alle
+#   Folds (src/forecast/xgb_hist.py); Fold-Fenster sind Zeilen-Subsets,
+#   ihre Hist-Matrizen werden von allen Configs geteilt. Ohne Early
+#   Stopping – n_estimators ist Teil des Suchraums.
+#
+# Ergebnis → MODEL_PARAMS_PATH pro Community, Eintrag pro Variante (liest
+# build_models), Report mit Suchkosten
+# im Vergleich zur vollständigen Grid-Search.
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.context import DataContext
+from src.features import build_dataset_leakage_free
+from src.forecast.community_one_day import MODEL_PARAMS_PATH, make_model, save_model_params
+from src.forecast.store import resolution_variant
+from src.forecast.xgb_hist import HistMatrixCache, fit_predict_window
+
+CACHE_DIR = Path("data/processed/tuning_cache")
+REPORT_PATH = Path("data/processed/tuning_report.json")
+
+SEARCH_SPACE = {
+    "RF": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [8, 12, 15, None],
+        "min_samples_leaf": [1, 3, 5],
+        "max_features": [1.0, 0.5],
+    },
+    "XGB": {
+        "n_estimators": [200, 400, 800],
+        "max_depth": [3, 4, 6],
+        "learning_rate": [0.03, 0.05, 0.1],
+        "subsample": [0.8],
+        "colsample_bytree": [0.6, 0.8],
+    },
+}
+
+
+# ============================================================
+# Folds (Rolling Origin) + Feature-Cache
+# ============================================================
+
+def rolling_origins(last_day: str, n_folds: int, step_days: int = 7) -> list[pd.Timestamp]:
+    """Forecast-Tage der Folds, ältester zuerst."""
+    last = pd.Timestamp(last_day, tz="UTC").floor("D")
+    return [last - pd.Timedelta(days=step_days * i) for i in reversed(range(n_folds))]
+
+
+def _fold_end(test_start: pd.Timestamp, freq: str = "1h") -> pd.Timestamp:
+    """Letzter Slot des Test-Tags (23:00 bzw. 23:45)."""
+    return test_start + pd.Timedelta(days=1) - pd.Timedelta(freq)
+
+
+def _fold_key(series: pd.Series, temp_series, train_start, test_start, freq: str = "1h") -> str:
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(series, index=True).values.tobytes())
+    if temp_series is not None:
+        h.update(pd.util.hash_pandas_object(temp_series, index=True).values.tobytes())
+    h.update(f"{train_start.isoformat()}|{test_start.isoformat()}|{freq}".encode())
+    return h.hexdigest()[:16]
+
+
+class FoldCache:
+    """Feature-Matrizen pro Fold – einmal gebaut, im Speicher und auf Disk."""
+
+    def __init__(self, cache_dir: Optional[Path] = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._mem: dict[str, tuple] = {}
+
+    def get(self, series, temp_series, train_start, test_start, test_end, freq: str = "1h"):
+        key = _fold_key(series, temp_series, train_start, test_start, freq)
+        if key in self._mem:
+            return self._mem[key]
+
+        path = self.cache_dir / f"fold_{key}.pkl" if self.cache_dir else None
+        if path is not None and path.exists():
+            fold = pd.read_pickle(path)
+        else:
+            fold = build_dataset_leakage_free(
+                series=series,
+                train_start=train_start,
+                test_start=test_start,
+                test_end=test_end,
+                temp_series=temp_series,
+                freq=freq,
+            )
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                pd.to_pickle(fold, path)
+
+        self._mem[key] = fold
+        return fold
+
+
+def build_folds(
+    series: pd.Series,
+    origins: list[pd.Timestamp],
+    train_days: int,
+    temp_series: Optional[pd.Series] = None,
+    cache: Optional[FoldCache] = None,
+    freq: str = "1h",
+) -> list[tuple]:
+    cache = cache or FoldCache()
+    folds = []
+    for test_start in origins:
+        train_start = test_start - pd.Timedelta(days=train_days)
+        test_end = _fold_end(test_start, freq)
+        X_train, y_train, X_test, y_test = cache.get(
+            series, temp_series, train_start, test_start, test_end, freq
+        )
+        if X_test.empty or len(X_train) < 100:
+            print(f"  ⏭️ Fold {test_start.date()} übersprungen (zu wenig Daten)")
+            continue
+        folds.append((X_train, y_train, X_test, y_test))
+    return folds
+
+
+class HistFold(NamedTuple):
+    """Fold als Fenster auf einer gemeinsamen HistMatrixCache (nur XGB)."""
+    cache: HistMatrixCache
+    train_start: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+def build_hist_folds(
+    series: pd.Series,
+    origins: list[pd.Timestamp],
+    train_days: int,
+    temp_series: Optional[pd.Series] = None,
+    freq: str = "1h",
+) -> list[HistFold]:
+    cache = HistMatrixCache.from_series(series, temp_series, freq=freq)
+    folds = []
+    for test_start in origins:
+        train_start = test_start - pd.Timedelta(days=train_days)
+        test_end = _fold_end(test_start, freq)
+        n_test = len(cache.rows(test_start, test_end + pd.Timedelta(microseconds=1)))
+        if n_test == 0 or len(cache.rows(train_start, test_start)) < 100:
+            print(f"  ⏭️ Fold {test_start.date()} übersprungen (zu wenig Daten)")
+            continue
+        folds.append(HistFold(cache, train_start, test_start, test_end))
+    return folds
+
+
+# ============================================================
+# Successive Halving
+# ============================================================
+
+def grid(space: dict) -> list[dict]:
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def _evaluate(model_name: str, params: dict, fold: tuple) -> tuple[float, float]:
+    if isinstance(fold, HistFold):
+        return _evaluate_hist(params, fold)
+
+    X_train, y_train, X_test, y_test = fold
+    model = make_model(model_name, params, n_jobs=1)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    mae = float(np.mean(np.abs(model.predict(X_test) - y_test.to_numpy())))
+    return mae, time.perf_counter() - t0
+
+
+def _evaluate_hist(params: dict, fold: HistFold) -> tuple[float, float]:
+    t0 = time.perf_counter()
+    y_hat, _ = fit_predict_window(
+        fold.cache, fold.train_start, fold.test_start, fold.test_end, params,
+        early_stopping_rounds=None,
+    )
+    y_test = fold.cache.target(fold.test_start, fold.test_end + pd.Timedelta(microseconds=1))
+    mae = float(np.mean(np.abs(y_hat.loc[y_test.index].to_numpy() - y_test.to_numpy())))
+    return mae, time.perf_counter() - t0
+
+
+def successive_halving(
+    model_name: str,
+    configs: list[dict],
+    folds: list[tuple],
+    eta: int = 3,
+    min_folds: int = 1,
+    max_workers: Optional[int] = None,
+) -> dict:
+    """
+    Runde r: alle verbliebenen Configs auf den neuesten min_folds·eta^r Folds.
+    Score = mittlere MAE; die besten ceil(n/eta) kommen weiter.
+    """
+    alive = list(range(len(configs)))
+    scores: dict[tuple[int, int], float] = {}   # (config, fold) → MAE
+    fit_seconds = 0.0
+    n_fits = 0
+    n_folds = min_folds
+    rung = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        while True:
+            use = list(range(len(folds)))[-min(n_folds, len(folds)):]
+            todo = [(c, f) for c in alive for f in use if (c, f) not in scores]
+
+            futures = {
+                ex.submit(_evaluate, model_name, configs[c], folds[f]): (c, f)
+                for c, f in todo
+            }
+            for fut, key in futures.items():
+                mae, sec = fut.result()
+                scores[key] = mae
+                fit_seconds += sec
+                n_fits += 1
+
+            mean = {c: float(np.mean([scores[(c, f)] for f in use])) for c in alive}
+            print(f"  {model_name} Runde {rung}: {len(alive)} Configs × {len(use)} Folds, "
+                  f"beste MAE {min(mean.values()):.2f}")
+
+            if len(alive) == 1 or len(use) == len(folds):
+                break
+
+            keep = max(1, math.ceil(len(alive) / eta))
+            alive = sorted(alive, key=mean.get)[:keep]
+            n_folds *= eta
+            rung += 1
+
+    best = min(alive, key=mean.get)
+    return {
+        "params": configs[best],
+        "mae": mean[best],
+        "n_fits": n_fits,
+        "fit_seconds": fit_seconds,
+        "n_configs": len(configs),
+        "n_folds": len(folds),
+    }
+
+
+# ============================================================
+# Einstieg
+# ============================================================
+
+def tune_models(
+    last_day: str,
+    n_folds: int = 9,
+    step_days: int = 7,
+    train_days: int = 45,
+    use_temperature: bool = False,
+    eta: int = 3,
+    max_workers: Optional[int] = None,
+    space: Optional[dict] = None,
+    xgb_hist: bool = True,
+    ctx: Optional[DataContext] = None,
+    out_path: Path = MODEL_PARAMS_PATH,
+) -> dict:
+    """
+    Tuning für alle Modelle im Suchraum; schreibt die besten Parameter
+    nach out_path und einen Kosten-Report nach REPORT_PATH.
+    xgb_hist: XGB-Folds auf gemeinsamen Hist-Matrizen (siehe HistFold).
+    """
+    ctx = ctx or DataContext()
+    space = space or SEARCH_SPACE
+
+    series = ctx.consumption_1h()
+    origins = rolling_origins(last_day, n_folds, step_days)
+
+    temp_series = None
+    if use_temperature:
+        from src.weather.temperature import build_temperature_series
+
+        temp_series = build_temperature_series(
+            df_gen_raw=ctx.df_gen_raw,
+            train_start=origins[0] - pd.Timedelta(days=train_days),
+            test_end=_fold_end(origins[-1], ctx.freq),
+            era5_loader=ctx.load_era5,
+        )
+
+    hist = xgb_hist and "XGB" in space
+
+    t0 = time.perf_counter()
+    folds = []
+    if any(name != "XGB" for name in space) or not hist:
+        folds = build_folds(series, origins, train_days, temp_series, freq=ctx.freq)
+    hist_folds = build_hist_folds(series, origins, train_days, temp_series, ctx.freq) if hist else []
+    feature_seconds = time.perf_counter() - t0
+    if not folds and not hist_folds:
+        raise ValueError(" Keine gültigen Folds für das Tuning")
+
+    best, report = {}, {"feature_seconds": feature_seconds, "xgb_hist": hist, "models": {}}
+
+    for model_name, model_space in space.items():
+        configs = grid(model_space)
+        model_folds = hist_folds if hist and model_name == "XGB" else folds
+        if not model_folds:
+            print(f"  ⏭️ {model_name}: keine gültigen Folds")
+            continue
+        res = successive_halving(model_name, configs, model_folds, eta=eta, max_workers=max_workers)
+        best[model_name] = res["params"]
+
+        # Vergleich: vollständige Grid-Search = alle Configs auf allen Folds
+        exhaustive_fits = res["n_configs"] * res["n_folds"]
+        sec_per_fit = res["fit_seconds"] / max(res["n_fits"], 1)
+        report["models"][model_name] = {
+            **res,
+            "exhaustive_fits": exhaustive_fits,
+            "exhaustive_seconds_est": exhaustive_fits * sec_per_fit,
+            "fit_ratio": res["n_fits"] / exhaustive_fits,
+        }
+
+    variant = resolution_variant("with_temp" if use_temperature else "no_temp", ctx.freq)
+    saved = save_model_params(variant, best, {
+        "tuned_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        "last_day": last_day,
+        "use_temperature": use_temperature,
+        "freq": ctx.freq,
+    }, community_id=ctx.community_id, path=out_path)
+    print(f" Getunte Parameter gespeichert: {saved} ({variant})")
+
+    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    REPORT_PATH.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+
+    print("\n Suchkosten (Successive Halving vs. Grid-Search)")
+    for name, r in report["models"].items():
+        print(
+            f"  {name}: {r['n_fits']} Fits ({r['fit_seconds']:.1f}s) vs. "
+            f"{r['exhaustive_fits']} Fits (~{r['exhaustive_seconds_est']:.1f}s) "
+            f"→ {r['fit_ratio'] * 100:.0f}%  | MAE {r['mae']:.2f}"
+        )
+    print(f"  Features (einmal pro Fold): {feature_seconds:.1f}s")
+
+    return report
@@ -0,0 +1,322 @@
+# src/forecast/xgb_hist.py
+#
+# XGBoost-Training auf wiederverwendbaren Histogramm-Matrizen.
+#
+# - HistMatrixCache: Feature-Tabelle EINMAL pro Feature-Matrix, daraus EINE
+#   QuantileDMatrix als Referenz (Quantil-Schnitte). Trainings-/Holdout-
+#   Fenster sind Zeilen-Subsets, quantisiert mit denselben Schnitten
+#   (kein neues Sketching) und pro Fenster gecacht → Configs im Tuning und
+#   überlappende Walk-Forward-Fenster teilen sich die Matrizen.
+# - fit_hist_xgb: tree_method="hist", Early Stopping auf dem letzten
+#   Stück des Trainingsfensters (held-out tail, Default 7 Tage) bestimmt
+#   die Rundenzahl (n_estimators nur noch Obergrenze), danach Refit auf
+#   dem ganzen Fenster. Walk-Forward: Rundenzahl aus dem ersten Fenster
+#   wiederverwenden → ein Fit pro Tag mit weniger Runden.
+#
+# Wer profitiert: forecast-range --xgb-hist (ohne Temperatur) und das
+# Tuning laufen auf EINER Feature-Tabelle/Quantil-Referenz. Ein einzelner
+# Tages-Forecast (HistXGBRegressor) baut seinen Cache pro Fit neu und zahlt
+# Suche + Refit – er wird nur schneller, wenn n_estimators deutlich zu
+# hoch angesetzt ist.
+# - Quantil-Schnitte nutzen nur Features, keine Zielwerte (kein Leakage).
+
+from __future__ import annotations
+
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.features import make_features_no_leakage
+from src.utils.instrument import span
+
+MAX_BIN = 256
+HOLDOUT_DAYS = 7
+EARLY_STOPPING_ROUNDS = 50
+
+# darunter kein Early Stopping (zu wenig Zeilen für Train/Holdout)
+MIN_TRAIN_ROWS = 100
+MIN_HOLDOUT_ROWS = 24
+
+
+# ============================================================
+# Matrix-Cache
+# ============================================================
+
+class HistMatrixCache:
+    """
+    Feature-Tabelle + Quantil-Referenz; Fenster [start, end) als Zeilen-Subset.
+
+    X: Features (Zeitindex, sortiert), y: Zielwerte (NaN erlaubt –
+    solche Zeilen sind nur für die Vorhersage nutzbar).
+    """
+
+    def __init__(self, X: pd.DataFrame, y: pd.Series, max_bin: int = MAX_BIN):
+        import xgboost as xgb
+
+        ok = X.notna().all(axis=1).to_numpy()
+        self.index = X.index[ok]
+        self.feature_names = list(X.columns)
+        self.X = np.ascontiguousarray(X.to_numpy(np.float32)[ok])
+        self.y = y.reindex(X.index).to_numpy(np.float32)[ok]
+        self.max_bin = max_bin
+
+        with span("xgb_hist.sketch", rows=len(self.X), n_features=self.X.shape[1]):
+            self.ref = xgb.QuantileDMatrix(self.X, max_bin=max_bin, feature_names=self.feature_names)
+
+        self._mem: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_series(
+        cls,
+        series: pd.Series,
+        temp_series: Optional[pd.Series] = None,
+        freq: str = "1h",
+        max_bin: int = MAX_BIN,
+        features: Optional[Iterable[str]] = None,
+    ) -> "HistMatrixCache":
+        """
+        Features über die gesamte Reihe (wie build_dataset_leakage_free, ein Durchlauf).
+        features: reduziertes Feature-Set (Feature-Spec), Reihenfolge wie dort.
+        """
+        fine = pd.Timedelta(freq) < pd.Timedelta("1h")
+        series = series.asfreq(freq).astype(float)
+        if temp_series is not None and fine:
+            temp_series = temp_series.asfreq(freq).interpolate(limit_direction="forward")
+
+        with span("xgb_hist.features", rows=len(series)):
+            X = make_features_no_leakage(
+                series.ffill(limit=5000),
+                temp_series=temp_series,
+                freq=freq,
+                dtype=np.float32 if fine else np.float64,
+            )
+        if features is not None:
+            X = X[[c for c in features if c in X.columns]]
+        return cls(X, series, max_bin=max_bin)
+
+    # --------------------------------------------------
+    # Fenster
+    # --------------------------------------------------
+    def rows(self, start: pd.Timestamp, end: pd.Timestamp, labeled: bool = True) -> np.ndarray:
+        """Zeilenpositionen mit start ≤ t < end (labeled: nur mit Zielwert)."""
+        lo, hi = self.index.searchsorted([start, end], side="left")
+        rows = np.arange(lo, hi)
+        if labeled:
+            rows = rows[~np.isnan(self.y[rows])]
+        return rows
+
+    def matrix(self, start: pd.Timestamp, end: pd.Timestamp, quantile: bool = True):
+        """
+        Matrix für [start, end), gecacht.
+        quantile=True : QuantileDMatrix mit den Referenz-Schnitten (Training)
+        quantile=False: einfache DMatrix (Holdout – XGBoost verlangt für
+                        QuantileDMatrix-Evals die Trainingsmatrix als Referenz)
+        """
+        import xgboost as xgb
+
+        key = (start, end, quantile)
+        with self._lock:
+            if key not in self._mem:
+                rows = self.rows(start, end)
+                if quantile:
+                    m = xgb.QuantileDMatrix(
+                        self.X[rows], self.y[rows],
+                        ref=self.ref, max_bin=self.max_bin, feature_names=self.feature_names,
+                    )
+                else:
+                    m = xgb.DMatrix(self.X[rows], self.y[rows], feature_names=self.feature_names)
+                self._mem[key] = m
+            return self._mem[key]
+
+    def features(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        rows = self.rows(start, end, labeled=False)
+        return pd.DataFrame(self.X[rows], index=self.index[rows], columns=self.feature_names)
+
+    def target(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.Series:
+        rows = self.rows(start, end)
+        return pd.Series(self.y[rows], index=self.index[rows])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+
+
+# ============================================================
+# Training
+# ============================================================
+
+def booster_params(params: dict, n_jobs: int = 1, seed: int = 42) -> tuple[dict, int]:
+    """XGBRegressor-Parameter → (xgb.train-Parameter, Anzahl Runden)."""
+    p = dict(params)
+    rounds = int(p.pop("n_estimators", 400))
+    p.update(
+        objective="reg:squarederror",
+        tree_method="hist",
+        nthread=n_jobs if n_jobs > 0 else 0,
+        seed=seed,
+    )
+    return p, rounds
+
+
+def fit_hist_xgb(
+    cache: HistMatrixCache,
+    train_start: pd.Timestamp,
+    train_end: pd.Timestamp,
+    params: dict,
+    holdout_days: float = HOLDOUT_DAYS,
+    early_stopping_rounds: Optional[int] = EARLY_STOPPING_ROUNDS,
+    refit: bool = True,
+    n_jobs: int = 1,
+):
+    """
+    Booster auf [train_start, train_end).
+
+    Early Stopping: die letzten holdout_days sind Validierung, die beste
+    Rundenzahl steht danach in booster.attr("best_rounds").
+    refit=True (Default): mit dieser Rundenzahl noch einmal auf dem GANZEN
+    Fenster trainieren – Bäume extrapolieren nicht, die jüngsten Tage
+    sind für day-ahead die wichtigsten.
+    early_stopping_rounds=None: alle n_estimators Runden, kein Holdout.
+    """
+    import xgboost as xgb
+
+    p, rounds = booster_params(params, n_jobs)
+    p["max_bin"] = cache.max_bin
+
+    split = train_end - pd.Timedelta(days=holdout_days)
+    use_holdout = (
+        early_stopping_rounds is not None
+        and len(cache.rows(train_start, split)) >= MIN_TRAIN_ROWS
+        and len(cache.rows(split, train_end)) >= MIN_HOLDOUT_ROWS
+    )
+
+    if use_holdout:
+        stop = xgb.callback.EarlyStopping(rounds=early_stopping_rounds, save_best=True)
+        dtrain = cache.matrix(train_start, split)
+        with span("xgb_hist.early_stopping", rows=dtrain.num_row(), max_rounds=rounds):
+            booster = xgb.train(
+                p, dtrain, num_boost_round=rounds,
+                evals=[(cache.matrix(split, train_end, quantile=False), "holdout")],
+                callbacks=[stop], verbose_eval=False,
+            )
+        rounds = booster.num_boosted_rounds()
+        if not refit:
+            booster.set_attr(best_rounds=str(rounds))
+            return booster
+
+    dtrain = cache.matrix(train_start, train_end)
+    with span("xgb_hist.fit", rows=dtrain.num_row(), rounds=rounds):
+        booster = xgb.train(p, dtrain, num_boost_round=rounds)
+    booster.set_attr(best_rounds=str(rounds))
+    return booster
+
+
+def best_rounds(booster) -> int:
+    return int(booster.attr("best_rounds") or booster.num_boosted_rounds())
+
+
+def predict_hist_xgb(booster, X) -> np.ndarray:
+    """Vorhersage ohne DMatrix-Umweg (inplace_predict auf dem float32-Array)."""
+    if hasattr(X, "to_numpy"):
+        X = X.to_numpy(np.float32)
+    return booster.inplace_predict(np.ascontiguousarray(X, dtype=np.float32))
+
+
+class HistXGBRegressor:
+    """
+    fit/predict-Ersatz für XGBRegressor in fit_predict_day: hist + Early
+    Stopping auf dem Tail + Refit; eine Quantil-Referenz für Train/Holdout.
+    get_booster() wie beim Original (Export, compact_trees).
+    """
+
+    def __init__(
+        self,
+        params: dict,
+        holdout_days: float = HOLDOUT_DAYS,
+        early_stopping_rounds: Optional[int] = EARLY_STOPPING_ROUNDS,
+        n_jobs: int = -1,
+    ):
+        self.params = dict(params)
+        self.holdout_days = holdout_days
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_jobs = n_jobs
+        self.booster_ = None
+
+    def set_params(self, **params) -> "HistXGBRegressor":
+        for key, value in params.items():
+            if hasattr(self, key) and key != "params":
+                setattr(self, key, value)
+            else:
+                self.params[key] = value
+        return self
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "HistXGBRegressor":
+        cache = HistMatrixCache(X, y)
+        self.booster_ = fit_hist_xgb(
+            cache,
+            train_start=X.index[0],
+            train_end=X.index[-1] + pd.Timedelta(microseconds=1),
+            params=self.params,
+            holdout_days=self.holdout_days,
+            early_stopping_rounds=self.early_stopping_rounds,
+            n_jobs=self.n_jobs,
+        )
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        if self.booster_ is not None:
+            self.booster_.set_param({"nthread": self.n_jobs if self.n_jobs > 0 else 0})
+        return predict_hist_xgb(self.booster_, X)
+
+    def get_booster(self):
+        return self.booster_
+
+    @property
+    def n_rounds_(self) -> int:
+        return best_rounds(self.booster_)
+
+
+def fit_predict_window(
+    cache: HistMatrixCache,
+    train_start: pd.Timestamp,
+    forecast_start: pd.Timestamp,
+    forecast_end: pd.Timestamp,
+    params: dict,
+    n_jobs: int = 1,
+    **fit_kwargs,
+) -> tuple[pd.Series, object]:
+    """Ein Walk-Forward-Schritt: Fit bis forecast_start, Vorhersage bis forecast_end (inkl.)."""
+    booster = fit_hist_xgb(cache, train_start, forecast_start, params, n_jobs=n_jobs, **fit_kwargs)
+    X_test = cache.features(forecast_start, forecast_end + pd.Timedelta(microseconds=1))
+    return pd.Series(predict_hist_xgb(booster, X_test), index=X_test.index), booster
+
+
+def walk_forward(
+    cache: HistMatrixCache,
+    forecast_starts: Iterable[pd.Timestamp],
+    train_days: int,
+    params: dict,
+    horizon: pd.Timedelta = pd.Timedelta(hours=23),
+    reuse_rounds: bool = True,
+    n_jobs: int = 1,
+    **fit_kwargs,
+) -> dict[pd.Timestamp, pd.Series]:
+    """
+    Überlappende Fenster auf EINER Feature-Tabelle/Quantil-Referenz.
+    reuse_rounds: Early Stopping nur im ersten Fenster, danach feste
+    Rundenzahl (ein Fit pro Fenster statt Suche + Refit).
+    """
+    out = {}
+    for start in sorted(forecast_starts):
+        y_hat, booster = fit_predict_window(
+            cache, start - pd.Timedelta(days=train_days), start, start + horizon,
+            params, n_jobs=n_jobs, **fit_kwargs,
+        )
+        out[start] = y_hat
+        if reuse_rounds and "n_estimators" not in fit_kwargs:
+            params = {**params, "n_estimators": best_rounds(booster)}
+            fit_kwargs["early_stopping_rounds"] = None
+    return out
@@ -0,0 +1,299 @@
+# src/freshness.py
+#
+# Pre-Flight vor dem teuren Forecast-Lauf: sind die Daten für den Zieltag
+# überhaupt schon da? Statt Extract + Prep (+ ERA5-Autofill) und erst dann
+# "X_test leer" nur ein billiger Blick auf den neuesten Zeitstempel:
+#
+# - source="sql"  : MAX(DateTimeUtc) pro Tabelle und Community (eine kleine
+#                   Aggregation über den Index CommunityId/DateTimeUtc)
+#   probe_sql_checksum: Zeilen + Wertsummen pro Tabelle (Watermark des
+#                   Daily-DAG, erkennt auch nachträgliche Korrekturen)
+# - source="store": Watermark des Stunden-Stores (src/series_store.py),
+#                   ganz ohne DB
+#
+# Ist im DataContext schon etwas geladen (verkettete Schritte), wird das
+# genommen – keine zusätzliche Abfrage.
+#
+# wait_for_data: Scheduler-Modus – pollt mit exponentiellem Backoff (+Jitter),
+# bis die Daten reichen oder das Timeout abläuft.
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import pandas as pd
+
+from src.config import DB_COMMUNITY_ID
+from src.utils.instrument import span
+
+QUERY_MAX_TS = """
+SELECT {alias}.CommunityId, MAX({alias}.DateTimeUtc) AS MaxDateTimeUtc
+FROM {schema}{table} {alias}
+WHERE {alias}.CommunityId IN ({community_ids})
+GROUP BY {alias}.CommunityId;
+"""
+
+# Zeilenzahl + Wertsummen: erkennt auch Korrekturen/Löschungen, die
+# MAX(DateTimeUtc) nicht verschieben (ein Scan über die Community)
+QUERY_TABLE_CHECKSUM = """
+SELECT COUNT(*) AS N, SUM({alias}.{value}) AS S1, SUM({alias}.{value}Community) AS S2
+FROM {schema}{table} {alias}
+WHERE {alias}.CommunityId = {community_id};
+"""
+
+# Tabelle → Alias wie in QUERY_GEN / QUERY_CON
+TABLES = {
+    "MeterConsumption": "MC",
+    "MeterGeneration": "MG",
+}
+
+# Tabelle → Wertspalte (Summen in QUERY_TABLE_CHECKSUM)
+VALUE_COLUMNS = {
+    "MeterConsumption": "Consumption",
+    "MeterGeneration": "Generation",
+}
+
+# Forecast hängt nur an der Consumption (Generation liefert die PLZ-Liste
+# für ERA5 und ändert sich nicht täglich) → nur sie entscheidet
+REQUIRED_TABLE = "MeterConsumption"
+
+INITIAL_DELAY_S = 60.0
+MAX_DELAY_S = 900.0
+BACKOFF_FACTOR = 2.0
+JITTER = 0.1
+
+
+class Freshness(NamedTuple):
+    latest: Optional[pd.Timestamp]      # neuester Zeitstempel (UTC) der REQUIRED_TABLE
+    required: pd.Timestamp              # so weit müssen die Daten reichen
+    source: str
+    tables: dict                        # Tabelle → neuester Zeitstempel
+
+    @property
+    def ready(self) -> bool:
+        return self.latest is not None and self.latest >= self.required
+
+    @property
+    def missing(self) -> Optional[pd.Timedelta]:
+        if self.ready:
+            return pd.Timedelta(0)
+        return None if self.latest is None else self.required - self.latest
+
+
+# ============================================================
+# Zielzeitpunkt
+# ============================================================
+
+def required_until(forecast_start: pd.Timestamp, freq: str = "1h", partial: bool = False) -> pd.Timestamp:
+    """
+    Bis wann die Consumption reichen muss, damit fit_predict_day Test-Zeilen
+    hat: letzter Slot des Zieltags (partial=True: erster Slot reicht).
+    """
+    forecast_start = _utc(forecast_start)
+    if partial:
+        return forecast_start
+    return forecast_start + pd.Timedelta(days=1) - pd.Timedelta(freq)
+
+
+def _utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+# ============================================================
+# Probes
+# ============================================================
+
+def render_max_query(table: str, engine, community_ids: Iterable[int]) -> str:
+    from src.extract import SCHEMA_PREFIX
+
+    return QUERY_MAX_TS.format(
+        alias=TABLES[table],
+        schema=SCHEMA_PREFIX.get(engine.dialect.name, ""),
+        table=table,
+        community_ids=", ".join(str(int(i)) for i in community_ids),
+    )
+
+
+def probe_sql(
+    engine=None,
+    community_ids: int | Iterable[int] = DB_COMMUNITY_ID,
+) -> dict[int, dict[str, Optional[pd.Timestamp]]]:
+    """
+    MAX(DateTimeUtc) pro Tabelle und Community (ein Round-Trip pro Tabelle).
+    Community ohne Zeilen → None.
+    """
+    if engine is None:
+        from src.db import get_engine
+
+        engine = get_engine()
+
+    ids = [community_ids] if isinstance(community_ids, int) else [int(c) for c in community_ids]
+    out: dict[int, dict[str, Optional[pd.Timestamp]]] = {cid: {} for cid in ids}
+
+    for table in TABLES:
+        with span("freshness.sql_max", table=table):
+            df = pd.read_sql(render_max_query(table, engine, ids), engine)
+        # SQLite liefert MAX() als Text → hier einheitlich parsen
+        latest = dict(zip(
+            df["CommunityId"].astype(int),
+            pd.to_datetime(df["MaxDateTimeUtc"], utc=True),
+        ))
+        for cid in ids:
+            ts = latest.get(cid)
+            out[cid][table] = None if ts is None or pd.isna(ts) else ts
+
+    return out
+
+
+def probe_sql_checksum(engine=None, community_id: int = DB_COMMUNITY_ID) -> dict[str, list]:
+    """[Zeilen, Summe Wert, Summe Community-Wert] pro Tabelle einer Community."""
+    from src.extract import SCHEMA_PREFIX
+
+    if engine is None:
+        from src.db import get_engine
+
+        engine = get_engine()
+
+    out = {}
+    for table, alias in TABLES.items():
+        with span("freshness.sql_checksum", table=table):
+            r = pd.read_sql(QUERY_TABLE_CHECKSUM.format(
+                alias=alias, value=VALUE_COLUMNS[table], table=table,
+                schema=SCHEMA_PREFIX.get(engine.dialect.name, ""),
+                community_id=int(community_id),
+            ), engine).iloc[0]
+        out[table] = [int(r.N), round(float(r.S1 or 0.0), 6), round(float(r.S2 or 0.0), 6)]
+    return out
+
+
+def probe_store(community_id: int = DB_COMMUNITY_ID) -> Optional[pd.Timestamp]:
+    """Watermark des Stunden-Stores (letzte übernommene Stunde) oder None."""
+    from src.config import community_path
+    from src.series_store import SERIES_DIR, HourlySeriesStore
+
+    wm = HourlySeriesStore(community_path(SERIES_DIR, community_id)).watermark
+    return None if wm is None else _utc(wm)
+
+
+def _loaded_latest(ctx) -> Optional[pd.Timestamp]:
+    """Neuester Zeitstempel aus bereits geladenen Daten im Kontext (sonst None)."""
+    if ctx is None:
+        return None
+    if ctx._prep is not None:
+        s = ctx.consumption_1h().dropna()
+        return _utc(s.index.max()) if len(s) else None
+    if ctx._raw is not None:
+        ts = ctx.df_con_raw["DateTimeUtc"]
+        return _utc(pd.to_datetime(ts, utc=True).max()) if len(ts) else None
+    return None
+
+
+def check_freshness(
+    forecast_start: pd.Timestamp,
+    community_id: int = DB_COMMUNITY_ID,
+    freq: str = "1h",
+    source: str = "sql",
+    partial: bool = False,
+    ctx=None,
+    engine=None,
+) -> Freshness:
+    """
+    Ein Blick auf den neuesten Zeitstempel. ctx mit geladenen Daten hat
+    Vorrang (source="context"), sonst SQL bzw. Store-Watermark.
+    """
+    required = required_until(forecast_start, freq, partial)
+
+    latest = _loaded_latest(ctx)
+    if latest is not None:
+        return Freshness(latest, required, "context", {REQUIRED_TABLE: latest})
+
+    if source == "sql":
+        tables = probe_sql(engine, community_id)[community_id]
+        return Freshness(tables[REQUIRED_TABLE], required, source, tables)
+    if source == "store":
+        wm = probe_store(community_id)
+        # Watermark = Beginn der letzten Stunde → im 15min-Modus ist die
+        # Stunde bis :45 vollständig
+        if wm is not None and pd.Timedelta(freq) < pd.Timedelta("1h"):
+            wm = wm + pd.Timedelta("1h") - pd.Timedelta(freq)
+        return Freshness(wm, required, source, {"series_store": wm})
+    raise ValueError(f"Unbekannte Freshness-Quelle: {source}")
+
+
+def describe(f: Freshness) -> str:
+    latest = "keine Daten" if f.latest is None else f"{f.latest:%Y-%m-%d %H:%M}"
+    status = "bereit" if f.ready else (
+        "fehlt" if f.missing is None else f"es fehlen {f.missing}"
+    )
+    return f"neueste Consumption {latest} UTC, benötigt {f.required:%Y-%m-%d %H:%M} UTC ({f.source}) → {status}"
+
+
+# ============================================================
+# Scheduler
+# ============================================================
+
+def backoff_delays(
+    initial: float = INITIAL_DELAY_S,
+    maximum: float = MAX_DELAY_S,
+    factor: float = BACKOFF_FACTOR,
+    jitter: float = JITTER,
+    rng: Optional[random.Random] = None,
+):
+    """Unendliche Folge von Wartezeiten: initial·factor^k, gedeckelt, ±jitter."""
+    rng = rng or random.Random()
+    delay = initial
+    while True:
+        yield min(delay, maximum) * (1 + rng.uniform(-jitter, jitter))
+        delay *= factor
+
+
+def wait_for_data(
+    forecast_start: pd.Timestamp,
+    community_id: int = DB_COMMUNITY_ID,
+    freq: str = "1h",
+    source: str = "sql",
+    partial: bool = False,
+    timeout_s: float = 6 * 3600,
+    initial_delay_s: float = INITIAL_DELAY_S,
+    max_delay_s: float = MAX_DELAY_S,
+    factor: float = BACKOFF_FACTOR,
+    ctx=None,
+    engine=None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> Freshness:
+    """
+    Pollt check_freshness, bis die Daten reichen oder timeout_s abgelaufen
+    ist (letzte Wartezeit wird aufs Restbudget gekürzt). Rückgabe: letzte
+    Freshness – .ready sagt, ob der teure Lauf starten soll.
+
+    Ein geladener ctx wird nur beim ersten Blick genutzt: die Daten darin
+    werden durch Warten nicht frischer → reichen sie nicht, wird der
+    Kontext verworfen (ctx.invalidate) und danach direkt geprobt.
+    """
+    deadline = clock() + timeout_s
+    delays = backoff_delays(initial_delay_s, max_delay_s, factor)
+    attempt = 1
+
+    f = check_freshness(forecast_start, community_id, freq, source, partial, ctx=ctx, engine=engine)
+    while True:
+        print(f" Freshness #{attempt}: {describe(f)}")
+        if f.ready:
+            return f
+
+        remaining = deadline - clock()
+        if remaining <= 0:
+            if timeout_s > 0:
+                print(f" ⏱️ Timeout nach {timeout_s / 60:.0f} min – Daten für {f.required.date()} fehlen weiterhin")
+            return f
+
+        if f.source == "context":
+            ctx.invalidate()
+        delay = min(next(delays), remaining)
+        print(f"  nächster Versuch in {delay:.0f}s")
+        sleep(delay)
+        attempt += 1
+        f = check_freshness(forecast_start, community_id, freq, source, partial, engine=engine)
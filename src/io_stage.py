@@ -0,0 +1,241 @@
+# src/io_stage.py
+#
+# Parallele I/O-Stage vor dem Feature-Bau: SQL-Pull (Generation und
+# Consumption als getrennte Abfragen), ERA5-CSV pro aktiver PLZ und
+# APG-Spotpreise hängen nicht voneinander ab und laufen gemeinsam in einem
+# begrenzten Thread-Pool statt nacheinander. Ergebnisse landen im
+# DataContext (ctx._raw, ctx.load_era5-, ctx.spot_prices-Cache) – danach
+# laufen Forecast/Evaluation unverändert, nur ohne Wartezeit.
+#
+#   sql_gen ──► aktive PLZ ──► era5_sync ──► era5:<PLZ> …
+#   sql_con
+#   spot:<Tag> …
+#
+# Latenz ≈ langsamster Pfad (meist SQL) statt Summe aller Fetches.
+#
+# Abbruch-Politik:
+# - Pflicht (SQL) schlägt fehl oder ist beim Gesamt-Timeout noch offen →
+#   noch nicht gestartete Tasks werden storniert, Cancel-Flag gesetzt,
+#   Fehler/TimeoutError nach oben. Laufende Threads lassen sich nicht
+#   abbrechen – sie laufen im Hintergrund zu Ende, ihre Ergebnisse werden
+#   verworfen.
+# - Timeout mit nur noch optionalen Tasks offen → diese werden verworfen
+#   (Warnung, TaskResult ok=False), die Stage endet normal; die Pflicht-
+#   Ergebnisse bleiben gültig.
+# - Optional (ERA5, Spot) schlägt fehl → Warnung; der Verbraucher lädt
+#   später selbst (und scheitert ggf. dort mit der eigentlichen Meldung).
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+from typing import Callable, Iterable, NamedTuple, Optional
+
+import pandas as pd
+
+from src.context import DataContext
+from src.utils.instrument import span
+
+MAX_WORKERS = 6
+TIMEOUT_S = 900.0
+LOOKBACK_DAYS = 42
+
+
+class TaskResult(NamedTuple):
+    name: str
+    seconds: float
+    ok: bool
+    error: Optional[str] = None
+
+
+class IOStageCancelled(RuntimeError):
+    pass
+
+
+# ============================================================
+# Stage
+# ============================================================
+
+class IOStage:
+    """
+    Begrenzter Thread-Pool mit Deadline. Tasks können Folge-Tasks
+    einreichen (z.B. ERA5 erst nach den Generation-Rohdaten).
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, timeout_s: float = TIMEOUT_S):
+        self.max_workers = max_workers
+        self.timeout_s = timeout_s
+        self.cancelled = threading.Event()
+        self.results: list[TaskResult] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._futures: dict = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, fn: Callable, required: bool = False, then: Optional[Callable] = None) -> None:
+        """then(result): läuft im Worker direkt danach (darf weitere Tasks einreichen)."""
+        def task():
+            if self.cancelled.is_set():
+                raise IOStageCancelled(name)
+            t0 = time.perf_counter()
+            with span(f"io.{name.split(':')[0]}", task=name):
+                out = fn()
+            seconds = time.perf_counter() - t0
+            if then is not None and not self.cancelled.is_set():
+                then(out)
+            return seconds
+
+        with self._lock:
+            self._futures[self._pool.submit(task)] = (name, required)
+
+    def run(self, start: Callable[["IOStage"], None]) -> list[TaskResult]:
+        """start(stage) reicht die ersten Tasks ein; wartet auf alle inkl. Folge-Tasks."""
+        deadline = time.monotonic() + self.timeout_s
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="io")
+        try:
+            start(self)
+            while True:
+                with self._lock:
+                    pending = dict(self._futures)
+                if not pending:
+                    break
+
+                remaining = deadline - time.monotonic()
+                done, _ = wait(pending, timeout=max(remaining, 0.0), return_when=FIRST_COMPLETED)
+                if not done:
+                    self._deadline()
+                    break
+
+                for fut in done:
+                    with self._lock:
+                        name, required = self._futures.pop(fut)
+                    try:
+                        self.results.append(TaskResult(name, fut.result(), True))
+                    except Exception as e:
+                        self.results.append(TaskResult(name, 0.0, False, f"{type(e).__name__}: {e}"))
+                        if required:
+                            self._cancel()
+                            raise
+                        print(f" ⚠️ I/O {name} fehlgeschlagen ({type(e).__name__}: {e}) – wird später nachgeladen")
+        finally:
+            # wait=False: hängende Fetches blockieren den Aufrufer nicht
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        return self.results
+
+    def _deadline(self) -> None:
+        """Pflicht noch offen → TimeoutError; sonst optionale Tasks verwerfen."""
+        with self._lock:
+            pending = dict(self._futures)
+        names = sorted(name for name, _ in pending.values())
+        self._cancel()
+        if any(required for _, required in pending.values()):
+            raise TimeoutError(f"I/O-Stage nach {self.timeout_s:g}s abgebrochen, offen: {names}")
+
+        for name, _ in pending.values():
+            self.results.append(TaskResult(name, 0.0, False, "Timeout"))
+        print(f" ⚠️ I/O-Deadline nach {self.timeout_s:g}s, verworfen: {names} – wird später nachgeladen")
+
+    def _cancel(self) -> None:
+        self.cancelled.set()
+        with self._lock:
+            for fut in self._futures:
+                fut.cancel()
+
+
+# ============================================================
+# Pipeline-Fetches
+# ============================================================
+
+def prefetch(
+    ctx: DataContext,
+    train_start: Optional[pd.Timestamp] = None,
+    use_temperature: bool = False,
+    spot_days: Iterable[date] = (),
+    lookback_days: int = LOOKBACK_DAYS,
+    max_workers: int = MAX_WORKERS,
+    timeout_s: float = TIMEOUT_S,
+    engine=None,
+    sql: bool = True,
+) -> list[TaskResult]:
+    """
+    Lädt parallel in ctx, was noch fehlt:
+    - SQL-Rohdaten (nur prep_engine="pandas"; Generation ∥ Consumption, + Parquet)
+    - use_temperature: ERA5-Coverage + CSV der aktiven PLZ (braucht train_start)
+    - Spotpreise für spot_days
+    Bereits im Kontext Vorhandenes wird übersprungen; sql=False: kein SQL-Pull.
+    """
+    from src.weather.temperature import ERA5_DIR
+
+    need_raw = sql and ctx._raw is None and ctx._prep is None and ctx.prep_engine == "pandas"
+    spot_days = [d for d in dict.fromkeys(spot_days) if (d, ctx.freq) not in ctx._spot]
+    if use_temperature and train_start is None:
+        raise ValueError("prefetch: use_temperature braucht train_start (aktive PLZ)")
+
+    raw: dict[str, pd.DataFrame] = {}
+
+    def start_era5(stage: IOStage, df_gen_raw: pd.DataFrame) -> None:
+        from src.weather.era5_autofill import ensure_era5_coverage
+        from src.weather.plz_weights import get_active_plz
+
+        try:
+            weights = get_active_plz(df_gen_raw, reference_time=train_start, lookback_days=lookback_days)
+        except ValueError as e:
+            # optional: build_temperature_series meldet das später selbst
+            print(f" ⚠️ I/O era5 übersprungen: {e}")
+            return
+        todo = [str(plz) for plz in weights.index if str(plz) not in ctx._era5]
+
+        def load_all(_):
+            for plz in todo:
+                stage.submit(f"era5:{plz}", lambda plz=plz: ctx.load_era5(plz, ERA5_DIR))
+
+        # Coverage (ggf. Download) einmal, danach die CSVs parallel
+        stage.submit(
+            "era5_sync",
+            lambda: ensure_era5_coverage(df_gen_raw, ERA5_DIR, reference_day=train_start.date(),
+                                         lookback_days=lookback_days),
+            then=load_all,
+        )
+
+    def start(stage: IOStage) -> None:
+        if need_raw:
+            from src.db import get_engine
+            from src.extract import QUERY_CON, QUERY_GEN, read_table
+
+            eng = engine or get_engine()
+
+            def got_gen(df):
+                raw["gen"] = df
+                if use_temperature:
+                    start_era5(stage, df)
+
+            stage.submit("sql_gen", lambda: read_table(eng, QUERY_GEN, ctx.community_id),
+                         required=True, then=got_gen)
+            stage.submit("sql_con", lambda: read_table(eng, QUERY_CON, ctx.community_id),
+                         required=True, then=lambda df: raw.__setitem__("con", df))
+        elif use_temperature:
+            stage.submit("raw", lambda: ctx.df_gen_raw, required=True,
+                         then=lambda df: start_era5(stage, df))
+
+        for day in spot_days:
+            stage.submit(f"spot:{day}", lambda day=day: ctx.spot_prices(day))
+
+    stage = IOStage(max_workers=max_workers, timeout_s=timeout_s)
+    t0 = time.perf_counter()
+    with span("io.prefetch", n_spot=len(spot_days), use_temperature=use_temperature):
+        results = stage.run(start)
+    wall = time.perf_counter() - t0
+
+    if need_raw:
+        from src.extract import save_raw
+
+        ctx._raw = (raw["gen"], raw["con"])
+        save_raw(raw["gen"], raw["con"], ctx.community_id)
+
+    if results:
+        serial = sum(r.seconds for r in results)
+        slowest = max(results, key=lambda r: r.seconds)
+        print(f" I/O-Stage: {len(results)} Fetches in {wall:.1f}s "
+              f"(nacheinander {serial:.1f}s, langsamster {slowest.name} {slowest.seconds:.1f}s)")
+    return results
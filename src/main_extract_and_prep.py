@@ -1,24 +1,29 @@
-import os
-import plotly.graph_objects as go
+import argparse
 from pathlib import Path
 
 from src.extract import extract_raw
 from src.prep import run_full_preparation
+from src.utils.plotting import line_trace, write_html
 
 
 PLOT_DIR = Path("plots/prep")
-PLOT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def plot_consumption_vs_generation():
+    import plotly.graph_objects as go  # lazy: nur beim Plotten laden
+
     # --------------------------------------------------
     # 1) Daten laden & aufbereiten
     # --------------------------------------------------
     df_gen_raw, df_con_raw = extract_raw()
     data = run_full_preparation(df_gen_raw, df_con_raw)
 
-    consumption = data["consumption_1h"]
-    generation_by_source = data["generation_1h_by_source"]
+    # 1D-Reihen (Community-Anteil) – DataFrame.values wäre 2D
+    consumption = data["consumption_1h"]["ConsumptionCommunity"]
+    generation_by_source = {
+        source: df["GenerationCommunity"]
+        for source, df in data["generation_1h_by_source"].items()
+    }
 
     # --------------------------------------------------
     # 2) Plot
@@ -26,7 +31,7 @@ def plot_consumption_vs_generation():
     fig = go.Figure()
 
     # Consumption – Rot
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=consumption.index,
         y=consumption.values,
         mode="lines",
@@ -44,7 +49,7 @@ def plot_consumption_vs_generation():
     }
 
     for source, series in generation_by_source.items():
-        fig.add_trace(go.Scatter(
+        fig.add_trace(line_trace(
             x=series.index,
             y=series.values,
             mode="lines",
@@ -54,7 +59,7 @@ def plot_consumption_vs_generation():
         
     gen_total = sum(generation_by_source.values())
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=gen_total.index,
         y=gen_total.values,
         mode="lines",
@@ -81,10 +86,14 @@ def plot_consumption_vs_generation():
     # 4) Speichern
     # --------------------------------------------------
     out_path = PLOT_DIR / "consumption_vs_generation.html"
-    fig.write_html(out_path)
+    write_html(fig, out_path)
 
     print(f" Plot gespeichert: {out_path}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="SQL-Extract + Aufbereitung + Plot Consumption vs Generation",
+    )
+    parser.parse_args()
     plot_consumption_vs_generation()
@@ -2,7 +2,9 @@ import pandas as pd
 
 
 from pathlib import Path
-import plotly.graph_objects as go
+
+from src.utils.instrument import span, timed
+from src.utils.plotting import line_trace, write_html
 
 
 # 1) Netzbetreiber -> Bundesland
@@ -36,21 +38,21 @@ def add_state_columns(df_gen_raw: pd.DataFrame, df_con_raw: pd.DataFrame):
 
     return df_gen_raw, df_con_raw
 
-def aggregate_consumption_1h(df_con_raw: pd.DataFrame) -> pd.DataFrame:
+def aggregate_consumption_1h(df_con_raw: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
     df = df_con_raw.copy()
     df["DateTimeUtc"] = pd.to_datetime(df["DateTimeUtc"], utc=True)
 
     sum_cols = ["Consumption", "ConsumptionCommunity"]
     df_agg = (
         df.set_index("DateTimeUtc")[sum_cols]
-        .resample("1h")
+        .resample(freq)
         .sum(min_count=1)
         .reset_index()
         .set_index("DateTimeUtc")
     )
     return df_agg
 
-def resample_generation_1h(df_gen_raw: pd.DataFrame) -> pd.DataFrame:
+def resample_generation_1h(df_gen_raw: pd.DataFrame, freq: str = "1h") -> pd.DataFrame:
     df = df_gen_raw.copy()
     df["DateTimeUtc"] = pd.to_datetime(df["DateTimeUtc"], utc=True)
 
@@ -58,22 +60,24 @@ def resample_generation_1h(df_gen_raw: pd.DataFrame) -> pd.DataFrame:
     # pragmatisch: wir nehmen nur die beiden relevanten Summen
     df_agg = (
         df.set_index("DateTimeUtc")[["Generation", "GenerationCommunity"]]
-        .resample("1h")
+        .resample(freq)
         .sum(min_count=1)
         .reset_index()
         .set_index("DateTimeUtc")
     )
     return df_agg
 
-def prepare_generation_by_source_1h(df_gen_raw: pd.DataFrame) -> dict:
-    energy_source_map = {
-        '1': 'pv_sued',
-        '2': 'pv_ostwest',
-        '3': 'water',
-        '4': 'wind',
-        '5': 'biomass',
-        'G1': 'pv_all'
-    }
+ENERGY_SOURCE_MAP = {
+    '1': 'pv_sued',
+    '2': 'pv_ostwest',
+    '3': 'water',
+    '4': 'wind',
+    '5': 'biomass',
+    'G1': 'pv_all'
+}
+
+def prepare_generation_by_source_1h(df_gen_raw: pd.DataFrame, freq: str = "1h") -> dict:
+    energy_source_map = ENERGY_SOURCE_MAP
 
     df = df_gen_raw.copy()
     df["DateTimeUtc"] = pd.to_datetime(df["DateTimeUtc"], utc=True)
@@ -88,33 +92,39 @@ def prepare_generation_by_source_1h(df_gen_raw: pd.DataFrame) -> dict:
         gen_1h[name] = (
             df_part
             .set_index("DateTimeUtc")[["Generation", "GenerationCommunity"]]
-            .resample("1h")
+            .resample(freq)
             .sum(min_count=1)
         )
 
     return gen_1h
 
 
+@timed("run_full_preparation")
 def run_full_preparation(df_gen_raw: pd.DataFrame,
-                          df_con_raw: pd.DataFrame):
+                          df_con_raw: pd.DataFrame,
+                          freq: str = "1h"):
     """
     Zentrale Datenaufbereitung:
     - Bundesland
-    - 1h Aggregation
+    - 1h Aggregation (freq="15min": Viertelstunden, Schlüssel bleiben *_1h)
     - Generation nach Source
     """
 
     # 1) Bundesländer
-    df_gen_raw, df_con_raw = add_state_columns(df_gen_raw, df_con_raw)
+    with span("prep.state_columns", rows=len(df_gen_raw) + len(df_con_raw)):
+        df_gen_raw, df_con_raw = add_state_columns(df_gen_raw, df_con_raw)
 
     # 2) Consumption 1h
-    con_1h = aggregate_consumption_1h(df_con_raw)
+    with span("prep.consumption_1h", rows=len(df_con_raw)):
+        con_1h = aggregate_consumption_1h(df_con_raw, freq)
 
     # 3) Generation gesamt 1h
-    gen_1h_total = resample_generation_1h(df_gen_raw)
+    with span("prep.generation_1h_total", rows=len(df_gen_raw)):
+        gen_1h_total = resample_generation_1h(df_gen_raw, freq)
 
     # 4) Generation nach Source 1h
-    gen_1h_by_source = prepare_generation_by_source_1h(df_gen_raw)
+    with span("prep.generation_1h_by_source", rows=len(df_gen_raw)):
+        gen_1h_by_source = prepare_generation_by_source_1h(df_gen_raw, freq)
 
     return {
         "consumption_1h": con_1h,
@@ -129,6 +139,8 @@ def plot_consumption_vs_generation(
     generation_by_source: dict,
     out_dir: Path
 ):
+    import plotly.graph_objects as go  # lazy: plotly nur laden, wenn geplottet wird
+
     out_dir.mkdir(parents=True, exist_ok=True)
     
     if "ConsumptionCommunity" not in consumption_1h.columns:
@@ -138,7 +150,7 @@ def plot_consumption_vs_generation(
     fig = go.Figure()
 
     # Consumption
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=consumption_1h.index,
         y=consumption_1h["ConsumptionCommunity"],
         name="Consumption Community",
@@ -155,7 +167,7 @@ def plot_consumption_vs_generation(
     }
 
     for src, df in generation_by_source.items():
-        fig.add_trace(go.Scatter(
+        fig.add_trace(line_trace(
             x=df.index,
             y=df["GenerationCommunity"],
             name=f"Generation {src}",
@@ -169,7 +181,7 @@ def plot_consumption_vs_generation(
     )
 
     out_path = out_dir / "consumption_vs_generation.html"
-    fig.write_html(out_path)
+    write_html(fig, out_path)
 
     print(f" Plot gespeichert: {out_path}")
 
@@ -177,11 +189,13 @@ def plot_consumption_only(
     consumption_1h: pd.DataFrame,
     out_dir: Path
 ):
+    import plotly.graph_objects as go  # lazy: plotly nur laden, wenn geplottet wird
+
     out_dir.mkdir(parents=True, exist_ok=True)
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(line_trace(
         x=consumption_1h.index,
         y=consumption_1h["ConsumptionCommunity"],
         mode="lines",
@@ -198,6 +212,6 @@ def plot_consumption_only(
     )
 
     out_path = out_dir / "consumption_only.html"
-    fig.write_html(out_path)
+    write_html(fig, out_path)
 
     print(f"📈 Consumption-Plot gespeichert: {out_path}")
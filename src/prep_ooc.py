@@ -0,0 +1,113 @@
+# src/prep_ooc.py
+#
+# Out-of-Core-Variante von run_full_preparation:
+# DuckDB aggregiert direkt auf dem partitionierten Raw-Parquet
+# (RAW_DIR/gen, RAW_DIR/con – siehe extract_raw_partitioned), nur die
+# stündlichen Ergebnisse landen in pandas. Speicher ist über
+# memory_limit begrenzt (DuckDB spillt bei Bedarf auf Disk).
+#
+# Ergebnis hat dieselbe Struktur wie prep.run_full_preparation.
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from src.extract import RAW_CON_DATASET, RAW_GEN_DATASET
+from src.prep import ENERGY_SOURCE_MAP
+
+
+def _connect(memory_limit: str, threads: int | None):
+    import duckdb  # lazy: nur für den Out-of-Core-Pfad nötig
+
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    con.execute(f"SET memory_limit = '{memory_limit}'")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def _scan(root: Path) -> str:
+    return f"read_parquet('{(root / '**' / '*.parquet').as_posix()}', hive_partitioning = true)"
+
+
+def _to_hourly(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    """
+    DuckDB liefert nur Stunden mit Daten → auf lückenloses 1h-Raster bringen
+    (wie resample("1h").sum(min_count=1)).
+    """
+    idx = pd.DatetimeIndex(df["DateTimeUtc"])
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+    out = pd.DataFrame(df[cols].to_numpy(float), index=idx, columns=cols)
+    out.index.name = "DateTimeUtc"
+
+    if out.empty:
+        return out
+
+    full = pd.date_range(out.index.min(), out.index.max(), freq="1h", name="DateTimeUtc")
+    return out.reindex(full)
+
+
+def run_full_preparation_ooc(
+    gen_root: Path = RAW_GEN_DATASET,
+    con_root: Path = RAW_CON_DATASET,
+    memory_limit: str = "2GB",
+    threads: int | None = None,
+) -> dict:
+    """
+    Zentrale Datenaufbereitung (Out-of-Core):
+    - Consumption 1h
+    - Generation gesamt 1h
+    - Generation nach Source 1h
+    """
+    con = _connect(memory_limit, threads)
+
+    # 1) Consumption 1h
+    con_1h = con.execute(f"""
+        SELECT date_trunc('hour', DateTimeUtc) AS DateTimeUtc,
+               SUM(Consumption)          AS Consumption,
+               SUM(ConsumptionCommunity) AS ConsumptionCommunity
+        FROM {_scan(con_root)}
+        GROUP BY 1
+        ORDER BY 1
+    """).df()
+
+    # 2) Generation gesamt 1h
+    gen_total = con.execute(f"""
+        SELECT date_trunc('hour', DateTimeUtc) AS DateTimeUtc,
+               SUM(Generation)          AS Generation,
+               SUM(GenerationCommunity) AS GenerationCommunity
+        FROM {_scan(gen_root)}
+        GROUP BY 1
+        ORDER BY 1
+    """).df()
+
+    # 3) Generation nach Source 1h (ein Scan für alle Quellen)
+    gen_src = con.execute(f"""
+        SELECT CAST(EnergySource AS VARCHAR)   AS EnergySource,
+               date_trunc('hour', DateTimeUtc) AS DateTimeUtc,
+               SUM(Generation)          AS Generation,
+               SUM(GenerationCommunity) AS GenerationCommunity
+        FROM {_scan(gen_root)}
+        WHERE CAST(EnergySource AS VARCHAR) IN ({", ".join(f"'{k}'" for k in ENERGY_SOURCE_MAP)})
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """).df()
+
+    con.close()
+
+    gen_cols = ["Generation", "GenerationCommunity"]
+    gen_1h_by_source = {}
+    for key, name in ENERGY_SOURCE_MAP.items():
+        part = gen_src[gen_src["EnergySource"] == key]
+        if len(part) == 0:
+            continue
+        gen_1h_by_source[name] = _to_hourly(part, gen_cols)
+
+    return {
+        "consumption_1h": _to_hourly(con_1h, ["Consumption", "ConsumptionCommunity"]),
+        "generation_1h_total": _to_hourly(gen_total, gen_cols),
+        "generation_1h_by_source": gen_1h_by_source,
+    }
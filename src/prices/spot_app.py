@@ -1,7 +1,6 @@
 from datetime import date, timedelta
 from io import BytesIO
 import pandas as pd
-import requests
 
 
 def read_spot_price_hourly(day: date) -> pd.DataFrame:
@@ -10,6 +9,19 @@ def read_spot_price_hourly(day: date) -> pd.DataFrame:
         DateTimeUtc | spot_eur_per_mwh
         (24 rows)
     """
+    return read_spot_price(day, freq="1h")
+
+
+def read_spot_price(day: date, freq: str = "1h") -> pd.DataFrame:
+    """
+    EXAA-Preise für einen Tag.
+    freq="1h": Stundenmittel (wie bisher), freq="15min": Viertelstunden,
+    DateTimeUtc = Beginn der Viertelstunde (wie die Zählerdaten).
+
+    Returns:
+        DateTimeUtc | spot_eur_per_mwh
+        (24 bzw. 96 rows)
+    """
     if day > date.today() + timedelta(days=1):
         raise ValueError("Date cannot be after tomorrow")
 
@@ -25,6 +37,8 @@ def read_spot_price_hourly(day: date) -> pd.DataFrame:
         + "?p_exaaMode=EXAA_Full&resolution=PT15M"
     )
 
+    import requests  # lazy: nur laden, wenn wirklich Preise geholt werden
+
     r = requests.get(url, timeout=30)
     r.raise_for_status()
 
@@ -34,6 +48,9 @@ def read_spot_price_hourly(day: date) -> pd.DataFrame:
 
     df.columns = df.columns.str.replace("\ufeff", "").str.strip()
 
+    if freq != "1h":
+        return _spot_quarter_hourly(df, day)
+
     df = df.drop(
         columns=[
             "Time from [CET/CEST]",
@@ -86,3 +103,22 @@ def read_spot_price_hourly(day: date) -> pd.DataFrame:
     
     
     return df_hourly
+
+
+def _spot_quarter_hourly(df: pd.DataFrame, day: date) -> pd.DataFrame:
+    ts = (
+        pd.to_datetime(df["Time from [CET/CEST]"])
+        .dt.tz_localize("Europe/Vienna", ambiguous="infer")
+        .dt.tz_convert("UTC")
+    )
+    out = pd.DataFrame({
+        "DateTimeUtc": ts,
+        "spot_eur_per_mwh": df["Price MC Auction [EUR/MWh]"].astype(float),
+    })
+
+    # exakt Forecast-Tag in UTC
+    start_utc = pd.Timestamp(day, tz="UTC")
+    end_utc = start_utc + pd.Timedelta(days=1)
+    out = out[(out["DateTimeUtc"] >= start_utc) & (out["DateTimeUtc"] < end_utc)]
+
+    return out.reset_index(drop=True)
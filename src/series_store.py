@@ -0,0 +1,331 @@
+# src/series_store.py
+#
+# Inkrementell gepflegter Store für die aufbereiteten Stundenreihen
+# (statt consumption_1h.parquet / generation_1h_*.parquet jedes Mal neu):
+#
+#   data/processed/series/consumption/2025-02.parquet
+#   data/processed/series/generation_total/2025-02.parquet
+#   data/processed/series/generation_pv_sued/2025-02.parquet
+#   data/processed/series/_meta.json            (Watermark)
+#
+# - ingest(): aggregiert NUR die Stunden, die im neuen Raw-Batch vorkommen,
+#   und upsertet sie (späte Korrekturen überschreiben die alten Werte).
+#   Es werden nur die betroffenen Monatsdateien neu geschrieben.
+# - read(): beliebiger Zeitraum per Index-Slicing, ohne Rohdaten.
+# - refresh_series_store(): zieht das Korrekturfenster (Watermark − 3 Tage)
+#   und gleicht ältere Tage (bis reconcile_days) über eine billige
+#   Tages-Checksumme (COUNT/SUM pro Tag in SQL) ab – nur Tage, deren
+#   Checksumme sich seit dem letzten Lauf geändert hat, werden neu gezogen.
+#
+# Vertrag: Ein Batch enthält für jede Stunde, die er berührt, ALLE Rohzeilen
+# dieser Stunde (so liefert es extract_raw_since).
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import DB_COMMUNITY_ID, PROCESSED_DIR, community_path
+from src.prep import (
+    aggregate_consumption_1h,
+    prepare_generation_by_source_1h,
+    resample_generation_1h,
+)
+
+SERIES_DIR = PROCESSED_DIR / "series"
+
+CONSUMPTION = "consumption"
+GENERATION_TOTAL = "generation_total"
+SOURCE_PREFIX = "generation_"
+
+CORRECTION_DAYS = 3
+RECONCILE_DAYS = 35
+
+# Tages-Checksumme: Zeilen + Summen der Wertspalten pro Tag und Tabelle
+QUERY_DAY_CHECKSUM = """
+SELECT {day} AS Day, COUNT(*) AS N, SUM({alias}.{value}) AS S1, SUM({alias}.{value}Community) AS S2
+FROM {schema}{table} {alias}
+WHERE {alias}.CommunityId = {community_id}
+  AND {alias}.DateTimeUtc >= '{since}'
+  AND {alias}.DateTimeUtc < '{until}'
+GROUP BY {day};
+"""
+
+CHECKSUM_TABLES = {
+    "MeterConsumption": ("MC", "Consumption"),
+    "MeterGeneration": ("MG", "Generation"),
+}
+
+# Datum aus DateTimeUtc je Dialekt (Default: SQL-Standard)
+DAY_EXPR = {
+    "sqlite": "date({col})",
+}
+
+
+class HourlySeriesStore:
+
+    def __init__(self, root: Path = SERIES_DIR):
+        self.root = Path(root)
+
+    # --------------------------------------------------
+    # Metadaten
+    # --------------------------------------------------
+    @property
+    def _meta_path(self) -> Path:
+        return self.root / "_meta.json"
+
+    def _read_meta(self) -> dict:
+        if not self._meta_path.exists():
+            return {}
+        return json.loads(self._meta_path.read_text(encoding="utf-8"))
+
+    def _write_meta(self, meta: dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    def _update_meta(self, **values) -> None:
+        meta = self._read_meta()
+        meta.update(values)
+        self._write_meta(meta)
+
+    @property
+    def watermark(self) -> Optional[pd.Timestamp]:
+        """Letzte Stunde, die aus Rohdaten übernommen wurde (UTC)."""
+        wm = self._read_meta().get("watermark")
+        return pd.Timestamp(wm) if wm else None
+
+    @property
+    def checksums(self) -> dict:
+        """Tages-Checksummen des letzten Abgleichs: {Tabelle: {Tag: [N, S1, S2]}}."""
+        return self._read_meta().get("checksums", {})
+
+    def names(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    # --------------------------------------------------
+    # Schreiben
+    # --------------------------------------------------
+    def _month_path(self, name: str, month: pd.Period) -> Path:
+        return self.root / name / f"{month.strftime('%Y-%m')}.parquet"
+
+    def upsert(self, name: str, df: pd.DataFrame) -> int:
+        """
+        Überschreibt/ergänzt die Stunden aus df (Index = DateTimeUtc, UTC).
+        Gibt die Zahl der neu geschriebenen Monatsdateien zurück.
+        """
+        if df.empty:
+            return 0
+
+        months = df.index.tz_convert("UTC").tz_localize(None).to_period("M")
+        n = 0
+
+        for month, part in df.groupby(months):
+            path = self._month_path(name, month)
+            if path.exists():
+                old = pd.read_parquet(path)
+                merged = pd.concat([old.drop(index=part.index, errors="ignore"), part])
+            else:
+                merged = part
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".parquet.tmp")
+            merged.sort_index().to_parquet(tmp)
+            tmp.replace(path)
+            n += 1
+
+        return n
+
+    def ingest(self, df_gen_raw: pd.DataFrame, df_con_raw: pd.DataFrame) -> dict:
+        """
+        Neue/korrigierte Rohzeilen einspielen – nur die betroffenen Stunden
+        werden neu aggregiert.
+        """
+        written = {}
+
+        if not df_con_raw.empty:
+            con_1h = aggregate_consumption_1h(df_con_raw)
+            written[CONSUMPTION] = self.upsert(CONSUMPTION, con_1h)
+
+        if not df_gen_raw.empty:
+            written[GENERATION_TOTAL] = self.upsert(GENERATION_TOTAL, resample_generation_1h(df_gen_raw))
+            for src, df in prepare_generation_by_source_1h(df_gen_raw).items():
+                written[SOURCE_PREFIX + src] = self.upsert(SOURCE_PREFIX + src, df)
+
+        last = [
+            pd.to_datetime(df["DateTimeUtc"], utc=True).max().floor("h")
+            for df in (df_gen_raw, df_con_raw)
+            if not df.empty
+        ]
+        if last:
+            wm = max(last)
+            if self.watermark is not None:
+                wm = max(wm, self.watermark)
+            self._update_meta(watermark=wm.isoformat())
+
+        return written
+
+    # --------------------------------------------------
+    # Lesen
+    # --------------------------------------------------
+    def read(
+        self,
+        name: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """Stundenreihe [start, end] – es werden nur die nötigen Monatsdateien gelesen."""
+        folder = self.root / name
+        files = sorted(folder.glob("*.parquet"))
+        if not files:
+            raise KeyError(f"Reihe {name} nicht im Store")
+
+        def _utc(ts):
+            ts = pd.Timestamp(ts)
+            return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+        start = _utc(start) if start is not None else None
+        end = _utc(end) if end is not None else None
+
+        lo = start.tz_localize(None).to_period("M") if start is not None else None
+        hi = end.tz_localize(None).to_period("M") if end is not None else None
+
+        parts = []
+        for f in files:
+            month = pd.Period(f.stem, freq="M")
+            if (lo is not None and month < lo) or (hi is not None and month > hi):
+                continue
+            parts.append(pd.read_parquet(f))
+
+        if not parts:
+            return pd.read_parquet(files[0]).iloc[:0]
+
+        df = pd.concat(parts).sort_index().asfreq("1h")
+        return df.loc[start:end]
+
+    def to_prep(self) -> dict:
+        """Gleiche Struktur wie run_full_preparation – direkt aus dem Store."""
+        return {
+            "consumption_1h": self.read(CONSUMPTION),
+            "generation_1h_total": self.read(GENERATION_TOTAL),
+            "generation_1h_by_source": {
+                name[len(SOURCE_PREFIX):]: self.read(name)
+                for name in self.names()
+                if name.startswith(SOURCE_PREFIX) and name != GENERATION_TOTAL
+            },
+        }
+
+
+# ============================================================
+# Abgleich mit SQL
+# ============================================================
+
+def probe_day_checksums(
+    engine,
+    community_id: int,
+    since: pd.Timestamp,
+    until: pd.Timestamp,
+) -> dict:
+    """COUNT/SUM pro Tag und Tabelle in [since, until) – eine Aggregation pro Tabelle."""
+    from src.extract import SCHEMA_PREFIX, sql_ts
+
+    out = {}
+    for table, (alias, value) in CHECKSUM_TABLES.items():
+        day = DAY_EXPR.get(engine.dialect.name, "CAST({col} AS DATE)").format(col=f"{alias}.DateTimeUtc")
+        df = pd.read_sql(QUERY_DAY_CHECKSUM.format(
+            day=day, alias=alias, value=value, table=table,
+            schema=SCHEMA_PREFIX.get(engine.dialect.name, ""),
+            community_id=int(community_id), since=sql_ts(since), until=sql_ts(until),
+        ), engine)
+        out[table] = {
+            pd.Timestamp(r.Day).date().isoformat(): [int(r.N), float(r.S1 or 0.0), float(r.S2 or 0.0)]
+            for r in df.itertuples()
+        }
+    return out
+
+
+def changed_days(probe: dict, known: dict) -> list[str]:
+    """
+    Tage, deren Checksumme in irgendeiner Tabelle abweicht. Verglichen
+    werden nur Tage, die in beiden Proben vorkommen – das Fenster wandert
+    täglich, der herausfallende und der neu hinzukommende Tag sind keine
+    Korrektur.
+    """
+    days = set()
+    for table, current in probe.items():
+        before = known.get(table, {})
+        for day in current.keys() & before.keys():
+            a, b = current[day], before[day]
+            if a[0] != b[0] or not np.allclose(a[1:], b[1:], rtol=1e-9, atol=1e-9):
+                days.add(day)
+    return sorted(days)
+
+
+def _day_ranges(days: list[str]) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """Aufeinanderfolgende Tage zu [start, end)-Bereichen zusammenfassen."""
+    ranges = []
+    for day in (pd.Timestamp(d, tz="UTC") for d in sorted(days)):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1] = (ranges[-1][0], day + pd.Timedelta(days=1))
+        else:
+            ranges.append((day, day + pd.Timedelta(days=1)))
+    return ranges
+
+
+def refresh_series_store(
+    store: Optional[HourlySeriesStore] = None,
+    correction_days: int = CORRECTION_DAYS,
+    community_id: int = DB_COMMUNITY_ID,
+    reconcile_days: int = RECONCILE_DAYS,
+) -> HourlySeriesStore:
+    """
+    Inkrementeller Lauf: SQL ab (Watermark − correction_days) ziehen und
+    einspielen. Leerer Store → Voll-Extract.
+
+    Ältere Tage bis (Watermark − reconcile_days) werden per Tages-Checksumme
+    mit SQL abgeglichen; geänderte Tage (späte Korrekturen) werden neu
+    gezogen und upgesertet. Korrekturen davor erreicht nur ein Neuaufbau
+    (Store-Verzeichnis löschen) oder ein größeres reconcile_days.
+    """
+    from src.db import get_engine
+    from src.extract import extract_raw, extract_raw_since
+
+    store = store or HourlySeriesStore(community_path(SERIES_DIR, community_id))
+    wm = store.watermark
+
+    if wm is None:
+        df_gen_raw, df_con_raw = extract_raw(community_id)
+    else:
+        # Korrekturfenster: späte Nachlieferungen der letzten Tage mitnehmen
+        df_gen_raw, df_con_raw = extract_raw_since(
+            wm - pd.Timedelta(days=correction_days), community_id
+        )
+    written = store.ingest(df_gen_raw, df_con_raw)
+
+    # Abgleich der Tage vor dem Korrekturfenster (erster Lauf: nur Basis)
+    changed = []
+    wm = store.watermark
+    if wm is not None and reconcile_days > correction_days:
+        engine = get_engine()
+        until = (wm - pd.Timedelta(days=correction_days)).floor("D") + pd.Timedelta(days=1)
+        since = wm.floor("D") - pd.Timedelta(days=reconcile_days)
+        probe = probe_day_checksums(engine, community_id, since, until)
+
+        known = store.checksums
+        if known:
+            changed = changed_days(probe, known)
+            for start, end in _day_ranges(changed):
+                df_gen_raw, df_con_raw = extract_raw_since(start, community_id, until=end)
+                for name, n in store.ingest(df_gen_raw, df_con_raw).items():
+                    written[name] = written.get(name, 0) + n
+        store._update_meta(checksums=probe)
+
+    print(f" Series-Store aktualisiert ({store.root}): {written}")
+    if changed:
+        print(f" Korrekturen neu gezogen: {', '.join(changed)}")
+    return store
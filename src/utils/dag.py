@@ -0,0 +1,363 @@
+# src/utils/dag.py
+#
+# Kleiner inkrementeller DAG-Runner für Pipeline-Schritte.
+#
+#   nodes = [
+#       Node("extract", run=..., outputs=[raw_gen, raw_con], key=sql_max_ts, load=...),
+#       Node("prep", run=..., deps=["extract"], outputs=[consumption_path], load=...),
+#       ...
+#   ]
+#   DagRunner(nodes, state_path, max_workers=3).run()
+#
+# Fingerprint eines Knotens = Hash über
+#   - Name + params (z.B. Tag, Variante, Modellparameter)
+#   - key(): externer Zustand ohne Datei (z.B. MAX(DateTimeUtc) im SQL)
+#   - Fingerprints der Eingabedateien (inputs) und der Ausgaben aller deps
+# Ausgaben werden nach dem Lauf per Inhalts-Hash (bzw. Größe+mtime für
+# große Verzeichnisse) festgehalten. Ein Knoten ist aktuell, wenn sein
+# Fingerprint dem gespeicherten entspricht und die Ausgaben unverändert
+# auf der Platte liegen → übersprungen, und nur falls ein Nachfolger
+# wirklich läuft, werden seine Ausgaben per load() in den Speicher geholt.
+#
+# Unabhängige Knoten laufen parallel im Thread-Pool (I/O: SQL, HTTP, ERA5).
+# Fehler: die transitiven Nachfolger des fehlgeschlagenen Knotens werden
+# blockiert, unabhängige Zweige laufen weiter, der Zustand wird gespeichert. resume=True überspringt beim nächsten Lauf
+# alle erfolgreichen Knoten, auch wenn sich ihr externer key() oder ihr
+# max_age geändert hat → es geht beim fehlgeschlagenen Knoten weiter.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+import pandas as pd
+
+from src.utils.instrument import span
+
+HASH_CHUNK = 1 << 20
+
+# Status pro Knoten im Ergebnis von DagRunner.run
+OK, SKIPPED, FAILED, BLOCKED = "ok", "skipped", "failed", "blocked"
+
+
+# ============================================================
+# Fingerprints
+# ============================================================
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def path_fingerprint(path: Path, content: bool = True) -> Optional[str]:
+    """
+    Fingerprint einer Datei oder eines Verzeichnisses (rekursiv), None wenn
+    nicht vorhanden. content=True: Inhalts-Hash, sonst Größe + mtime.
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    h = hashlib.sha1()
+    for p in files:
+        h.update(str(p.relative_to(path) if p != path else p.name).encode())
+        if content:
+            h.update(_hash_file(p).encode())
+        else:
+            st = p.stat()
+            h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# ============================================================
+# Knoten
+# ============================================================
+
+class Node:
+    """
+    Ein Schritt im DAG.
+
+    run     : führt den Schritt aus (Ergebnis wird nicht weitergereicht –
+              Daten laufen über Dateien bzw. einen gemeinsamen Kontext)
+    deps    : Namen der Vorgänger
+    outputs : Dateien/Verzeichnisse, die run schreibt
+    inputs  : zusätzliche Eingabedateien außerhalb des DAG
+    key     : externer Zustand ohne Datei (z.B. SQL-Watermark), JSON-fähig
+    params  : alles, was das Ergebnis bestimmt (Tag, Variante, Parameter)
+    load    : holt die Ausgaben eines übersprungenen Knotens in den Speicher
+    content_hash: Ausgaben per Inhalt (True) oder Größe+mtime (False)
+    max_age : nach dieser Zeit ohne Lauf gilt der Knoten als veraltet
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], Any],
+        deps: Iterable[str] = (),
+        outputs: Iterable[Path] = (),
+        inputs: Iterable[Path] = (),
+        key: Optional[Callable[[], Any]] = None,
+        params: Optional[dict] = None,
+        load: Optional[Callable[[], Any]] = None,
+        content_hash: bool = True,
+        max_age: Optional[pd.Timedelta] = None,
+    ):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.outputs = [Path(p) for p in outputs]
+        self.inputs = [Path(p) for p in inputs]
+        self.key = key
+        self.params = params or {}
+        self.load = load
+        self.content_hash = content_hash
+        self.max_age = max_age
+
+    def __repr__(self) -> str:
+        return f"Node({self.name!r}, deps={self.deps})"
+
+    def output_fingerprint(self) -> Optional[str]:
+        fps = [path_fingerprint(p, self.content_hash) for p in self.outputs]
+        if any(fp is None for fp in fps):
+            return None
+        return _digest(fps)
+
+
+# ============================================================
+# Zustand
+# ============================================================
+
+class DagState:
+    """JSON-Datei {Knoten: {fingerprint, local, outputs, status, finished}}, thread-sicher."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.nodes: dict[str, dict] = (
+            json.loads(self.path.read_text(encoding="utf-8")).get("nodes", {})
+            if self.path.exists() else {}
+        )
+
+    def get(self, name: str) -> dict:
+        with self._lock:
+            return dict(self.nodes.get(name, {}))
+
+    def set(self, name: str, entry: dict) -> None:
+        with self._lock:
+            self.nodes[name] = entry
+            self._write()
+
+    def _write(self) -> None:
+        # erst temporär, dann umbenennen → kein halber Zustand nach Abbruch
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"nodes": self.nodes}, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+# ============================================================
+# Runner
+# ============================================================
+
+class DagRunner:
+
+    def __init__(self, nodes: Iterable[Node], state_path: Path, max_workers: int = 4):
+        self.nodes = {n.name: n for n in nodes}
+        self.order = self._toposort()
+        self.state = DagState(state_path)
+        self.max_workers = max_workers
+
+        self._out_fp: dict[str, str] = {}
+        self._loaded: set[str] = set()
+        self._load_lock = threading.Lock()
+
+    def _toposort(self) -> list[str]:
+        order, seen, active = [], set(), set()
+
+        def visit(name: str, path: tuple):
+            if name not in self.nodes:
+                raise ValueError(f"Unbekannter Knoten {name!r} (benötigt von {path[-1]})")
+            if name in active:
+                raise ValueError(f"Zyklus im DAG: {' → '.join(path + (name,))}")
+            if name in seen:
+                return
+            active.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep, path + (name,))
+            active.discard(name)
+            seen.add(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, ("<root>",))
+        return order
+
+    def downstream(self, names: Iterable[str]) -> set[str]:
+        """names + alle transitiven Nachfolger."""
+        out = set(names)
+        for name in self.order:
+            if any(d in out for d in self.nodes[name].deps):
+                out.add(name)
+        return out
+
+    # --------------------------------------------------
+    # Fingerprint / Aktualität
+    # --------------------------------------------------
+    def _fingerprints(self, node: Node) -> tuple[str, str]:
+        """(voll, lokal): lokal = ohne key() – Grundlage für resume."""
+        local = _digest(
+            node.name,
+            node.params,
+            {p.as_posix(): path_fingerprint(p, node.content_hash) for p in node.inputs},
+            {d: self._out_fp[d] for d in node.deps},
+        )
+        external = node.key() if node.key is not None else None
+        return _digest(local, external), local
+
+    def _up_to_date(self, node: Node, full: str, local: str, resume: bool) -> bool:
+        entry = self.state.get(node.name)
+        if entry.get("status") != OK:
+            return False
+        if node.output_fingerprint() != entry.get("outputs"):
+            return False
+        if resume:
+            return entry.get("local") == local
+        if entry.get("fingerprint") != full:
+            return False
+        if node.max_age is not None:
+            return pd.Timestamp.now(tz="UTC") - pd.Timestamp(entry["finished"]) <= node.max_age
+        return True
+
+    def _ensure_loaded(self, name: str) -> None:
+        """Ausgaben eines übersprungenen Knotens einmalig laden."""
+        with self._load_lock:
+            if name in self._loaded:
+                return
+            node = self.nodes[name]
+            if node.load is not None:
+                with span(f"dag.load_{name}"):
+                    node.load()
+            self._loaded.add(name)
+
+    # --------------------------------------------------
+    # Ausführung
+    # --------------------------------------------------
+    def _execute(self, name: str, force: set[str], resume: bool) -> str:
+        node = self.nodes[name]
+        full, local = self._fingerprints(node)
+
+        if name not in force and self._up_to_date(node, full, local, resume):
+            self._out_fp[name] = self.state.get(name)["outputs"]
+            return SKIPPED
+
+        for dep in node.deps:
+            self._ensure_loaded(dep)
+
+        t0 = time.perf_counter()
+        try:
+            with span(f"dag.{name}"):
+                node.run()
+        except Exception as e:
+            self.state.set(name, {
+                "status": FAILED,
+                "error": f"{type(e).__name__}: {e}",
+                "finished": pd.Timestamp.now(tz="UTC").isoformat(),
+            })
+            raise
+
+        outputs = node.output_fingerprint()
+        if node.outputs and outputs is None:
+            missing = [str(p) for p in node.outputs if not p.exists()]
+            self.state.set(name, {"status": FAILED, "error": f"Ausgaben fehlen: {missing}"})
+            raise FileNotFoundError(f"{name}: Ausgaben fehlen nach dem Lauf: {missing}")
+
+        # Knoten ohne Dateien: Fingerprint der Eingaben weiterreichen
+        outputs = outputs if node.outputs else full
+        self._out_fp[name] = outputs
+        self._loaded.add(name)   # Ergebnis liegt schon im Speicher
+        self.state.set(name, {
+            "status": OK,
+            "fingerprint": full,
+            "local": local,
+            "outputs": outputs,
+            "seconds": round(time.perf_counter() - t0, 3),
+            "finished": pd.Timestamp.now(tz="UTC").isoformat(),
+        })
+        return OK
+
+    def run(self, force: Iterable[str] = (), resume: bool = False) -> dict[str, str]:
+        """
+        Führt den DAG aus. force: diese Knoten (und alles danach) neu.
+        Returns: {Knoten: ok|skipped|failed|blocked} in topologischer Reihenfolge.
+        """
+        force = self.downstream(force)
+        status: dict[str, str] = {}
+        errors: dict[str, BaseException] = {}
+        running: dict = {}
+
+        def ready(name: str) -> bool:
+            return all(status.get(d) in (OK, SKIPPED) for d in self.nodes[name].deps)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                blocked = self.downstream(errors)
+                for name in self.order:
+                    if (name not in status and name not in blocked
+                            and name not in running.values() and ready(name)):
+                        running[pool.submit(self._execute, name, force, resume)] = name
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        status[name] = fut.result()
+                        mark = "⏭️ aktuell" if status[name] == SKIPPED else "✅"
+                        print(f" {mark} {name}")
+                    except Exception as e:
+                        status[name] = FAILED
+                        errors[name] = e
+                        print(f" ❌ {name}: {type(e).__name__}: {e}")
+
+        for name in self.order:
+            status.setdefault(name, BLOCKED)
+
+        if errors:
+            blocked = [n for n, s in status.items() if s == BLOCKED]
+            print(f" DAG-Fehler bei {', '.join(errors)} – {len(blocked)} Knoten blockiert "
+                  f"(weiter mit resume=True)")
+        return {name: status[name] for name in self.order}
+
+    def plan(self, resume: bool = False) -> dict[str, str]:
+        """
+        Trockenlauf: welche Knoten wären aktuell (skipped) und welche liefen
+        (run)? Nachfolger eines laufenden Knotens laufen ebenfalls.
+        """
+        out: dict[str, str] = {}
+        for name in self.order:
+            node = self.nodes[name]
+            if any(out[d] != SKIPPED for d in node.deps):
+                out[name] = "run"
+                continue
+            full, local = self._fingerprints(node)
+            if self._up_to_date(node, full, local, resume):
+                out[name] = SKIPPED
+                self._out_fp[name] = self.state.get(name)["outputs"]
+            else:
+                out[name] = "run"
+        return out
@@ -0,0 +1,191 @@
+# src/utils/instrument.py
+#
+# Leichtgewichtige Stage-Instrumentierung (Spans) für die Pipeline.
+#
+#   with span("prep.consumption_1h") as sp:
+#       df = ...
+#       sp.rows = len(df)
+#
+#   @timed("features.build_dataset")
+#   def build_dataset_leakage_free(...): ...
+#
+# Pro Span: Wall-Zeit, CPU-Zeit, Zeilen, Peak-RSS des Prozesses und
+# (optional) tracemalloc-Peak innerhalb des Spans – als JSON-Lines.
+#
+# Aktivieren:  GPS_TRACE=trace.jsonl   (oder "-" für stderr)
+#              GPS_TRACE_MEMORY=1      (tracemalloc, kostet spürbar Zeit)
+#              bzw. enable(...) / CLI --trace
+# Deaktiviert ist span() ein No-op (ein Flag-Check + Singleton).
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+_enabled = False
+_memory = False
+_out = None
+# Span-Stack pro Thread (parallele I/O-Stages, Thread-Pools), Schreiben unter Lock
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _stack() -> list["_Span"]:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def enable(path: Optional[str | Path] = "-", memory: bool = False) -> None:
+    """Instrumentierung einschalten; path='-' → stderr."""
+    global _enabled, _memory, _out
+    disable()
+
+    if path in (None, "-"):
+        _out = sys.stderr
+    else:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        _out = open(path, "a", encoding="utf-8")
+
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled, _out
+    _enabled = False
+    if _out is not None and _out is not sys.stderr:
+        _out.close()
+    _out = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: kB, macOS: Bytes
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+
+    def __init__(self, name: str, rows: Optional[int], attrs: dict):
+        self.name = name
+        self.rows = rows
+        self.attrs = attrs
+        self.child_peak = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+
+        if _memory:
+            # Peak bis hierher dem Eltern-Span gutschreiben, dann neu messen
+            _, peak_before = tracemalloc.get_traced_memory()
+            if len(stack) > 1:
+                stack[-2].child_peak = max(stack[-2].child_peak, peak_before)
+            tracemalloc.reset_peak()
+
+        self.t0 = time.perf_counter()
+        self.c0 = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.t0
+        cpu = time.process_time() - self.c0
+        stack = _stack()
+        stack.pop()
+
+        rec = {
+            "ts": time.time(),
+            "span": self.name,
+            "parent": self.parent,
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "rows": self.rows,
+            "peak_rss_mb": _peak_rss_mb(),
+        }
+
+        if _memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.child_peak)
+            rec["tracemalloc_peak_mb"] = round(peak / 1024 ** 2, 3)
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+
+        if exc_type is not None:
+            rec["error"] = exc_type.__name__
+        rec.update(self.attrs)
+
+        if _out is not None:
+            with _write_lock:
+                _out.write(json.dumps(rec, default=str) + "\n")
+                _out.flush()
+        return False
+
+
+def span(name: str, rows: Optional[int] = None, **attrs):
+    """Context-Manager für eine Pipeline-Stage (No-op, wenn deaktiviert)."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, rows, attrs)
+
+
+def timed(name: Optional[str] = None):
+    """Decorator-Variante von span()."""
+    def deco(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(label, None, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+    return deco
+
+
+# Aktivierung per Umgebungsvariable (ohne Import-Seiteneffekt, wenn nicht gesetzt)
+if os.getenv("GPS_TRACE"):
+    enable(os.getenv("GPS_TRACE"), memory=os.getenv("GPS_TRACE_MEMORY") == "1")
@@ -0,0 +1,143 @@
+# src/utils/plotting.py
+#
+# Gemeinsame Plot-Helfer für lange Stundenreihen:
+# - LTTB-Downsampling (Largest-Triangle-Three-Buckets)
+# - Scattergl (WebGL) ab einer Punktanzahl
+# - EIN lokales plotly.js für alle HTML-Outputs statt Bundle pro Datei
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import PROJECT_ROOT
+
+PLOT_ROOT = PROJECT_ROOT / "plots"
+
+MAX_POINTS = 5000        # Punkte pro Trace nach Downsampling
+WEBGL_THRESHOLD = 2000   # ab hier Scattergl statt Scatter
+
+
+# ============================================================
+# LTTB
+# ============================================================
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indizes der Punkte, die LTTB behält (erster + letzter immer dabei).
+    x muss aufsteigend sortiert sein (numerisch oder datetime64).
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket-Grenzen für die inneren Punkte (1 .. n-2)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+
+        # Schwerpunkt des nächsten Buckets (letzter Bucket → letzter Punkt)
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            avg_x = x[nlo:nhi].mean()
+            avg_y = np.nanmean(y[nlo:nhi]) if np.isfinite(y[nlo:nhi]).any() else y[a]
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        # NaN-Punkte nur wählen, wenn der ganze Bucket leer ist (Lücke bleibt sichtbar)
+        area = np.nan_to_num(area, nan=-1.0)
+
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx
+
+
+def downsample(x, y, max_points: int = MAX_POINTS):
+    """LTTB auf (x, y); gibt (x, y) als numpy arrays zurück."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    keep = lttb_indices(x, y, max_points)
+    return x[keep], y[keep]
+
+
+# ============================================================
+# Traces
+# ============================================================
+
+def line_trace(
+    x,
+    y,
+    name: str,
+    max_points: int = MAX_POINTS,
+    **kwargs,
+):
+    """
+    Linien-Trace für lange Reihen:
+    downsampled + Scattergl, sobald die Reihe groß ist.
+    """
+    import plotly.graph_objects as go
+
+    if isinstance(x, pd.DatetimeIndex):
+        # tz-aware → UTC naive, sonst fällt numpy auf object-dtype zurück
+        x = x.tz_convert("UTC").tz_localize(None) if x.tz is not None else x
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+
+    n_raw = len(y)
+    if n_raw > max_points:
+        x, y = downsample(x, y, max_points)
+
+    trace_cls = go.Scattergl if n_raw > WEBGL_THRESHOLD else go.Scatter
+    kwargs.setdefault("mode", "lines")
+
+    return trace_cls(x=x, y=y, name=name, **kwargs)
+
+
+# ============================================================
+# HTML mit gemeinsamem plotly.js
+# ============================================================
+
+def _shared_plotlyjs() -> Path:
+    """Schreibt plotly.min.js EINMAL pro plotly-Version nach plots/."""
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    path = PLOT_ROOT / f"plotly-{get_plotlyjs_version()}.min.js"
+    if not path.exists():
+        PLOT_ROOT.mkdir(parents=True, exist_ok=True)
+        path.write_text(get_plotlyjs(), encoding="utf-8")
+    return path
+
+
+def write_html(fig, out_path: Path) -> Path:
+    """
+    Wie fig.write_html, aber referenziert das gemeinsame lokale plotly.js
+    (relativer Pfad) statt das komplette Bundle einzubetten.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    js_path = _shared_plotlyjs()
+    rel = os.path.relpath(js_path.resolve(), out_path.parent.resolve())
+
+    fig.write_html(out_path, include_plotlyjs=Path(rel).as_posix())
+    return out_path
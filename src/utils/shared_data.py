@@ -0,0 +1,131 @@
+# src/utils/shared_data.py
+#
+# Shared-Memory-Datenebene für Prozess-Pools:
+# Der Parent legt die aufbereiteten Arrays EINMAL in SharedMemory ab,
+# Worker hängen sich zero-copy an (np.ndarray auf dem Shared-Buffer) und
+# bauen den pandas-Index aus den mitgeschickten Metadaten neu auf.
+# An die Worker geht nur das kleine Metadaten-dict (kein Pickle der Daten).
+
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+# Worker-seitig: einmal pro Prozess angehängte Frames (siehe init_worker)
+_ATTACHED: dict[str, pd.DataFrame | pd.Series] = {}
+_HANDLES: list[shared_memory.SharedMemory] = []
+
+
+def _to_shm(arr: np.ndarray) -> tuple[shared_memory.SharedMemory, dict]:
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    return shm, {"shm": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+
+
+def _from_shm(meta: dict) -> np.ndarray:
+    # track=False: Worker melden das Segment nicht beim resource_tracker an,
+    # Besitzer (und unlink) bleibt der Parent. Vor Python 3.13 teilen sich
+    # Pool-Worker den Tracker des Parents → doppelte Anmeldung ist harmlos.
+    try:
+        shm = shared_memory.SharedMemory(name=meta["shm"], track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=meta["shm"])
+    _HANDLES.append(shm)
+    arr = np.ndarray(meta["shape"], dtype=np.dtype(meta["dtype"]), buffer=shm.buf)
+    arr.flags.writeable = False
+    return arr
+
+
+class SharedFrames:
+    """
+    Parent-seitiger Besitzer der Shared-Memory-Segmente.
+
+        with SharedFrames({"consumption": s, "era5": df}) as shared:
+            with ProcessPoolExecutor(initializer=init_worker, initargs=(shared.meta,)) as ex:
+                ...
+
+    Unterstützt Series/DataFrames mit einheitlichem numerischem dtype und
+    DatetimeIndex (oder beliebigem numerischem Index).
+    """
+
+    def __init__(self, frames: dict[str, pd.DataFrame | pd.Series], dtype=None):
+        self._segments: list[shared_memory.SharedMemory] = []
+        self.meta: dict[str, dict] = {}
+
+        for name, obj in frames.items():
+            self.meta[name] = self._publish(obj, dtype)
+
+    def _publish(self, obj, dtype) -> dict:
+        is_series = isinstance(obj, pd.Series)
+        values = obj.to_numpy(dtype=dtype or float)
+
+        idx = obj.index
+        if isinstance(idx, pd.DatetimeIndex):
+            # asi8 = Epoch-ns (bei tz-aware in UTC)
+            tz = str(idx.tz) if idx.tz is not None else None
+            idx_values = idx.as_unit("ns").asi8
+            index_kind = "datetime"
+        else:
+            tz = None
+            idx_values = idx.to_numpy()
+            index_kind = "plain"
+
+        shm_v, meta_v = _to_shm(values)
+        shm_i, meta_i = _to_shm(np.asarray(idx_values))
+        self._segments += [shm_v, shm_i]
+
+        return {
+            "values": meta_v,
+            "index": meta_i,
+            "index_kind": index_kind,
+            "index_name": idx.name,
+            "tz": tz,
+            "series": is_series,
+            "name": obj.name if is_series else None,
+            "columns": None if is_series else list(obj.columns),
+        }
+
+    def close(self) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(meta: dict) -> pd.DataFrame | pd.Series:
+    """Zero-copy-Sicht auf ein veröffentlichtes Objekt (read-only)."""
+    values = _from_shm(meta["values"])
+    idx_values = _from_shm(meta["index"])
+
+    if meta["index_kind"] == "datetime":
+        index = pd.DatetimeIndex(idx_values.view("datetime64[ns]"), name=meta["index_name"])
+        if meta["tz"]:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+    else:
+        index = pd.Index(idx_values, name=meta["index_name"])
+
+    if meta["series"]:
+        return pd.Series(values, index=index, name=meta["name"], copy=False)
+    return pd.DataFrame(values, index=index, columns=meta["columns"], copy=False)
+
+
+def init_worker(meta: dict[str, dict]) -> None:
+    """ProcessPool-initializer: hängt alle Objekte einmal pro Worker an."""
+    _ATTACHED.clear()
+    for name, m in meta.items():
+        _ATTACHED[name] = attach(m)
+
+
+def get_shared(name: str) -> pd.DataFrame | pd.Series:
+    return _ATTACHED[name]
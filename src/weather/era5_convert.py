@@ -1,7 +1,6 @@
 # src/weather/era5_convert.py
 
 from pathlib import Path
-import xarray as xr
 import pandas as pd
 
 ERA5_DIR = Path("era5_plz")
@@ -12,6 +11,8 @@ def convert_nc_to_csv(plz: str):
     if not nc_path.exists():
         raise FileNotFoundError(nc_path)
 
+    import xarray as xr  # lazy: xarray nur für die Konvertierung
+
     ds = xr.open_dataset(nc_path)
 
     # ERA5: 2m temperature
@@ -2,20 +2,20 @@
 
 from pathlib import Path
 from typing import Iterable
-import cdsapi
-import pandas as pd
 
 from src.geo.plz_registry import PLZ_TO_LATLON
 
 ERA5_DIR = Path("era5_plz")
-ERA5_DIR.mkdir(exist_ok=True)
 
 
 def download_era5_for_plz(plz: str, years=("2024", "2025")):
     if plz not in PLZ_TO_LATLON:
         raise KeyError(f"Keine Koordinaten für PLZ {plz}")
 
+    import cdsapi  # lazy: cdsapi nur für den Download nötig
+
     lat, lon = PLZ_TO_LATLON[plz]
+    ERA5_DIR.mkdir(exist_ok=True)
     out_path = ERA5_DIR / f"era5_{plz}.nc"
 
     c = cdsapi.Client()
@@ -1,11 +1,12 @@
 # src/weather/era5_to_csv.py
 
-import xarray as xr
 import pandas as pd
 from pathlib import Path
 
 
 def convert_nc_to_csv(nc_path: Path, csv_path: Path):
+    import xarray as xr  # lazy: xarray nur für die Konvertierung
+
     ds = xr.open_dataset(nc_path)
 
     df = (
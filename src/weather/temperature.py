@@ -4,21 +4,25 @@ from __future__ import annotations
 
 import pandas as pd
 from pathlib import Path
+from typing import Callable
 
 from src.weather.plz_weights import get_active_plz
 from src.weather.era5_coverage import check_era5_coverage
 from src.weather.era5_autofill import ensure_era5_coverage
 from src.weather.era5_loader import load_era5_plz
+from src.utils.instrument import span, timed
 
 
 ERA5_DIR = Path("era5_plz")
 
 
+@timed("build_temperature_series")
 def build_temperature_series(
     df_gen_raw: pd.DataFrame,
     train_start: pd.Timestamp,
     test_end: pd.Timestamp,
     lookback_days: int = 42,
+    era5_loader: Callable[[str, Path], pd.Series] = load_era5_plz,
 ) -> pd.Series:
     """
     Baut eine stündliche, UTC, gewichtete Community-Temperatur.
@@ -28,6 +32,8 @@ def build_temperature_series(
     2) ERA5-Coverage sicherstellen (auto-download falls nötig)
     3) ERA5 CSVs laden
     4) gewichtete Aggregation
+
+    era5_loader: z.B. DataContext.load_era5, damit CSVs nur einmal gelesen werden
     """
 
     train_start = pd.Timestamp(train_start)
@@ -56,22 +62,24 @@ def build_temperature_series(
     # --------------------------------------------------
     # 2) ERA5 Coverage sicherstellen (AUTOMATISCH!)
     # --------------------------------------------------
-    ensure_era5_coverage(
-        df_gen_raw=df_gen_raw,
-        era5_dir=ERA5_DIR,
-        reference_day=train_start.date(),
-        lookback_days=lookback_days,
-    )
+    with span("temperature.era5_autofill"):
+        ensure_era5_coverage(
+            df_gen_raw=df_gen_raw,
+            era5_dir=ERA5_DIR,
+            reference_day=train_start.date(),
+            lookback_days=lookback_days,
+        )
 
     # --------------------------------------------------
     # 3) ERA5 laden + gewichten
     # --------------------------------------------------
     temp_weighted = []
 
-    for plz, w in weights.items():
-        s = load_era5_plz(plz, ERA5_DIR)
-        s = s.loc[train_start:test_end]
-        temp_weighted.append(w * s)
+    with span("temperature.era5_load", n_plz=len(weights)):
+        for plz, w in weights.items():
+            s = era5_loader(plz, ERA5_DIR)
+            s = s.loc[train_start:test_end]
+            temp_weighted.append(w * s)
 
     if not temp_weighted:
         raise ValueError("Keine Temperaturdaten verfügbar")
@@ -87,3 +95,28 @@ def build_temperature_series(
     )
 
     return temp.loc[train_start:test_end]
+
+
+def weighted_temperature(
+    era5_matrix: pd.DataFrame,
+    weights: pd.Series,
+    train_start: pd.Timestamp,
+    test_end: pd.Timestamp,
+) -> pd.Series:
+    """
+    Wie Schritt 3)+4) von build_temperature_series, aber auf einer schon
+    geladenen ERA5-Matrix (Spalten = PLZ, Index = Stunde UTC).
+    """
+    cols = [str(plz) for plz in weights.index]
+    w = pd.Series(weights.to_numpy(float), index=cols)
+
+    temp = (
+        era5_matrix.loc[train_start:test_end, cols]
+        .mul(w, axis=1)
+        .sum(axis=1, skipna=False)
+        .sort_index()
+        .asfreq("1h")
+        .ffill()
+    )
+
+    return temp.loc[train_start:test_end]